@@ -0,0 +1,41 @@
+"""tasks keyset index
+
+Revision ID: 7c1e4f2a9b30
+Revises: 5a5b78d20515
+Create Date: 2026-10-18 09:12:41.305118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1e4f2a9b30'
+down_revision: Union[str, Sequence[str], None] = '5a5b78d20515'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY no puede ejecutarse dentro de la transacción de la migración
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tasks_user_id_created_at_id',
+            'tasks',
+            ['user_id', 'created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_tasks_user_id_created_at_id',
+            table_name='tasks',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,64 @@
+"""task sync changes
+
+Revision ID: a6d2f8c3e174
+Revises: f3c81d5a9e27
+Create Date: 2026-10-18 21:05:17.482906
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d2f8c3e174'
+down_revision: Union[str, Sequence[str], None] = 'f3c81d5a9e27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Con un DEFAULT no volátil, PostgreSQL (11+) añade la columna sin reescribir la tabla:
+    # now() se evalúa una vez y las tareas existentes cuentan como cambiadas al migrar
+    op.add_column('tasks', sa.Column(
+        'updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False
+    ))
+    op.create_table('task_tombstones',
+    sa.Column('task_id', sa.Uuid(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('task_id')
+    )
+    op.create_index(
+        'ix_task_tombstones_user_id_deleted_at_task_id',
+        'task_tombstones',
+        ['user_id', 'deleted_at', 'task_id'],
+        unique=False,
+    )
+    op.create_index('ix_task_tombstones_deleted_at', 'task_tombstones', ['deleted_at'], unique=False)
+    # CONCURRENTLY no puede ejecutarse dentro de la transacción de la migración
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tasks_user_id_updated_at_id',
+            'tasks',
+            ['user_id', 'updated_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_tasks_user_id_updated_at_id',
+            table_name='tasks',
+            postgresql_concurrently=True,
+        )
+    op.drop_index('ix_task_tombstones_deleted_at', table_name='task_tombstones')
+    op.drop_index('ix_task_tombstones_user_id_deleted_at_task_id', table_name='task_tombstones')
+    op.drop_table('task_tombstones')
+    op.drop_column('tasks', 'updated_at')
@@ -0,0 +1,150 @@
+"""tasks hash partitioning
+
+Revision ID: b7f3a9c2d481
+Revises: c9e4b1d7f052
+Create Date: 2026-10-18 23:47:10.228516
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7f3a9c2d481'
+down_revision: Union[str, Sequence[str], None] = 'c9e4b1d7f052'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Filas copiadas por transacción durante el relleno
+BATCH_ROWS = 5000
+
+# Índices secundarios de tasks (la clave primaria aparte). En la tabla particionada se
+# crean por partición con CONCURRENTLY y con un nombre temporal hasta el intercambio
+INDEXES = {
+    'ix_tasks_title': "(title)",
+    'ix_tasks_user_id': "(user_id)",
+    'ix_tasks_user_id_created_at_id': "(user_id, created_at, id)",
+    'ix_tasks_user_id_status_created_at_id': "(user_id, status, created_at, id)",
+    'ix_tasks_user_id_updated_at_id': "(user_id, updated_at, id)",
+    'ix_tasks_user_id_title_id': '(user_id, (title COLLATE "C"), id)',
+    'ix_tasks_user_id_status_title_id': '(user_id, status, (title COLLATE "C"), id)',
+}
+
+
+def upgrade() -> None:
+    """
+    Upgrade schema.
+
+    Convierte tasks en una tabla particionada por HASH (user_id) con TASK_PARTITIONS
+    particiones, sin bloquearla mientras se copian los datos: tabla nueva que un
+    trigger mantiene al día (altas, cambios y borrados), relleno por lotes, índices
+    por partición con CONCURRENTLY e intercambio final breve. La clave primaria pasa
+    a (id, user_id): en una tabla particionada debe incluir la clave de partición.
+    """
+    partitions = settings.TASK_PARTITIONS
+    op.execute("CREATE TABLE tasks_partitioned (LIKE tasks INCLUDING DEFAULTS) PARTITION BY HASH (user_id)")
+    op.execute("ALTER TABLE tasks_partitioned ADD CONSTRAINT tasks_partitioned_pkey PRIMARY KEY (id, user_id)")
+    op.execute(
+        "ALTER TABLE tasks_partitioned ADD CONSTRAINT tasks_partitioned_user_id_fkey "
+        "FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE"
+    )
+    for remainder in range(partitions):
+        op.execute(
+            f"CREATE TABLE tasks_p{remainder} PARTITION OF tasks_partitioned "
+            f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"
+        )
+    # LIKE conserva el orden de columnas: NEW.* encaja tal cual en la tabla nueva
+    op.execute(
+        """
+        CREATE FUNCTION tasks_copy_to_partitioned() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                DELETE FROM tasks_partitioned WHERE id = OLD.id AND user_id = OLD.user_id;
+                RETURN OLD;
+            END IF;
+            INSERT INTO tasks_partitioned VALUES (NEW.*)
+            ON CONFLICT (id, user_id) DO UPDATE SET
+                title = EXCLUDED.title, description = EXCLUDED.description, status = EXCLUDED.status,
+                created_at = EXCLUDED.created_at, updated_at = EXCLUDED.updated_at;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute("SET LOCAL lock_timeout = '5s'")
+    op.execute(
+        "CREATE TRIGGER tasks_copy_to_partitioned AFTER INSERT OR UPDATE OR DELETE ON tasks "
+        "FOR EACH ROW EXECUTE FUNCTION tasks_copy_to_partitioned()"
+    )
+
+    with op.get_context().autocommit_block():
+        # Relleno por lotes en orden de clave primaria: cada lote es una transacción corta.
+        # FOR KEY SHARE hace esperar a un borrado concurrente de esas filas hasta que el
+        # lote se confirma (su trigger las borra después), así que nunca se copia una
+        # fila ya borrada. Lo que el trigger ya copió se conserva (DO NOTHING)
+        bind = op.get_bind()
+        last_id = "00000000-0000-0000-0000-000000000000"
+        while True:
+            batch_end = bind.execute(
+                sa.text(
+                    # max() no existe para uuid: último id del lote por orden descendente
+                    "SELECT id FROM (SELECT id FROM tasks WHERE id > :last_id ORDER BY id LIMIT :batch_rows) batch "
+                    "ORDER BY id DESC LIMIT 1"
+                ),
+                {"last_id": last_id, "batch_rows": BATCH_ROWS},
+            ).scalar()
+            if batch_end is None:
+                break
+            bind.execute(
+                sa.text(
+                    "INSERT INTO tasks_partitioned SELECT * FROM tasks "
+                    "WHERE id > :last_id AND id <= :batch_end FOR KEY SHARE "
+                    "ON CONFLICT (id, user_id) DO NOTHING"
+                ),
+                {"last_id": last_id, "batch_end": batch_end},
+            )
+            last_id = batch_end
+        op.execute("ANALYZE tasks_partitioned")
+
+        # Índice del padre sin construir (ON ONLY, queda inválido) y uno por partición con
+        # CONCURRENTLY: el trigger sigue escribiendo mientras se construyen. Al adjuntar
+        # la última partición el índice del padre pasa a ser válido
+        for index_name, columns in INDEXES.items():
+            op.execute(f"CREATE INDEX {index_name}_new ON ONLY tasks_partitioned {columns}")
+            for remainder in range(partitions):
+                op.execute(f"CREATE INDEX CONCURRENTLY {index_name}_p{remainder} ON tasks_p{remainder} {columns}")
+                op.execute(f"ALTER INDEX {index_name}_new ATTACH PARTITION {index_name}_p{remainder}")
+
+    # Intercambio: solo cambia catálogo, pero necesita un bloqueo exclusivo breve.
+    # Si no se obtiene pronto se aborta en lugar de encolar todo el tráfico detrás
+    op.execute("SET LOCAL lock_timeout = '5s'")
+    op.execute("LOCK TABLE tasks IN ACCESS EXCLUSIVE MODE")
+    op.execute("DROP TRIGGER tasks_copy_to_partitioned ON tasks")
+    op.execute("DROP FUNCTION tasks_copy_to_partitioned()")
+    op.execute("DROP TABLE tasks")
+    op.execute("ALTER TABLE tasks_partitioned RENAME TO tasks")
+    op.execute("ALTER TABLE tasks RENAME CONSTRAINT tasks_partitioned_pkey TO tasks_pkey")
+    op.execute("ALTER TABLE tasks RENAME CONSTRAINT tasks_partitioned_user_id_fkey TO tasks_user_id_fkey")
+    for index_name in INDEXES:
+        op.execute(f"ALTER INDEX {index_name}_new RENAME TO {index_name}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Copia toda la tabla con un bloqueo exclusivo: solo para volver atrás
+    op.execute("LOCK TABLE tasks IN ACCESS EXCLUSIVE MODE")
+    op.execute("CREATE TABLE tasks_unpartitioned (LIKE tasks INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO tasks_unpartitioned SELECT * FROM tasks")
+    op.execute("DROP TABLE tasks")
+    op.execute("ALTER TABLE tasks_unpartitioned RENAME TO tasks")
+    op.execute("ALTER TABLE tasks ADD CONSTRAINT tasks_pkey PRIMARY KEY (id)")
+    op.execute(
+        "ALTER TABLE tasks ADD CONSTRAINT tasks_user_id_fkey "
+        "FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE"
+    )
+    for index_name, columns in INDEXES.items():
+        op.execute(f"CREATE INDEX {index_name} ON tasks {columns}")
@@ -0,0 +1,49 @@
+"""account purges
+
+Revision ID: c9e4b1d7f052
+Revises: a6d2f8c3e174
+Create Date: 2026-10-18 22:31:48.905163
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e4b1d7f052'
+down_revision: Union[str, Sequence[str], None] = 'a6d2f8c3e174'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Columna nullable sin DEFAULT: solo cambia el catálogo, sin reescribir users
+    op.add_column('users', sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_table('account_purges',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('requested_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('deleted_rows', sa.BigInteger(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_account_purges_user_id'), 'account_purges', ['user_id'], unique=False)
+    op.create_index(
+        'ix_account_purges_pending',
+        'account_purges',
+        ['requested_at'],
+        unique=False,
+        postgresql_where=sa.text('finished_at IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_account_purges_pending', table_name='account_purges')
+    op.drop_index(op.f('ix_account_purges_user_id'), table_name='account_purges')
+    op.drop_table('account_purges')
+    op.drop_column('users', 'deleted_at')
@@ -0,0 +1,57 @@
+"""tasks filter and sort indexes
+
+Revision ID: d41f6a8e2c15
+Revises: b3d9e1c4a702
+Create Date: 2026-10-18 14:05:27.901342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41f6a8e2c15'
+down_revision: Union[str, Sequence[str], None] = 'b3d9e1c4a702'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY no puede ejecutarse dentro de la transacción de la migración
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tasks_user_id_status_created_at_id',
+            'tasks',
+            ['user_id', 'status', 'created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        # title COLLATE "C": orden por bytes, usable para ORDER BY title y para el rango del prefijo
+        op.create_index(
+            'ix_tasks_user_id_title_id',
+            'tasks',
+            ['user_id', sa.text('(title COLLATE "C")'), 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_tasks_user_id_status_title_id',
+            'tasks',
+            ['user_id', 'status', sa.text('(title COLLATE "C")'), 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for index_name in (
+            'ix_tasks_user_id_status_title_id',
+            'ix_tasks_user_id_title_id',
+            'ix_tasks_user_id_status_created_at_id',
+        ):
+            op.drop_index(index_name, table_name='tasks', postgresql_concurrently=True)
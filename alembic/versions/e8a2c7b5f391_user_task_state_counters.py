@@ -0,0 +1,44 @@
+"""user task state counters
+
+Revision ID: e8a2c7b5f391
+Revises: d41f6a8e2c15
+Create Date: 2026-10-18 16:05:27.184390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8a2c7b5f391'
+down_revision: Union[str, Sequence[str], None] = 'd41f6a8e2c15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('user_task_state', sa.Column('pending_count', sa.BigInteger(), server_default='0', nullable=False))
+    op.add_column('user_task_state', sa.Column('completed_count', sa.BigInteger(), server_default='0', nullable=False))
+    # Rellena los contadores con las tareas existentes
+    op.execute(
+        """
+        INSERT INTO user_task_state (user_id, version, pending_count, completed_count)
+        SELECT user_id, 1,
+               COUNT(*) FILTER (WHERE status = 'pending'),
+               COUNT(*) FILTER (WHERE status = 'completed')
+        FROM tasks
+        GROUP BY user_id
+        ON CONFLICT (user_id) DO UPDATE
+        SET pending_count = EXCLUDED.pending_count,
+            completed_count = EXCLUDED.completed_count
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('user_task_state', 'completed_count')
+    op.drop_column('user_task_state', 'pending_count')
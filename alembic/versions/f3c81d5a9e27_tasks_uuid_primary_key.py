@@ -0,0 +1,115 @@
+"""tasks uuid primary key
+
+Revision ID: f3c81d5a9e27
+Revises: e8a2c7b5f391
+Create Date: 2026-10-18 18:20:44.610273
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c81d5a9e27'
+down_revision: Union[str, Sequence[str], None] = 'e8a2c7b5f391'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Filas convertidas por transacción durante el relleno
+BATCH_ROWS = 5000
+
+# Índices que incluyen el id: se recrean sobre la columna nueva con un nombre temporal
+ID_INDEXES = {
+    'ix_tasks_user_id_created_at_id': "(user_id, created_at, id_uuid)",
+    'ix_tasks_user_id_status_created_at_id': "(user_id, status, created_at, id_uuid)",
+    'ix_tasks_user_id_title_id': '(user_id, (title COLLATE "C"), id_uuid)',
+    'ix_tasks_user_id_status_title_id': '(user_id, status, (title COLLATE "C"), id_uuid)',
+}
+
+
+def upgrade() -> None:
+    """
+    Upgrade schema.
+
+    Convierte tasks.id de varchar(36) a uuid sin bloquear la tabla mientras dura la
+    conversión: columna nueva rellenada por un trigger (altas) y por lotes (filas
+    existentes), índices creados con CONCURRENTLY y un intercambio final corto.
+    Los ids existentes (uuid4) conservan su valor; las tareas nuevas usan uuid7.
+    Es irreversible (ver downgrade).
+    """
+    op.execute("ALTER TABLE tasks ADD COLUMN id_uuid uuid")
+    op.execute(
+        """
+        CREATE FUNCTION tasks_sync_id_uuid() RETURNS trigger AS $$
+        BEGIN
+            NEW.id_uuid := NEW.id::uuid;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER tasks_sync_id_uuid BEFORE INSERT OR UPDATE OF id ON tasks "
+        "FOR EACH ROW EXECUTE FUNCTION tasks_sync_id_uuid()"
+    )
+    # NOT VALID no recorre la tabla; validado después permite un SET NOT NULL sin escaneo
+    op.execute("ALTER TABLE tasks ADD CONSTRAINT tasks_id_uuid_not_null CHECK (id_uuid IS NOT NULL) NOT VALID")
+
+    with op.get_context().autocommit_block():
+        # Relleno por lotes en orden de clave primaria: cada lote es una transacción corta
+        bind = op.get_bind()
+        last_id = ""
+        while True:
+            batch_end = bind.execute(
+                sa.text(
+                    "SELECT max(id) FROM (SELECT id FROM tasks WHERE id > :last_id ORDER BY id LIMIT :batch_rows) batch"
+                ),
+                {"last_id": last_id, "batch_rows": BATCH_ROWS},
+            ).scalar()
+            if batch_end is None:
+                break
+            # Las filas insertadas durante la migración ya las rellenó el trigger
+            bind.execute(
+                sa.text(
+                    "UPDATE tasks SET id_uuid = id::uuid "
+                    "WHERE id > :last_id AND id <= :batch_end AND id_uuid IS NULL"
+                ),
+                {"last_id": last_id, "batch_end": batch_end},
+            )
+            last_id = batch_end
+
+        op.execute("ALTER TABLE tasks VALIDATE CONSTRAINT tasks_id_uuid_not_null")
+        op.execute("CREATE UNIQUE INDEX CONCURRENTLY tasks_id_uuid_key ON tasks (id_uuid)")
+        for index_name, columns in ID_INDEXES.items():
+            op.execute(f"CREATE INDEX CONCURRENTLY {index_name}_uuid ON tasks {columns}")
+
+    # Intercambio: solo cambia catálogo, pero necesita un bloqueo exclusivo breve.
+    # Si no se obtiene pronto se aborta en lugar de encolar todo el tráfico detrás
+    op.execute("SET LOCAL lock_timeout = '5s'")
+    op.execute("ALTER TABLE tasks ALTER COLUMN id_uuid SET NOT NULL")
+    op.execute("ALTER TABLE tasks DROP CONSTRAINT tasks_id_uuid_not_null")
+    op.execute("DROP TRIGGER tasks_sync_id_uuid ON tasks")
+    op.execute("DROP FUNCTION tasks_sync_id_uuid()")
+    op.execute("ALTER TABLE tasks DROP CONSTRAINT tasks_pkey")
+    # Elimina también los índices antiguos que incluían el id
+    op.execute("ALTER TABLE tasks DROP COLUMN id")
+    op.execute("ALTER TABLE tasks RENAME COLUMN id_uuid TO id")
+    op.execute("ALTER TABLE tasks ADD CONSTRAINT tasks_pkey PRIMARY KEY USING INDEX tasks_id_uuid_key")
+    for index_name in ID_INDEXES:
+        op.execute(f"ALTER INDEX {index_name}_uuid RENAME TO {index_name}")
+
+
+def downgrade() -> None:
+    """
+    Downgrade schema.
+
+    No tiene inverso: el texto original de los ids no se conserva (uuid::text da la
+    forma canónica en minúsculas) y la columna no vuelve a su posición. Volver atrás
+    exige restaurar una copia de seguridad anterior a esta revisión.
+    """
+    raise NotImplementedError(
+        "Revision f3c81d5a9e27 (tasks.id varchar(36) -> uuid) cannot be downgraded: the original "
+        "id strings are not kept. Restore a backup taken before this revision instead."
+    )
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Response
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -24,4 +24,10 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSessi
 
 @router.get("/me", response_model=UserOut)
 def get_profile(current_user: UserOut = Depends(get_current_user)):
-    return current_user
\ No newline at end of file
+    return current_user
+
+@router.delete("/me", status_code=status.HTTP_202_ACCEPTED)
+async def delete_account(db: AsyncSession = Depends(get_db), current_user: UserOut = Depends(get_current_user)):
+    # 202: la cuenta queda desactivada ya; sus tareas se borran después, en segundo plano
+    await AuthService(db).delete_account(current_user.id)
+    return Response(status_code=status.HTTP_202_ACCEPTED)
@@ -1,56 +1,235 @@
-from typing import List
-from fastapi import APIRouter, Depends, status,Response
+from datetime import datetime
+from typing import List, Literal, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, status,Response,Query,Header,Request,WebSocket,WebSocketException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.schemas import task as task_schema
-from app.dependens.db import get_db
-from app.dependens.security import get_current_user
+from app.dependens.db import get_db, get_read_db, get_read_session_factory, get_session_factory
+from app.dependens.security import get_current_user, get_websocket_user
 from app.schemas.user import UserOut
+from app.core.etag import make_etag, etag_matches, expected_version
+
+from app.services.task_serialization import negotiate_representation
 
 from app.services.task_service import TaskService
+from app.services.task_events import open_task_events, sse_stream, websocket_stream
 
 router = APIRouter()
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Las lecturas de tareas cambian de formato según Accept (JSON o MessagePack)
+VARY_HEADERS = {"Vary": "Accept"}
+# Documenta en OpenAPI los formatos alternativos de las lecturas
+READ_RESPONSES = {200: {"content": {"application/msgpack": {}}}}
+
 @router.post("/", response_model=task_schema.Task, status_code=status.HTTP_201_CREATED)
 async def create_task(
     task: task_schema.TaskCreate,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserOut = Depends(get_current_user)
+):
+    service = TaskService(db)
+    db_task = await service.create_user_task(task=task, user_id=current_user.id)
+    response.headers["ETag"] = make_etag(current_user.id, service.version)
+    return db_task
+
+@router.post("/bulk", response_model=task_schema.TaskBulkResult)
+async def bulk_create_tasks(
+    payload: task_schema.TaskBulkCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserOut = Depends(get_current_user)
+):
+    return await TaskService(db).bulk_create_tasks(items=payload.items, user_id=current_user.id)
+
+@router.patch("/bulk", response_model=task_schema.TaskBulkResult)
+async def bulk_update_tasks(
+    payload: task_schema.TaskBulkUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserOut = Depends(get_current_user)
+):
+    return await TaskService(db).bulk_update_tasks(items=payload.items, user_id=current_user.id)
+
+# Debe declararse antes de DELETE /{task_id} para que "bulk" no se tome como ID
+@router.delete("/bulk", response_model=task_schema.TaskBulkResult)
+async def bulk_delete_tasks(
+    payload: task_schema.TaskBulkDelete,
     db: AsyncSession = Depends(get_db),
     current_user: UserOut = Depends(get_current_user)
 ):
-    return await TaskService(db).create_user_task(task=task, user_id=current_user.id)
+    return await TaskService(db).bulk_delete_tasks(task_ids=payload.ids, user_id=current_user.id)
 
-@router.get("/", response_model=List[task_schema.Task])
+@router.get("/", response_model=List[task_schema.Task], responses=READ_RESPONSES)
 async def read_tasks(
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1),
+    cursor: Optional[str] = None,
+    status_filter: Optional[task_schema.StatusEnum] = Query(None, alias="status"),
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    title_prefix: Optional[str] = Query(None, min_length=1, max_length=50),
+    sort: task_schema.TaskSortEnum = task_schema.TaskSortEnum.created_at,
+    if_none_match: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserOut = Depends(get_current_user)
+):
+    service = TaskService(db)
+    # La versión se lee antes que las tareas: el ETag nunca es más nuevo que el contenido
+    version = await service.get_version(current_user.id)
+    etag = make_etag(current_user.id, version)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, **VARY_HEADERS})
+    representation = negotiate_representation(accept)
+    body, next_cursor = await service.get_tasks_page(
+        user_id=current_user.id, version=version, skip=skip, limit=limit, cursor=cursor,
+        status_filter=status_filter, created_after=created_after, created_before=created_before,
+        title_prefix=title_prefix, sort=sort, representation=representation,
+    )
+    # Por defecto el cuerpo sigue siendo una lista JSON para no romper a los clientes existentes.
+    # Se serializa directamente desde las filas: response_model solo documenta el esquema
+    headers = {"ETag": etag, **VARY_HEADERS}
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    return Response(content=body, media_type=representation.content_type, headers=headers)
+
+@router.post(
+    "/import",
+    response_model=task_schema.TaskImportResult,
+    openapi_extra={"requestBody": {"required": True, "content": {
+        "application/x-ndjson": {"schema": {"type": "string"}},
+        "text/csv": {"schema": {"type": "string"}},
+    }}},
+)
+async def import_tasks(
+    request: Request,
+    import_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
     db: AsyncSession = Depends(get_db),
     current_user: UserOut = Depends(get_current_user)
 ):
-    return await TaskService(db).get_tasks(user_id=current_user.id, skip=skip, limit=limit)
+    # El cuerpo se consume en streaming, nunca completo en memoria
+    return await TaskService(db).import_tasks(request.stream(), user_id=current_user.id, import_format=import_format)
 
-@router.get("/{task_id}", response_model=task_schema.Task)
-async def read_task(
-    task_id: str,
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+# Debe declararse antes de GET /{task_id} para que "stats" no se tome como ID
+@router.get("/stats", response_model=task_schema.TaskStats)
+async def read_task_stats(
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserOut = Depends(get_current_user)
+):
+    return await TaskService(db).get_stats(user_id=current_user.id)
+
+# Debe declararse antes de GET /{task_id} para que "export" no se tome como ID
+@router.get("/export", response_class=StreamingResponse)
+async def export_tasks(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    session_factory = Depends(get_read_session_factory),
+    current_user: UserOut = Depends(get_current_user)
+):
+    async def body():
+        async with session_factory() as session:
+            async for chunk in TaskService(session).export_tasks(current_user.id, export_format):
+                yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{export_format}"'},
+    )
+
+@router.get("/changes", response_model=task_schema.TaskChanges, responses=READ_RESPONSES)
+async def read_task_changes(
+    since: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=1000),
+    accept: Optional[str] = Header(None),
+    # Siempre el primario: una réplica con retraso haría que el token avanzase sobre cambios aún no replicados
     db: AsyncSession = Depends(get_db),
     current_user: UserOut = Depends(get_current_user)
 ):
-    return await TaskService(db).get_task(task_id=task_id,user_id=current_user.id)
+    representation = negotiate_representation(accept)
+    body = await TaskService(db).get_changes(
+        user_id=current_user.id, since=since, limit=limit, representation=representation
+    )
+    return Response(content=body, media_type=representation.single.content_type, headers=VARY_HEADERS)
+
+@router.get("/events", response_class=StreamingResponse)
+async def task_events(
+    session_factory = Depends(get_read_session_factory),
+    current_user: UserOut = Depends(get_current_user)
+):
+    # Se suscribe antes de responder: el límite de conexiones devuelve 429, no un stream vacío
+    subscription, version = await open_task_events(session_factory, current_user.id)
+    return StreamingResponse(
+        sse_stream(subscription, version),
+        media_type="text/event-stream",
+        # Sin caché ni buffering en proxies (nginx): cada evento debe salir al momento
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.websocket("/events/ws")
+async def task_events_websocket(
+    websocket: WebSocket,
+    session_factory = Depends(get_session_factory),
+    current_user: UserOut = Depends(get_websocket_user)
+):
+    try:
+        subscription, version = await open_task_events(session_factory, current_user.id)
+    except HTTPException as e:
+        # Límite de conexiones (u otro error) antes del handshake: se rechaza el WebSocket
+        raise WebSocketException(code=status.WS_1013_TRY_AGAIN_LATER, reason=e.detail)
+    await websocket.accept()
+    await websocket_stream(websocket, subscription, version)
+
+@router.get("/{task_id}", response_model=task_schema.Task, responses=READ_RESPONSES)
+async def read_task(
+    task_id: UUID,
+    if_none_match: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserOut = Depends(get_current_user)
+):
+    service = TaskService(db)
+    version = await service.get_version(current_user.id)
+    etag = make_etag(current_user.id, version)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, **VARY_HEADERS})
+    representation = negotiate_representation(accept).single
+    body = await service.get_task_body(
+        task_id=task_id, user_id=current_user.id, version=version, representation=representation
+    )
+    return Response(content=body, media_type=representation.content_type, headers={"ETag": etag, **VARY_HEADERS})
 
 @router.put("/{task_id}", response_model=task_schema.Task)
 async def update_task(
-    task_id: str,
+    task_id: UUID,
     task: task_schema.TaskUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db),
     current_user: UserOut = Depends(get_current_user)
 ):
-    
-    return await TaskService(db).update_task(task_id=task_id, user_id=current_user.id, task_update=task)
+    service = TaskService(db)
+    db_task = await service.update_task(
+        task_id=task_id, user_id=current_user.id, task_update=task,
+        expected_version=expected_version(if_match, current_user.id),
+    )
+    if service.version is not None:
+        response.headers["ETag"] = make_etag(current_user.id, service.version)
+    return db_task
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_task(
-    task_id: str,
+    task_id: UUID,
+    if_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db),
     current_user: UserOut = Depends(get_current_user)
 ):
-    await TaskService(db).delete_task(task_id=task_id,user_id=current_user.id)
-    return Response(status_code=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+    service = TaskService(db)
+    await service.delete_task(
+        task_id=task_id, user_id=current_user.id,
+        expected_version=expected_version(if_match, current_user.id),
+    )
+    return Response(status_code=status.HTTP_204_NO_CONTENT, headers={"ETag": make_etag(current_user.id, service.version)})
\ No newline at end of file
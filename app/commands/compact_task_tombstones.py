@@ -0,0 +1,44 @@
+"""
+Compacta los registros de tareas borradas (`task_tombstones`) que quedan fuera de
+la ventana de sincronización incremental (TASK_SYNC_WINDOW_DAYS).
+
+Uso:
+    python -m app.commands.compact_task_tombstones                    # ventana configurada
+    python -m app.commands.compact_task_tombstones --batch-size 5000
+
+Pensado para ejecutarse periódicamente (p. ej. una vez al día desde cron). Los
+tokens de GET /tasks/changes más antiguos que la ventana ya reciben 410, así que
+borrar estos registros nunca hace que un cliente se salte un borrado.
+"""
+import argparse
+import asyncio
+
+from app.core.config import get_settings
+from app.core.log import setup_logging
+from app.db.session import AsyncSessionLocal, dispose_engines, init_engines
+from app.services.task_service import TaskService
+
+
+async def compact(batch_size: int) -> int:
+    async with AsyncSessionLocal() as session:
+        return await TaskService(session).compact_tombstones(batch_size=batch_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+    setup_logging()
+
+    async def run():
+        init_engines(get_settings())
+        try:
+            return await compact(args.batch_size)
+        finally:
+            await dispose_engines()
+
+    print(f"Compacted {asyncio.run(run())} task tombstones")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Worker de purga de cuentas eliminadas: borra por lotes las tareas (y registros de
+borrado) de las cuentas desactivadas con DELETE /users/me y después la cuenta.
+
+Uso:
+    python -m app.commands.purge_deleted_accounts           # purga lo pendiente y termina
+    python -m app.commands.purge_deleted_accounts --loop    # worker permanente
+    python -m app.commands.purge_deleted_accounts --status  # progreso de las purgas pendientes
+
+Ejecutar un solo worker. Una purga interrumpida continúa donde se quedó en la
+siguiente ejecución. Lotes, pausas y límite de retraso de la réplica: ACCOUNT_PURGE_*.
+"""
+import argparse
+import asyncio
+
+from app.core.config import get_settings
+from app.core.log import logger, setup_logging
+from app.db import session as db_session
+from app.db.session import AsyncReadSessionLocal, AsyncSessionLocal, dispose_engines, init_engines
+from app.services.account_purge import AccountPurgeService
+
+
+def _service(session) -> AccountPurgeService:
+    # Con réplica, sus lecturas de retraso regulan el ritmo de la purga
+    has_replica = db_session.read_engine is not db_session.engine
+    return AccountPurgeService(session, replica_factory=AsyncReadSessionLocal if has_replica else None)
+
+
+async def purge_pending() -> int:
+    async with AsyncSessionLocal() as session:
+        return await _service(session).run_pending()
+
+
+async def print_status():
+    async with AsyncSessionLocal() as session:
+        pending = await _service(session).pending()
+    for purge in pending:
+        state = f"started {purge.started_at.isoformat()}" if purge.started_at else "queued"
+        print(f"user {purge.user_id}: {state}, {purge.deleted_rows} rows deleted, requested {purge.requested_at.isoformat()}")
+    print(f"{len(pending)} account purges pending")
+
+
+async def run_forever(poll_seconds: float):
+    while True:
+        try:
+            await purge_pending()
+        except Exception as e:
+            # El error ya se registró con su contexto; se reintenta en la siguiente vuelta
+            logger.error(f"Account purge run failed: {e}")
+        await asyncio.sleep(poll_seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--loop", action="store_true")
+    mode.add_argument("--status", action="store_true")
+    args = parser.parse_args()
+    setup_logging()
+    app_settings = get_settings()
+
+    async def run():
+        init_engines(app_settings)
+        try:
+            if args.status:
+                return await print_status()
+            if args.loop:
+                return await run_forever(app_settings.ACCOUNT_PURGE_POLL_SECONDS)
+            return await purge_pending()
+        finally:
+            await dispose_engines()
+
+    result = asyncio.run(run())
+    if result is not None:
+        print(f"Purged {result} accounts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Recalcula los contadores de tareas por estado (`user_task_state`) a partir de `tasks`.
+
+Uso:
+    python -m app.commands.reconcile_task_stats              # todos los usuarios
+    python -m app.commands.reconcile_task_stats --user-id 42 # un usuario
+
+Los contadores se mantienen en la misma transacción que cada escritura; este
+comando solo hace falta tras cambios hechos fuera de la API (SQL manual, restauraciones).
+Puede ejecutarse con la API en marcha: procesa un usuario por transacción y bloquea
+su fila de estado antes de contar, así que las escrituras concurrentes de ese usuario
+esperan unos milisegundos y no se pierde ningún cambio de los contadores.
+"""
+import argparse
+import asyncio
+
+from app.core.config import get_settings
+from app.core.log import setup_logging
+from app.db.session import AsyncSessionLocal, dispose_engines, init_engines
+from app.services.task_service import TaskService
+
+
+async def reconcile(user_id=None) -> int:
+    async with AsyncSessionLocal() as session:
+        return await TaskService(session).rebuild_stats(user_id=user_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", type=int, default=None)
+    args = parser.parse_args()
+    setup_logging()
+
+    async def run():
+        init_engines(get_settings())
+        try:
+            return await reconcile(args.user_id)
+        finally:
+            await dispose_engines()
+
+    print(f"Rebuilt task stats for {asyncio.run(run())} users")
+
+
+if __name__ == "__main__":
+    main()
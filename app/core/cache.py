@@ -0,0 +1,215 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from app.core.log import logger
+from app.core.metrics import TASK_CACHE_ERRORS, TASK_CACHE_EVICTIONS, TASK_CACHE_HITS, TASK_CACHE_MISSES
+
+
+class TTLCache:
+    """
+    Caché en memoria acotada con expulsión LRU y caducidad por entrada.
+
+    Es local a cada proceso: con varios workers cada uno mantiene su propia copia,
+    por lo que la caducidad (TTL) limita cuánto puede quedar obsoleta una entrada.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Devuelve el valor si existe y no ha caducado, None en caso contrario."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        """Guarda un valor; `ttl_seconds` permite acortar la caducidad por defecto."""
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class CacheBackend(ABC):
+    """
+    Interfaz asíncrona de caché de valores en bytes, para poder cambiar el
+    almacenamiento (en proceso o externo) sin tocar a quien la usa.
+
+    Aciertos, fallos y expulsiones se publican en /metrics (`task_cache_*`) con la
+    etiqueta `cache` = `name`.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        # Las series existen (a 0) desde el arranque, no desde el primer acierto o fallo
+        for counter in (TASK_CACHE_HITS, TASK_CACHE_MISSES, TASK_CACHE_EVICTIONS, TASK_CACHE_ERRORS):
+            counter.labels(name)
+
+    def _count_lookup(self, value: Optional[bytes]) -> Optional[bytes]:
+        (TASK_CACHE_MISSES if value is None else TASK_CACHE_HITS).labels(self.name).inc()
+        return value
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Valor guardado en `key`, o None si no está (o ha caducado)."""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes):
+        """Guarda `value` con la caducidad del backend."""
+
+    @abstractmethod
+    async def delete(self, *keys: str):
+        """Borra las claves indicadas (las que no existan se ignoran)."""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """Contadores de este proceso, para diagnóstico."""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Caché local a cada proceso sobre TTLCache (LRU + caducidad)."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float, name: str = "memory"):
+        super().__init__(name)
+        self._cache = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._count_lookup(self._cache.get(key))
+
+    async def set(self, key: str, value: bytes):
+        evictions = self._cache.evictions
+        self._cache.set(key, value)
+        if self._cache.evictions > evictions:
+            TASK_CACHE_EVICTIONS.labels(self.name).inc(self._cache.evictions - evictions)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._cache.delete(key)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return {"backend": "memory", **self._cache.stats()}
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Caché compartida entre procesos en Redis (dependencia opcional `redis`).
+
+    Un fallo de Redis se registra y se trata como un fallo de caché: la petición
+    sigue contra la base de datos. Las expulsiones las gestiona el servidor
+    (`maxmemory-policy`), así que aquí solo se cuentan aciertos, fallos y errores.
+    """
+
+    def __init__(self, url: str, ttl_seconds: float, prefix: str = "cache:", name: str = "redis"):
+        super().__init__(name)
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as e:
+            raise RuntimeError("The redis cache backend requires the 'redis' package") from e
+        self._client = redis_asyncio.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            value = await self._client.get(self.prefix + key)
+        except Exception as e:
+            self._count_error()
+            logger.warning(f"Cache get failed for {key}: {e}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return self._count_lookup(value)
+
+    def _count_error(self):
+        self.errors += 1
+        TASK_CACHE_ERRORS.labels(self.name).inc()
+
+    async def set(self, key: str, value: bytes):
+        try:
+            await self._client.set(self.prefix + key, value, ex=max(1, int(self.ttl_seconds)))
+        except Exception as e:
+            self._count_error()
+            logger.warning(f"Cache set failed for {key}: {e}")
+
+    async def delete(self, *keys: str):
+        if not keys:
+            return
+        try:
+            await self._client.delete(*(self.prefix + key for key in keys))
+        except Exception as e:
+            self._count_error()
+            logger.warning(f"Cache delete failed: {e}")
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "hits": self.hits, "misses": self.misses, "errors": self.errors}
+
+
+def create_cache_backend(
+    backend: str, max_entries: int, ttl_seconds: float, url: Optional[str] = None, prefix: str = "cache:",
+    name: str = "cache",
+) -> CacheBackend:
+    """
+    Crea el backend configurado: "memory" (en proceso) o "redis" (requiere `url`).
+    `name` etiqueta sus métricas en /metrics.
+    """
+    if backend == "redis":
+        if not url:
+            raise ValueError("A cache URL is required for the redis backend")
+        return RedisCacheBackend(url, ttl_seconds=ttl_seconds, prefix=prefix, name=name)
+    if backend == "memory":
+        return MemoryCacheBackend(max_entries=max_entries, ttl_seconds=ttl_seconds, name=name)
+    raise ValueError(f"Unknown cache backend: {backend}")
@@ -1,27 +1,196 @@
 # app/core/config.py
+from typing import Dict, Literal, Optional
+
 from pydantic_settings import BaseSettings
 
 
-from pydantic import ConfigDict
+from pydantic import ConfigDict, model_validator
 
 class Settings(BaseSettings):
     model_config = ConfigDict(env_file=".env", env_file_encoding="utf-8")
 
-    # Variables de la base de datos
-    DB_HOST: str
-    DB_PORT: int
-    DB_USER: str
-    DB_PASSWORD: str
-    DB_NAME_DB: str
+    # Variables de la base de datos (no hacen falta si se define DB_URL)
+    DB_HOST: Optional[str] = None
+    DB_PORT: Optional[int] = None
+    DB_USER: Optional[str] = None
+    DB_PASSWORD: Optional[str] = None
+    DB_NAME_DB: Optional[str] = None
+
+    # Perfil del motor (por defecto, el de producción: sin echo y con pool acotado)
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800
+    # URL completa del primario; si se define tiene prioridad sobre DB_HOST/DB_PORT/...
+    # (p. ej. sqlite+aiosqlite:///./primary.db para pruebas locales)
+    DB_URL: Optional[str] = None
+    # Conexiones del pool que se abren y preparan al arrancar, antes de aceptar peticiones
+    # (0 = ninguna: la primera petición de cada conexión paga el connect). Máximo DB_POOL_SIZE
+    DB_WARMUP_CONNECTIONS: int = 0
+
+    # Réplica de lectura: DB_READ_URL completa, o DB_READ_HOST/DB_READ_PORT con el resto de DB_*.
+    # Sin ninguna de las dos, las lecturas van al primario
+    DB_READ_URL: Optional[str] = None
+    DB_READ_HOST: Optional[str] = None
+    DB_READ_PORT: Optional[int] = None
+    # Tras escribir, las lecturas del usuario van al primario durante este tiempo (read-your-writes)
+    DB_READ_AFTER_WRITE_SECONDS: float = 5
+    DB_READ_PIN_MAX_ENTRIES: int = 100000
+
+    # Logging
+    LOG_FILE: str = "backend.log"
+    LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    LOG_BACKUP_COUNT: int = 5
+    LOG_QUEUE_SIZE: int = 10000
+    # Fracción de líneas de alto volumen (marcadas con SAMPLED) que se escriben, por nivel
+    LOG_SAMPLE_RATES: Dict[str, float] = {"DEBUG": 0.1, "INFO": 0.1}
+
+    # Exponer tiempos de DB por petición en la cabecera Server-Timing
+    SERVER_TIMING_ENABLED: bool = True
+    # Endpoint /metrics (Prometheus). Con varios workers, definir además PROMETHEUS_MULTIPROC_DIR
+    METRICS_ENABLED: bool = True
+    # Compresión gzip de las respuestas cuando el cliente la acepta (Accept-Encoding) y el
+    # cuerpo supera el umbral; por debajo, comprimir cuesta más CPU de lo que ahorra en red
+    RESPONSE_GZIP_ENABLED: bool = True
+    RESPONSE_GZIP_MIN_BYTES: int = 1024
+    RESPONSE_GZIP_LEVEL: int = 6
+
+    # Control de admisión por clase de ruta (auth, task_read, task_write):
+    # peticiones simultáneas, cola máxima y espera máxima en cola antes de responder 503
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_CONCURRENCY: Dict[str, int] = {"auth": 16, "task_read": 64, "task_write": 32}
+    ADMISSION_MAX_QUEUE: Dict[str, int] = {"auth": 32, "task_read": 128, "task_write": 64}
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 2
+    # Token bucket por usuario (o por IP sin token): ritmo sostenido y ráfaga; 429 al agotarse
+    RATE_LIMIT_PER_SECOND: float = 50
+    RATE_LIMIT_BURST: int = 100
+    RATE_LIMIT_MAX_KEYS: int = 100000
 
     # JWT
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
 
+    # Pool de hilos para bcrypt
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 32
+
+    # Caché de autenticación (tokens verificados y usuarios resueltos)
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_USER_CACHE_TTL_SECONDS: int = 60
+
+    # Operaciones en lote sobre tareas
+    TASK_BULK_MAX_ITEMS: int = 500
+    # Importación en streaming: filas por bloque (una transacción por bloque)
+    TASK_IMPORT_CHUNK_ROWS: int = 5000
+    # Máximo de filas rechazadas y de bloques que se detallan en la respuesta (el resto solo se cuenta)
+    TASK_IMPORT_MAX_REPORTED_ERRORS: int = 100
+    TASK_IMPORT_MAX_REPORTED_CHUNKS: int = 100
+
+    # Caché de lecturas de tareas (tarea individual y primera página del listado)
+    TASK_CACHE_ENABLED: bool = True
+    TASK_CACHE_BACKEND: Literal["memory", "redis"] = "memory"
+    # Solo para el backend redis, p. ej. redis://localhost:6379/0
+    TASK_CACHE_URL: Optional[str] = None
+    TASK_CACHE_MAX_ENTRIES: int = 10000
+    TASK_CACHE_TTL_SECONDS: int = 60
+
+    # Sincronización incremental (GET /tasks/changes). Los borrados se conservan este
+    # tiempo: un token más antiguo recibe 410 y el cliente vuelve a sincronizar desde cero
+    TASK_SYNC_WINDOW_DAYS: int = 30
+    # Cada sincronización vuelve a cubrir estos últimos segundos: updated_at se asigna al
+    # escribir, no al hacer commit, y una transacción lenta puede hacerse visible más tarde
+    TASK_SYNC_SAFETY_SECONDS: float = 10
+    # Particiones HASH (user_id) de `tasks` que crea la migración b7f3a9c2d481. Solo se lee
+    # al migrar: cambiarlo después exige volver a particionar la tabla
+    TASK_PARTITIONS: int = 16
+
+    # Eventos de cambios de tareas (GET /tasks/events y WebSocket /tasks/events/ws):
+    # "memory" (solo llegan a las conexiones del mismo proceso) o "postgres" (LISTEN/NOTIFY
+    # sobre la base de datos principal, para varios workers)
+    EVENTS_BACKEND: Literal["memory", "postgres"] = "memory"
+    EVENTS_MAX_CONNECTIONS_PER_USER: int = 5
+    # Eventos pendientes por conexión; si se llena, el cliente recibe "resync"
+    EVENTS_QUEUE_SIZE: int = 100
+    EVENTS_HEARTBEAT_SECONDS: float = 15
+
+    # Purga de cuentas eliminadas (python -m app.commands.purge_deleted_accounts): filas por
+    # lote (una transacción cada uno) y pausa entre lotes para no competir con el tráfico
+    ACCOUNT_PURGE_BATCH_SIZE: int = 1000
+    ACCOUNT_PURGE_BATCH_DELAY_SECONDS: float = 0.1
+    # Con réplica PostgreSQL, la purga espera mientras su retraso supere este valor
+    ACCOUNT_PURGE_MAX_REPLICA_LAG_SECONDS: float = 5
+    # Espera entre comprobaciones de cuentas pendientes del worker (--loop)
+    ACCOUNT_PURGE_POLL_SECONDS: float = 10
+
+    @model_validator(mode="after")
+    def _check_db_location(self):
+        if not self.DB_URL:
+            missing = [
+                name for name in ("DB_HOST", "DB_PORT", "DB_USER", "DB_PASSWORD", "DB_NAME_DB")
+                if getattr(self, name) is None
+            ]
+            if missing:
+                raise ValueError(f"DB_URL or {', '.join(missing)} must be set")
+        return self
+
     def GET_URL_DB(self):
+        if self.DB_URL:
+            return self.DB_URL
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME_DB}"
 
-    
-    
-settings = Settings()
\ No newline at end of file
+    def GET_READ_URL_DB(self) -> Optional[str]:
+        """URL de la réplica de lectura, o None si las lecturas usan el primario."""
+        if self.DB_READ_URL:
+            return self.DB_READ_URL
+        if self.DB_READ_HOST:
+            port = self.DB_READ_PORT or self.DB_PORT
+            return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_READ_HOST}:{port}/{self.DB_NAME_DB}"
+        return None
+
+    def GET_ENGINE_OPTIONS(self):
+        return {
+            "echo": self.DB_ECHO,
+            "pool_size": self.DB_POOL_SIZE,
+            "max_overflow": self.DB_MAX_OVERFLOW,
+            "pool_timeout": self.DB_POOL_TIMEOUT,
+            "pool_pre_ping": self.DB_POOL_PRE_PING,
+            "pool_recycle": self.DB_POOL_RECYCLE,
+        }
+
+
+
+_settings: Optional[Settings] = None
+
+
+def get_settings() -> Settings:
+    """Configuración activa. Se lee del entorno la primera vez que se pide, no al importar."""
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+    return _settings
+
+
+def configure_settings(new_settings: Settings) -> Settings:
+    """Sustituye la configuración activa (lo hace create_app con la que recibe)."""
+    global _settings
+    _settings = new_settings
+    return new_settings
+
+
+class _SettingsProxy:
+    """
+    Delega en la configuración activa. Permite `from app.core.config import settings`
+    en cualquier módulo sin leer el entorno al importar.
+    """
+
+    def __getattr__(self, name):
+        return getattr(get_settings(), name)
+
+    def __setattr__(self, name, value):
+        setattr(get_settings(), name, value)
+
+
+settings = _SettingsProxy()
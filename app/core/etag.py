@@ -0,0 +1,42 @@
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+
+def make_etag(user_id: int, version: int) -> str:
+    """ETag débil a partir de la versión de las tareas del usuario."""
+    return f'W/"{user_id}.{version}"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Comparación débil de un If-None-Match (lista separada por comas o '*')."""
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or any(_opaque(candidate) == _opaque(etag) for candidate in candidates)
+
+
+def expected_version(if_match: Optional[str], user_id: int) -> Optional[int]:
+    """
+    Extrae la versión esperada de un If-Match para la concurrencia optimista.
+
+    Se comparan los ETags débiles por su valor opaco (las ETags de esta API son
+    débiles y no habría coincidencia posible con la comparación fuerte estricta).
+    Lanza 412 si el ETag no pertenece a este usuario o no es válido.
+    """
+    if not if_match or if_match.strip() == "*":
+        return None
+    precondition_failed = HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Precondition failed"
+    )
+    for candidate in if_match.split(","):
+        value = _opaque(candidate).strip('"')
+        owner, _, version = value.partition(".")
+        if owner == str(user_id) and version.isdigit():
+            return int(version)
+    raise precondition_failed
@@ -0,0 +1,266 @@
+import asyncio
+import weakref
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.core.config import Settings
+from app.core.log import logger
+from app.core.metrics import EVENT_OVERFLOWS, EVENT_SUBSCRIBERS
+
+# Clave de Session.info con los eventos pendientes de la transacción en curso (backend en memoria)
+PENDING_EVENTS_KEY = "pending_task_events"
+# Canal de LISTEN/NOTIFY de PostgreSQL
+EVENTS_CHANNEL = "task_events"
+# Marca en la cola de un suscriptor que no consumió a tiempo: debe resincronizar
+OVERFLOW = object()
+
+
+class Subscription:
+    """
+    Eventos pendientes de una conexión (SSE o WebSocket) de un usuario.
+
+    La cola está acotada: si el cliente no consume al ritmo de las escrituras, los
+    eventos pendientes se descartan y solo queda OVERFLOW, para que el cliente vuelva
+    a leer sus tareas en lugar de recibir un flujo incompleto sin saberlo.
+    """
+
+    def __init__(self, broker: "EventBroker", user_id: int, max_queue: int):
+        self.broker = broker
+        self.user_id = user_id
+        self.queue: "asyncio.Queue" = asyncio.Queue(max(1, max_queue))
+        self.overflowed = False
+        self._loop = asyncio.get_running_loop()
+
+    def push(self, payload):
+        """Encola un evento; desde otro hilo o event loop, en el loop de la conexión."""
+        try:
+            same_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            same_loop = False
+        if same_loop:
+            self._push(payload)
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._push, payload)
+        except RuntimeError:
+            # El loop de la conexión ya terminó: no queda nadie a quien entregar
+            pass
+
+    def _push(self, payload):
+        if self.overflowed:
+            return
+        if payload is OVERFLOW:
+            self._overflow()
+            return
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            self._overflow()
+
+    def overflow(self):
+        """Descarta lo pendiente y deja solo OVERFLOW en la cola."""
+        self.push(OVERFLOW)
+
+    def _overflow(self):
+        if self.overflowed:
+            return
+        self.overflowed = True
+        EVENT_OVERFLOWS.inc()
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(OVERFLOW)
+
+    async def get(self, timeout: float):
+        """Siguiente evento (texto JSON u OVERFLOW); None si no llega ninguno en `timeout` segundos."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class EventBroker(ABC):
+    """
+    Reparte los eventos de cambios de tareas a las conexiones abiertas de cada usuario.
+
+    Las escrituras publican con `publish` dentro de su transacción y los eventos solo
+    se entregan si hace commit. Cada backend decide cómo llegan a los procesos: en
+    memoria (un solo proceso) o con LISTEN/NOTIFY de PostgreSQL (todos los workers).
+    """
+
+    # Tamaño máximo de un evento en el backend (None: sin límite)
+    max_payload_bytes: Optional[int] = None
+
+    def __init__(self, max_connections_per_user: int, queue_size: int):
+        self.max_connections_per_user = max_connections_per_user
+        self.queue_size = queue_size
+        # WeakSet: una conexión que termina sin cerrar su suscripción no ocupa hueco para siempre
+        self._subscribers: Dict[int, "weakref.WeakSet[Subscription]"] = {}
+
+    def subscribe(self, user_id: int) -> Subscription:
+        """Abre una suscripción del usuario; 429 si ya tiene el máximo de conexiones."""
+        subscribers = self._subscribers.setdefault(user_id, weakref.WeakSet())
+        if len(subscribers) >= self.max_connections_per_user:
+            logger.warning(f"Event connection limit reached for user {user_id}")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many event connections"
+            )
+        subscription = Subscription(self, user_id, self.queue_size)
+        subscribers.add(subscription)
+        EVENT_SUBSCRIBERS.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.user_id)
+        if subscribers is None or subscription not in subscribers:
+            return
+        subscribers.discard(subscription)
+        EVENT_SUBSCRIBERS.dec()
+        if not subscribers:
+            del self._subscribers[subscription.user_id]
+
+    def dispatch(self, user_id: int, payload: str):
+        """Entrega un evento a las conexiones del usuario en este proceso."""
+        for subscription in list(self._subscribers.get(user_id, ())):
+            subscription.push(payload)
+
+    def resync_all(self):
+        """Pide a todas las conexiones que resincronicen (p. ej. tras perder eventos)."""
+        for subscribers in list(self._subscribers.values()):
+            for subscription in list(subscribers):
+                subscription.overflow()
+
+    @abstractmethod
+    async def publish(self, session, user_id: int, payloads: List[str]):
+        """Publica eventos del usuario como parte de la transacción de `session`."""
+
+    async def start(self):
+        """Arranque del backend (lifespan)."""
+
+    async def close(self):
+        """Parada del backend (lifespan)."""
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._subscribers),
+            "connections": sum(len(subscribers) for subscribers in self._subscribers.values()),
+        }
+
+
+class MemoryEventBroker(EventBroker):
+    """Eventos dentro del proceso: se guardan en la sesión y se reparten tras el commit."""
+
+    async def publish(self, session, user_id: int, payloads: List[str]):
+        session.info.setdefault(PENDING_EVENTS_KEY, []).append((user_id, payloads))
+
+
+class PostgresEventBroker(EventBroker):
+    """
+    Eventos entre workers con LISTEN/NOTIFY de PostgreSQL.
+
+    NOTIFY es transaccional: se publica dentro de la escritura y PostgreSQL solo lo
+    entrega tras el commit. Cada proceso escucha el canal con una conexión propia
+    (fuera del pool) y reparte a sus conexiones locales. Si la escucha se corta se
+    reconecta, y como pudo perder eventos pide a todos sus clientes que resincronicen.
+    """
+
+    # NOTIFY admite hasta 8000 bytes; se deja margen para el prefijo con el usuario
+    max_payload_bytes = 7900
+
+    def __init__(self, url: str, max_connections_per_user: int, queue_size: int, reconnect_seconds: float = 1):
+        super().__init__(max_connections_per_user, queue_size)
+        # asyncpg recibe el DSN sin el dialecto de SQLAlchemy
+        self.dsn = make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.reconnect_seconds = reconnect_seconds
+        self._listener: Optional[asyncio.Task] = None
+
+    async def publish(self, session, user_id: int, payloads: List[str]):
+        await session.execute(
+            text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+            {"channel": EVENTS_CHANNEL, "payloads": [f"{user_id}:{payload}" for payload in payloads]},
+        )
+
+    def _on_notify(self, connection, pid, channel, payload: str):
+        user_id, _, event_payload = payload.partition(":")
+        self.dispatch(int(user_id), event_payload)
+
+    async def _listen(self):
+        import asyncpg
+
+        connected_before = False
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await connection.add_listener(EVENTS_CHANNEL, self._on_notify)
+                logger.info(f"Listening for task events on channel {EVENTS_CHANNEL}")
+                if connected_before:
+                    self.resync_all()
+                connected_before = True
+                await closed.wait()
+                logger.warning("Task event listener connection lost")
+            except asyncio.CancelledError:
+                if connection is not None:
+                    await connection.close()
+                raise
+            except Exception as e:
+                logger.warning(f"Task event listener failed: {e}")
+            await asyncio.sleep(self.reconnect_seconds)
+
+    async def start(self):
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+
+def create_event_broker(backend: str, url: Optional[str], max_connections_per_user: int, queue_size: int) -> EventBroker:
+    """Crea el backend configurado: "memory" (un proceso) o "postgres" (LISTEN/NOTIFY en `url`)."""
+    if backend == "postgres":
+        return PostgresEventBroker(url, max_connections_per_user=max_connections_per_user, queue_size=queue_size)
+    if backend == "memory":
+        return MemoryEventBroker(max_connections_per_user=max_connections_per_user, queue_size=queue_size)
+    raise ValueError(f"Unknown event backend: {backend}")
+
+
+# En memoria con los valores por defecto hasta que create_app llama a init_events
+event_broker: EventBroker = MemoryEventBroker(max_connections_per_user=0, queue_size=1)
+
+
+def init_events(app_settings: Settings):
+    """Crea el broker de eventos de tareas según la configuración."""
+    global event_broker
+    event_broker = create_event_broker(
+        app_settings.EVENTS_BACKEND,
+        url=app_settings.GET_URL_DB(),
+        max_connections_per_user=app_settings.EVENTS_MAX_CONNECTIONS_PER_USER,
+        queue_size=app_settings.EVENTS_QUEUE_SIZE,
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_pending_events(session):
+    for user_id, payloads in session.info.pop(PENDING_EVENTS_KEY, ()):
+        for payload in payloads:
+            event_broker.dispatch(user_id, payload)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_events(session):
+    session.info.pop(PENDING_EVENTS_KEY, None)
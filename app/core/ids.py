@@ -0,0 +1,41 @@
+import os
+import threading
+import time
+import uuid
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7() -> uuid.UUID:
+    """
+    UUID versión 7 (RFC 9562): 48 bits de milisegundos Unix, 12 bits de contador y
+    62 bits aleatorios. Los valores crecen con el tiempo, así que las inserciones
+    van al final del índice de la clave primaria en lugar de repartirse por él.
+
+    Dentro de un mismo milisegundo el contador (que arranca en un valor aleatorio)
+    mantiene el orden en este proceso; si se agota, se avanza al milisegundo siguiente.
+    """
+    global _last_ms, _counter
+    with _lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms > _last_ms:
+            _last_ms = now_ms
+            # La mitad inferior deja margen para incrementar sin desbordar
+            _counter = int.from_bytes(os.urandom(2), "big") & 0x7FF
+        else:
+            _counter += 1
+            if _counter > 0xFFF:
+                _last_ms += 1
+                _counter = 0
+        timestamp_ms, counter = _last_ms, _counter
+    random_bits = int.from_bytes(os.urandom(8), "big") & 0x3FFF_FFFF_FFFF_FFFF
+    value = (
+        (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76
+        | counter << 64
+        | 0b10 << 62
+        | random_bits
+    )
+    return uuid.UUID(int=value)
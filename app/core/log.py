@@ -1,6 +1,67 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
+import random
 import sys
+from datetime import datetime, timezone
 
+from app.core.config import settings
+
+
+# Marca para las líneas de alto volumen que se pueden muestrear:
+# logger.info("...", extra=SAMPLED)
+SAMPLED = {"sampled": True}
+
+# Atributos estándar de LogRecord; el resto son campos `extra` de cada llamada
+_RECORD_ATTRS = set(logging.makeLogRecord({}).__dict__) | {"message", "asctime", "sampled"}
+
+
+class JSONFormatter(logging.Formatter):
+    """Formatea cada registro como un objeto JSON en una sola línea."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "func": record.funcName,
+            "line": record.lineno,
+            "message": record.getMessage(),
+        }
+        entry.update({key: value for key, value in record.__dict__.items() if key not in _RECORD_ATTRS})
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Deja pasar solo una fracción de los registros marcados con SAMPLED, según su nivel."""
+
+    def __init__(self, rates: dict):
+        super().__init__()
+        self.rates = {logging.getLevelName(level.upper()): rate for level, rate in rates.items()}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False):
+            return True
+        rate = self.rates.get(record.levelno, 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler que descarta (y cuenta) registros si la cola está llena en vez de bloquear."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
 
 
 def setup_logging():
@@ -8,43 +69,54 @@ def setup_logging():
     Configura y devuelve un logger para el backend.
 
     Este logger:
-    - Escribe logs de nivel DEBUG y superiores en un archivo llamado 'backend_todo_.log'.
-    - Escribe logs de nivel INFO y superiores en la consola (stderr).
-    - Utiliza un formato detallado para los logs del archivo.
-    - Utiliza un formato más simple para los logs de la consola.
+    - No hace E/S en el hilo que registra: encola los registros y un hilo de fondo
+      (QueueListener) los escribe.
+    - Escribe logs de nivel DEBUG y superiores en JSON en un archivo rotativo ('backend.log').
+    - Escribe logs de nivel INFO y superiores en la consola (stderr) con un formato simple.
+    - Muestrea las líneas de alto volumen marcadas con SAMPLED según LOG_SAMPLE_RATES.
+
+    Lo llama create_app (lee la configuración); llamadas posteriores no hacen nada.
     """
-    # 1. Crea el objeto logger principal
+    # 1. Obtiene el logger principal; si ya tiene handlers está configurado
     logger = logging.getLogger('backend_logger')
+    if logger.handlers:
+        return logger
     logger.setLevel(logging.DEBUG)  # Nivel mínimo de log para el logger principal
 
     # Asegura que el logger no propague logs a handlers del logger raíz
     logger.propagate = False
 
-    # 2. Crea un formatter para el archivo de log (formato detallado)
-    file_formatter = logging.Formatter(
-        '[%(asctime)s] - [%(levelname)s] - [%(name)s] - [%(funcName)s:%(lineno)d] - %(message)s'
+    # 2. Handler de archivo rotativo con salida JSON
+    file_handler = logging.handlers.RotatingFileHandler(
+        settings.LOG_FILE,
+        maxBytes=settings.LOG_MAX_BYTES,
+        backupCount=settings.LOG_BACKUP_COUNT,
+        encoding="utf-8",
+        delay=True,
     )
-
-    # 3. Crea un formatter para la consola (formato simple)
-    console_formatter = logging.Formatter(
-        '%(levelname)s - %(message)s'
-    )
-
-    # 4. Crea un handler para escribir en un archivo (FileHandler)
-    file_handler = logging.FileHandler('backend.log')
     file_handler.setLevel(logging.DEBUG)  # Nivel de log para el archivo
-    file_handler.setFormatter(file_formatter)
+    file_handler.setFormatter(JSONFormatter())
 
-    # 5. Crea un handler para escribir en la consola (StreamHandler)
+    # 3. Handler de consola con formato simple
     console_handler = logging.StreamHandler(sys.stderr)
     console_handler.setLevel(logging.INFO)  # Nivel de log para la consola
-    console_handler.setFormatter(console_formatter)
+    console_handler.setFormatter(logging.Formatter('%(levelname)s - %(message)s'))
 
-    # 6. Agrega los handlers al logger
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    # 4. El logger solo encola; el listener escribe en segundo plano
+    log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATES))
+    logger.addHandler(queue_handler)
+
+    listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    listener.start()
+    # Vacía la cola pendiente al terminar el proceso
+    atexit.register(listener.stop)
 
     return logger
 
 # --- Uso del logger ---
-logger = setup_logging()
\ No newline at end of file
+# Sin handlers hasta setup_logging(): importar un módulo no lee la configuración ni abre ficheros
+logger = logging.getLogger('backend_logger')
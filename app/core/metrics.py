@@ -0,0 +1,121 @@
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess,
+)
+
+# Con varios workers (uvicorn --workers / gunicorn) cada proceso escribe sus métricas en
+# ficheros bajo PROMETHEUS_MULTIPROC_DIR y /metrics las agrega al servirlas. El directorio
+# debe existir, estar vacío al arrancar y ser el mismo para todos los workers
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+# Buckets de latencia HTTP y DB (segundos)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# bcrypt tarda cientos de milisegundos: buckets desplazados
+HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 2, 5)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template and status code",
+    ["method", "route", "status"],
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route"], buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests being processed",
+    ["method"], multiprocess_mode="livesum",
+)
+
+DB_POOL_SIZE = Gauge(
+    "db_pool_size", "Configured connection pool size", ["engine"], multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connections currently checked out of the pool", ["engine"], multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow", "Connections opened beyond pool_size", ["engine"], multiprocess_mode="livesum",
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds", "Time spent waiting for a pool connection", ["engine"], buckets=LATENCY_BUCKETS,
+)
+
+PASSWORD_HASH_LATENCY = Histogram(
+    "password_hash_duration_seconds", "bcrypt hash/verify duration", ["operation"], buckets=HASH_BUCKETS,
+)
+PASSWORD_HASH_QUEUE_WAIT = Histogram(
+    "password_hash_queue_wait_seconds", "Time waiting for a bcrypt worker thread", buckets=LATENCY_BUCKETS,
+)
+PASSWORD_HASH_IN_FLIGHT = Gauge(
+    "password_hash_in_flight", "bcrypt operations submitted and not yet finished (running or queued)",
+    multiprocess_mode="livesum",
+)
+PASSWORD_HASH_QUEUE_DEPTH = Gauge(
+    "password_hash_queue_depth", "bcrypt operations waiting for a free worker thread",
+    multiprocess_mode="livesum",
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total", "bcrypt operations rejected because the pool was saturated",
+)
+
+ADMISSION_IN_FLIGHT = Gauge(
+    "admission_in_flight", "Admitted requests being processed per route class",
+    ["route_class"], multiprocess_mode="livesum",
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "admission_queue_depth", "Requests waiting for an admission slot per route class",
+    ["route_class"], multiprocess_mode="livesum",
+)
+ADMISSION_QUEUE_WAIT = Histogram(
+    "admission_queue_wait_seconds", "Time queued before admission", ["route_class"], buckets=LATENCY_BUCKETS,
+)
+ADMISSION_SHED = Counter(
+    "admission_shed_total", "Requests rejected by admission control",
+    ["route_class", "reason"],
+)
+
+TASK_CACHE_HITS = Counter(
+    "task_cache_hits_total", "Cache lookups that found a value", ["cache"],
+)
+TASK_CACHE_MISSES = Counter(
+    "task_cache_misses_total", "Cache lookups that found nothing (absent or expired)", ["cache"],
+)
+TASK_CACHE_EVICTIONS = Counter(
+    "task_cache_evictions_total", "Entries evicted to stay within max_entries (memory backend)", ["cache"],
+)
+TASK_CACHE_ERRORS = Counter(
+    "task_cache_errors_total", "Failed cache operations, served as misses (redis backend)", ["cache"],
+)
+
+EVENT_SUBSCRIBERS = Gauge(
+    "task_event_subscribers", "Open task event connections (SSE and WebSocket)", multiprocess_mode="livesum",
+)
+EVENT_OVERFLOWS = Counter(
+    "task_event_overflows_total", "Event connections told to resync because they fell behind",
+)
+
+ACCOUNT_PURGE_DELETED_ROWS = Counter(
+    "account_purge_deleted_rows_total", "Rows deleted by the account purge worker", ["table"],
+)
+ACCOUNT_PURGE_BATCH_SECONDS = Histogram(
+    "account_purge_batch_seconds", "Duration of each account purge batch transaction", buckets=LATENCY_BUCKETS,
+)
+ACCOUNT_PURGE_THROTTLED_SECONDS = Counter(
+    "account_purge_throttled_seconds_total", "Time the account purge worker waited for the replica to catch up",
+)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Texto de exposición de Prometheus y su content type (agregando procesos si aplica)."""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int):
+    """Descarta los gauges `live*` de un worker que termina (solo en modo multiproceso)."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,59 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(sort: str, value: Any, task_id: UUID) -> str:
+    """Codifica la posición (valor del campo de orden, id) de una tarea en un cursor opaco."""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, value, str(task_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, UUID]:
+    """Decodifica un cursor opaco para el orden `sort`, lanza 400 si no es válido."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if len(data) == 2:
+            # Cursores emitidos antes de existir el parámetro sort
+            data = ["created_at", *data]
+        cursor_sort, value, task_id = data
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if cursor_sort != sort:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor does not match sort")
+    try:
+        if sort.lstrip("-") == "created_at":
+            value = datetime.fromisoformat(value)
+        elif not isinstance(value, str):
+            raise TypeError(value)
+        return value, UUID(str(task_id))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def encode_sync_token(position: Tuple[datetime, UUID], floor: datetime) -> str:
+    """
+    Codifica un token de sincronización: la posición (fecha de cambio, id) hasta la
+    que el cliente tiene los cambios y el suelo de borrados (los anteriores no los
+    necesita porque nunca llegó a ver esas tareas).
+    """
+    position_at, task_id = position
+    raw = json.dumps([position_at.isoformat(), str(task_id), floor.isoformat()], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_sync_token(token: str) -> Tuple[Tuple[datetime, UUID], datetime]:
+    """Decodifica un token de sincronización, lanza 400 si no es válido."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        position_at, task_id, floor = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (datetime.fromisoformat(position_at), UUID(task_id)), datetime.fromisoformat(floor)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid sync token")
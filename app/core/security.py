@@ -1,9 +1,19 @@
 
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Optional
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 from jose import JWTError, jwt
-from app.core.config import settings
+from app.core.cache import TTLCache
+from app.core.config import Settings, settings
+from app.core.log import logger
+from app.core.metrics import (
+    PASSWORD_HASH_IN_FLIGHT, PASSWORD_HASH_LATENCY, PASSWORD_HASH_QUEUE_DEPTH, PASSWORD_HASH_QUEUE_WAIT,
+    PASSWORD_HASH_REJECTED,
+)
 
 # Contexto para el hashing de contraseñas usando bcrypt
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -16,6 +26,119 @@ def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 
+class LatencyStats:
+    """Acumula número de llamadas, tiempo total y máximo de una operación."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_seconds": self.total_seconds / self.count if self.count else 0.0,
+            "max_seconds": self.max_seconds,
+        }
+
+
+class PasswordHasher:
+    """
+    Ejecuta bcrypt en un pool de hilos dedicado para no bloquear el event loop.
+
+    bcrypt libera el GIL, así que los hilos aprovechan varios núcleos. Como mucho
+    `workers` operaciones se ejecutan a la vez y `max_queue` esperan turno; el
+    resto se rechaza al momento con 503 en lugar de acumular latencia.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self.rejected = 0
+        self.hash_latency = {"hash": LatencyStats(), "verify": LatencyStats()}
+        self.wait_latency = LatencyStats()
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._pending - self.workers)
+
+    def _update_gauges(self):
+        """Publica ocupación y cola en /metrics; se llama al encolar y al terminar cada operación."""
+        PASSWORD_HASH_IN_FLIGHT.set(self._pending)
+        PASSWORD_HASH_QUEUE_DEPTH.set(self.queue_depth)
+
+    async def _run(self, operation: str, func: Callable, *args):
+        if self._pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            PASSWORD_HASH_REJECTED.inc()
+            logger.warning(f"Password hashing pool saturated, rejecting {operation}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, try again later",
+                headers={"Retry-After": "1"},
+            )
+
+        def timed():
+            started = time.perf_counter()
+            return func(*args), started, time.perf_counter() - started
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        self._pending += 1
+        self._update_gauges()
+        submitted = time.perf_counter()
+        try:
+            result, started, elapsed = await asyncio.get_running_loop().run_in_executor(self._executor, timed)
+        finally:
+            self._pending -= 1
+            self._update_gauges()
+        self.wait_latency.observe(started - submitted)
+        self.hash_latency[operation].observe(elapsed)
+        PASSWORD_HASH_QUEUE_WAIT.observe(started - submitted)
+        PASSWORD_HASH_LATENCY.labels(operation).observe(elapsed)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run("verify", verify_password, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        """Métricas actuales del pool: ocupación, cola, rechazos y latencias."""
+        return {
+            "workers": self.workers,
+            "in_flight": self._pending,
+            "queue_depth": self.queue_depth,
+            "rejected": self.rejected,
+            "queue_wait": self.wait_latency.snapshot(),
+            **{operation: stats.snapshot() for operation, stats in self.hash_latency.items()},
+        }
+
+    def shutdown(self):
+        """Libera los hilos; el pool se vuelve a crear si se usa de nuevo."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def configure(self, workers: int, max_queue: int):
+        """Cambia los límites; el pool de hilos se recrea con el nuevo tamaño al usarse."""
+        self.shutdown()
+        self.workers = workers
+        self.max_queue = max_queue
+
+
+# Límites mínimos hasta que create_app aplica la configuración (init_security)
+password_hasher = PasswordHasher(workers=1, max_queue=0)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Crea un nuevo token de acceso JWT."""
     to_encode = data.copy()
@@ -25,4 +148,30 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
\ No newline at end of file
+    return encoded_jwt
+
+
+# Payloads de tokens ya verificados, válidos hasta su `exp` (desactivada hasta init_security)
+token_cache = TTLCache(max_entries=0, ttl_seconds=0)
+
+
+def init_security(app_settings: Settings):
+    """Dimensiona el pool de bcrypt y la caché de tokens con la configuración."""
+    global token_cache
+    password_hasher.configure(app_settings.PASSWORD_HASH_WORKERS, app_settings.PASSWORD_HASH_MAX_QUEUE)
+    token_cache = TTLCache(
+        max_entries=app_settings.AUTH_CACHE_MAX_ENTRIES,
+        ttl_seconds=app_settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    )
+
+
+def decode_access_token(token: str) -> dict:
+    """Verifica un JWT memorizando el resultado hasta que caduca; lanza JWTError si no es válido."""
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    exp = payload.get("exp")
+    if exp is not None:
+        token_cache.set(token, payload, ttl_seconds=exp - time.time())
+    return payload
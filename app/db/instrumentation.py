@@ -0,0 +1,109 @@
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.metrics import DB_POOL_CHECKED_OUT, DB_POOL_OVERFLOW, DB_POOL_SIZE, DB_POOL_WAIT
+
+
+class DBStats:
+    """Métricas de base de datos acumuladas durante una petición."""
+
+    __slots__ = ("statements", "db_seconds", "pool_wait_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+
+
+# Métricas de la petición en curso (None fuera de una petición)
+_request_stats: ContextVar[Optional[DBStats]] = ContextVar("db_request_stats", default=None)
+
+
+def start_request_stats():
+    """Empieza a acumular métricas para la petición actual; devuelve (stats, token)."""
+    stats = DBStats()
+    return stats, _request_stats.set(stats)
+
+
+def stop_request_stats(token):
+    _request_stats.reset(token)
+
+
+def current_request_stats() -> Optional[DBStats]:
+    return _request_stats.get()
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Pool que mide el tiempo de espera para obtener una conexión."""
+
+    # Etiqueta `engine` de las métricas (la asigna instrument_engine)
+    metrics_name = "primary"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            DB_POOL_WAIT.labels(self.metrics_name).observe(waited)
+            stats = _request_stats.get()
+            if stats is not None:
+                stats.pool_wait_seconds += waited
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += time.perf_counter() - started
+
+
+def _handle_error(exception_context):
+    # Una sentencia fallida no llega a after_cursor_execute
+    conn = exception_context.connection
+    started_stack = conn.info.get("query_started") if conn is not None else None
+    if started_stack:
+        started = started_stack.pop()
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.db_seconds += time.perf_counter() - started
+
+
+def _pool_gauge_updater(sync_engine, name: str, returning: bool):
+    """
+    Hook de checkout/checkin que publica la ocupación del pool (solo pools con cola).
+    El evento checkin se emite antes de devolver la conexión, de ahí `returning`.
+    """
+    def update(dbapi_connection, connection_record, *args):
+        pool = sync_engine.pool
+        if not hasattr(pool, "checkedout"):
+            return
+        DB_POOL_SIZE.labels(name).set(pool.size())
+        DB_POOL_CHECKED_OUT.labels(name).set(pool.checkedout() - (1 if returning else 0))
+        DB_POOL_OVERFLOW.labels(name).set(max(0, pool.overflow()))
+    return update
+
+
+def instrument_engine(engine: AsyncEngine, name: str = "primary"):
+    """Registra los hooks de medición en un motor asíncrono (idempotente)."""
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+    if isinstance(sync_engine.pool, TimedAsyncQueuePool):
+        sync_engine.pool.metrics_name = name
+    event.listen(sync_engine, "checkout", _pool_gauge_updater(sync_engine, name, returning=False))
+    event.listen(sync_engine, "checkin", _pool_gauge_updater(sync_engine, name, returning=True))
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, BigInteger, DateTime, Index, text
+
+from app.db.session import Base
+from datetime import datetime, timezone
+
+
+class AccountPurge(Base):
+    """
+    Purga de los datos de una cuenta eliminada (DELETE /users/me), con su progreso.
+    Sin clave foránea a users: la fila sobrevive al borrado de la cuenta y deja
+    constancia de cuándo terminó.
+    """
+    __tablename__ = "account_purges"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False, index=True)
+    requested_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    # Filas borradas hasta ahora (tareas y registros de borrado), actualizado en cada lote
+    deleted_rows = Column(BigInteger, default=0, server_default="0", nullable=False)
+
+    __table_args__ = (
+        # Purgas pendientes en orden de llegada: WHERE finished_at IS NULL ORDER BY requested_at
+        Index(
+            "ix_account_purges_pending", "requested_at",
+            postgresql_where=text("finished_at IS NULL"), sqlite_where=text("finished_at IS NULL"),
+        ),
+    )
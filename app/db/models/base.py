@@ -1,4 +1,7 @@
 
 from app.db.session import Base
 from app.db.models.task import Task
+from app.db.models.task_state import UserTaskState
+from app.db.models.task_tombstone import TaskTombstone
+from app.db.models.account_purge import AccountPurge
 from app.db.models.user import User
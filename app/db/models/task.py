@@ -1,19 +1,45 @@
-from sqlalchemy import Column, Integer, String,ForeignKey,DateTime,Enum
+from sqlalchemy import Column, Integer, String,ForeignKey,DateTime,Enum,Index,Uuid
 
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 from sqlalchemy.sql import func
-import uuid
+from datetime import datetime, timezone
+from app.core.ids import uuid7
 
 
 
 
 class Task(Base):
+    """
+    En PostgreSQL `tasks` está particionada por HASH (user_id) (ver la migración
+    b7f3a9c2d481): la clave primaria incluye user_id, así que también los UPDATE y
+    DELETE que emite el ORM llevan la clave de partición y tocan una sola partición.
+    """
     __tablename__ = "tasks"
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    # UUIDv7 (ordenado por tiempo) en una columna uuid nativa: 16 bytes y altas al final del índice
+    id = Column(Uuid, primary_key=True, default=uuid7)
     title = Column(String(50), index=True, nullable=False)
     description = Column(String, nullable=True)
     status = Column(Enum("pending", "completed", name="status_enum"), default="pending", nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # El valor se genera en la app para conservar microsegundos en todos los motores (orden estable del cursor)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now())
+    # Última modificación (alta incluida): posición de la tarea en GET /tasks/changes
+    updated_at = Column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc), server_default=func.now(), nullable=False,
+    )
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, index=True)
     owner = relationship("User", back_populates="tasks")
+
+    __table_args__ = (
+        # Paginación por cursor: WHERE user_id = ? AND (created_at, id) > (?, ?) ORDER BY created_at, id
+        Index("ix_tasks_user_id_created_at_id", "user_id", "created_at", "id"),
+        # Filtro por estado con orden/rango por fecha
+        Index("ix_tasks_user_id_status_created_at_id", "user_id", "status", "created_at", "id"),
+        # Sincronización incremental: WHERE user_id = ? AND (updated_at, id) > (?, ?) ORDER BY updated_at, id
+        Index("ix_tasks_user_id_updated_at_id", "user_id", "updated_at", "id"),
+        # Orden y prefijo por título. En PostgreSQL se indexa title COLLATE "C" (orden por bytes,
+        # el mismo que usa SQLite) para que el rango del prefijo y el ORDER BY usen el índice
+        Index("ix_tasks_user_id_title_id", user_id, title.collate("C"), id).ddl_if(dialect="postgresql"),
+        Index("ix_tasks_user_id_status_title_id", user_id, status, title.collate("C"), id).ddl_if(dialect="postgresql"),
+    )
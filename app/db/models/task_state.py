@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, BigInteger, ForeignKey
+
+from app.db.session import Base
+
+
+class UserTaskState(Base):
+    """
+    Estado agregado de las tareas de un usuario; `version` cambia con cada escritura.
+    Los contadores por estado se actualizan en la misma transacción que las tareas.
+    """
+    __tablename__ = "user_task_state"
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0, server_default="0")
+    pending_count = Column(BigInteger, nullable=False, default=0, server_default="0")
+    completed_count = Column(BigInteger, nullable=False, default=0, server_default="0")
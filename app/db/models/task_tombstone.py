@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index, Uuid
+
+from app.db.session import Base
+from datetime import datetime, timezone
+
+
+class TaskTombstone(Base):
+    """
+    Registro de una tarea borrada, para que la sincronización incremental
+    (GET /tasks/changes) pueda informar del borrado. Se compactan pasada la
+    ventana máxima de sincronización (TASK_SYNC_WINDOW_DAYS).
+    """
+    __tablename__ = "task_tombstones"
+    task_id = Column(Uuid, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    deleted_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+
+    __table_args__ = (
+        # Cambios de un usuario: WHERE user_id = ? AND (deleted_at, task_id) > (?, ?)
+        Index("ix_task_tombstones_user_id_deleted_at_task_id", "user_id", "deleted_at", "task_id"),
+        # Compactación: WHERE deleted_at < ?
+        Index("ix_task_tombstones_deleted_at", "deleted_at"),
+    )
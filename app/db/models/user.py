@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, DateTime
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 
@@ -7,8 +7,12 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
+    # Cuenta eliminada (DELETE /users/me): deja de autenticar al momento y sus datos se purgan en segundo plano
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
     tasks = relationship(
         "Task",
         back_populates="owner",
-        cascade="all, delete"  # Si el usuario es eliminado pues también sus tareas serán eliminadas----
-    )
\ No newline at end of file
+        cascade="all, delete",  # Si el usuario es eliminado pues también sus tareas serán eliminadas----
+        # Nunca carga las tareas para borrarlas: lo hace la purga por lotes y el ON DELETE CASCADE lo que quede
+        passive_deletes=True,
+    )
@@ -0,0 +1,73 @@
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import Settings
+from app.db.session import AsyncSessionLocal, AsyncReadSessionLocal
+
+# Clave de Session.info con los usuarios que escribieron en la transacción en curso
+WRITTEN_USERS_KEY = "written_user_ids"
+
+
+class ReadWriteRouter:
+    """
+    Elige la fábrica de sesiones de lectura: réplica por defecto, primario para los
+    usuarios que escribieron hace menos de `pin_seconds` (read-your-writes).
+
+    Las marcas son locales a cada proceso, como la caché de autenticación: con varios
+    workers, una lectura atendida por otro worker dentro de la ventana puede ir a la
+    réplica. La ventana debe cubrir el retraso de replicación habitual.
+    """
+
+    def __init__(self, write_factory, read_factory, pin_seconds: float, max_entries: int):
+        self.write_factory = write_factory
+        self.read_factory = read_factory
+        self._pinned = TTLCache(max_entries=max_entries, ttl_seconds=pin_seconds)
+
+    @property
+    def has_replica(self) -> bool:
+        # Las fábricas son distintas siempre; sin réplica ambas apuntan al mismo motor
+        return self.read_factory.kw.get("bind") is not self.write_factory.kw.get("bind")
+
+    def pin(self, user_id: int):
+        """Envía las lecturas del usuario al primario durante la ventana configurada."""
+        if self.has_replica:
+            self._pinned.set(user_id, True)
+
+    def is_pinned(self, user_id: Optional[int]) -> bool:
+        return user_id is not None and self._pinned.get(user_id) is not None
+
+    def session_factory_for(self, user_id: Optional[int]):
+        return self.write_factory if self.is_pinned(user_id) else self.read_factory
+
+
+# Sin marcas hasta que create_app aplica la configuración (init_read_routing)
+db_router = ReadWriteRouter(AsyncSessionLocal, AsyncReadSessionLocal, pin_seconds=0, max_entries=0)
+
+
+def init_read_routing(app_settings: Settings):
+    """Crea el router de lecturas con la ventana de read-your-writes configurada."""
+    global db_router
+    db_router = ReadWriteRouter(
+        AsyncSessionLocal, AsyncReadSessionLocal,
+        pin_seconds=app_settings.DB_READ_AFTER_WRITE_SECONDS,
+        max_entries=app_settings.DB_READ_PIN_MAX_ENTRIES,
+    )
+
+
+def mark_user_write(session, user_id: int):
+    """Registra que la transacción actual escribe datos del usuario; se fija al primario al hacer commit."""
+    session.info.setdefault(WRITTEN_USERS_KEY, set()).add(user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _pin_written_users(session):
+    for user_id in session.info.pop(WRITTEN_USERS_KEY, ()):
+        db_router.pin(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_written_users(session):
+    session.info.pop(WRITTEN_USERS_KEY, None)
@@ -1,20 +1,68 @@
 # app/db/database.py
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker,declarative_base
-from app.core.config import settings
+from app.core.config import Settings
+from app.db.instrumentation import TimedAsyncQueuePool, instrument_engine
 
 #Models
 
-# Crea el motor de base de datos asíncrono
-engine = create_async_engine(settings.GET_URL_DB(), echo=True, future=True)
+def _create_engine(url: str, name: str, app_settings: Settings):
+    """Crea un motor asíncrono con el perfil configurado en Settings y lo instrumenta."""
+    created = create_async_engine(
+        url,
+        poolclass=TimedAsyncQueuePool,
+        future=True,
+        **app_settings.GET_ENGINE_OPTIONS(),
+    )
+    instrument_engine(created, name)
+    return created
+
+
+# Motores del primario (todas las escrituras) y de la réplica de lectura (sin réplica
+# configurada es el mismo que el primario). Los crea init_engines en el arranque de la
+# app (lifespan), no al importar
+engine: Optional[AsyncEngine] = None
+read_engine: Optional[AsyncEngine] = None
 
-# Crea una fábrica de sesiones asíncronas
+# Crea una fábrica de sesiones asíncronas; init_engines la enlaza al motor.
+# expire_on_commit=False: los objetos devueltos por RETURNING siguen siendo legibles
+# tras el commit sin recargarse (en async una recarga implícita no está permitida)
 AsyncSessionLocal = sessionmaker(
-    autocommit=False, autoflush=False, bind=engine, class_=AsyncSession
+    autocommit=False, autoflush=False, expire_on_commit=False, class_=AsyncSession
 )
+# Sesiones de lectura: enlazadas a la réplica, o al primario si no hay réplica
+AsyncReadSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, class_=AsyncSession
+)
+
+
+def init_engines(app_settings: Settings) -> AsyncEngine:
+    """Crea los motores (si no existen) y enlaza a ellos las fábricas de sesiones."""
+    global engine, read_engine
+    if engine is None:
+        engine = _create_engine(app_settings.GET_URL_DB(), "primary", app_settings)
+        read_url = app_settings.GET_READ_URL_DB()
+        read_engine = _create_engine(read_url, "replica", app_settings) if read_url else engine
+        AsyncSessionLocal.configure(bind=engine)
+        AsyncReadSessionLocal.configure(bind=read_engine)
+    return engine
+
+
+async def dispose_engines():
+    """Cierra las conexiones de ambos motores; init_engines los vuelve a crear."""
+    global engine, read_engine
+    if engine is None:
+        return
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
+    engine = read_engine = None
+    AsyncSessionLocal.configure(bind=None)
+    AsyncReadSessionLocal.configure(bind=None)
 
 # Base declarativa para los modelos de SQLAlchemy
 
 Base = declarative_base()
-
@@ -1,11 +1,55 @@
+from typing import Optional
+
+from fastapi import Depends
+from fastapi.security import OAuth2PasswordBearer
+from jose import JWTError
 
 #Session
 from app.db.session import AsyncSessionLocal
+from app.db import routing
+#Core
+from app.core.security import decode_access_token
 # app/db/session_gen.py
 
+# Solo para elegir réplica o primario: la autenticación la hace get_current_user
+_optional_token = OAuth2PasswordBearer(tokenUrl="/users/token", auto_error=False)
+
+
 async def get_db():
     """
-    Dependencia de FastAPI para obtener una sesión de base de datos.
+    Dependencia de FastAPI para obtener una sesión de base de datos (primario).
     """
     async with AsyncSessionLocal() as session:
         yield session
+
+
+def get_session_factory():
+    """
+    Dependencia que entrega la fábrica de sesiones en lugar de una sesión.
+
+    La usan las respuestas en streaming: la sesión de `get_db` se cierra antes de
+    enviar el cuerpo, así que el generador abre y cierra la suya propia.
+    """
+    return AsyncSessionLocal
+
+
+def get_read_session_factory(token: Optional[str] = Depends(_optional_token)):
+    """
+    Fábrica de sesiones para lecturas: la réplica, salvo que el usuario del token
+    haya escrito hace poco (entonces el primario, para que vea sus propios cambios).
+    """
+    user_id = None
+    if token:
+        try:
+            user_id = decode_access_token(token).get("uid")
+        except JWTError:
+            pass
+    return routing.db_router.session_factory_for(user_id)
+
+
+async def get_read_db(session_factory = Depends(get_read_session_factory)):
+    """
+    Dependencia de FastAPI para obtener una sesión de solo lectura (ver get_read_session_factory).
+    """
+    async with session_factory() as session:
+        yield session
@@ -1,43 +1,123 @@
 # app/auth/dependencies.py
 
-from fastapi import Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Query, WebSocket, WebSocketException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from jose import JWTError
+from sqlalchemy import event, inspect
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from app.core.config import settings
-from app.dependens.db import get_db
+from app.core.cache import TTLCache
+from app.core.config import Settings
+from app.core.security import decode_access_token
+from app.dependens.db import get_read_db, get_session_factory
+from app.db import routing
 from app.db.models.user import User
+from app.schemas.user import UserOut
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/token")
 
+# Usuarios resueltos, indexados por el `sub` del token (email). Desactivada hasta init_user_cache
+user_cache = TTLCache(max_entries=0, ttl_seconds=0)
+
+
+def init_user_cache(app_settings: Settings):
+    """Crea la caché de usuarios con el tamaño y la caducidad configurados."""
+    global user_cache
+    user_cache = TTLCache(
+        max_entries=app_settings.AUTH_CACHE_MAX_ENTRIES,
+        ttl_seconds=app_settings.AUTH_USER_CACHE_TTL_SECONDS,
+    )
+
+
+def invalidate_user(email: str):
+    """Elimina un usuario de la caché de autenticación (cambio o borrado)."""
+    user_cache.delete(email)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    invalidate_user(target.email)
+    # Si cambió el email, también se invalida la entrada anterior
+    for previous_email in inspect(target).attrs.email.history.deleted:
+        invalidate_user(previous_email)
+
+
 async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_read_db)
 ):
     """
     Dependencia para obtener el usuario actual a partir de un token JWT.
+
+    En el camino habitual no consulta la base de datos: el token verificado y el
+    usuario resuelto se sirven desde caché. Si hay que buscarlo se lee de la réplica
+    y, si aún no está en ella (cuenta recién creada), del primario.
     """
+    return await authenticate_token(token, db)
+
+
+async def get_websocket_user(
+    websocket: WebSocket,
+    access_token: Optional[str] = Query(None),
+    session_factory = Depends(get_session_factory),
+):
+    """
+    Usuario de un WebSocket: token en `?access_token=` (los navegadores no permiten
+    cabeceras en WebSocket) o en Authorization. Si no es válido el handshake se
+    rechaza con 1008. La sesión solo dura la comprobación, no toda la conexión.
+    """
+    token = access_token
+    if not token:
+        scheme, _, credentials = websocket.headers.get("authorization", "").partition(" ")
+        token = credentials if scheme.lower() == "bearer" else None
+    try:
+        if not token:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+        async with session_factory() as db:
+            return await authenticate_token(token, db)
+    except HTTPException as e:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+
+
+async def authenticate_token(token: str, db: AsyncSession) -> UserOut:
+    """Resuelve el usuario de un token JWT (ver get_current_user); 401 si no es válido."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = decode_access_token(token)
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    
-    result = await db.execute(
-        select(User).filter(User.email == email)
-    )
-    user = result.scalars().first()
-    
 
+    user_id = payload.get("uid")
+    user = user_cache.get(email)
     if user is None:
+        # Los tokens nuevos llevan el ID y se resuelven por clave primaria
+        if user_id is not None:
+            query = select(User).filter(User.id == user_id)
+        else:
+            query = select(User).filter(User.email == email)
+        result = await db.execute(query)
+        db_user = result.scalars().first()
+        if db_user is None and routing.db_router.has_replica:
+            async with routing.db_router.write_factory() as primary:
+                db_user = (await primary.execute(query)).scalars().first()
+        # Una cuenta eliminada deja de autenticar aunque sus datos aún no se hayan purgado
+        if db_user is None or db_user.email != email or db_user.deleted_at is not None:
+            raise credentials_exception
+        user = UserOut.model_validate(db_user)
+        user_cache.set(email, user)
+
+    # Un email reutilizado por otra cuenta no acepta tokens de la anterior
+    if user_id is not None and user.id != user_id:
         raise credentials_exception
     return user
 
@@ -1,5 +1,6 @@
-import logging
-from fastapi import FastAPI
+import time
+from typing import Optional
+from fastapi import FastAPI, Response
 import os
 from contextlib import asynccontextmanager
 
@@ -8,28 +9,25 @@ from app.api.v1 import auth_routers, task_routers
 
 #Middleware
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from app.middleware.db_timing import DBTimingMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.admission import AdmissionControlMiddleware
 
 
 #Core
-from app.core.log import logger
+from app.core.config import Settings, configure_settings, get_settings
+from app.core.log import logger, setup_logging
+from app.core.security import init_security, password_hasher
+from app.core.metrics import render_metrics, mark_process_dead
+from app.core import events
 
-
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Eventos de startup y shutdown de la aplicación."""
-    logger.info("Iniciando la aplicación...")
-    yield
-    logger.info("La aplicación se está apagando.")
-
-app = FastAPI(
-    title="API de Tareas (TODOs)",
-    description="Una API para gestionar tareas personales.",
-    lifespan=lifespan
-)
-
-# Incluir routers
-app.include_router(auth_routers.router, prefix="/users", tags=["users"])
-app.include_router(task_routers.router, prefix="/tasks", tags=["tasks"])
+#Database
+from app.db import routing
+from app.db.session import AsyncReadSessionLocal, AsyncSessionLocal, dispose_engines, init_engines
+from app.dependens.security import init_user_cache
+from app.services.task_service import init_task_cache
+from app.services.warmup import warm_up_pool, warm_up_validation
 
 
 origins = [
@@ -39,15 +37,104 @@ origins = [
     "http://127.0.0.1:5500"
 ]
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+
+def create_app(app_settings: Optional[Settings] = None) -> FastAPI:
+    """
+    Crea la aplicación con `app_settings` (por defecto, la configuración del entorno).
+
+    Importar este módulo no lee la configuración ni abre conexiones: los motores se
+    crean en el arranque (lifespan), que además puede dejar preparadas
+    DB_WARMUP_CONNECTIONS conexiones antes de aceptar peticiones.
+    """
+    app_settings = configure_settings(app_settings) if app_settings is not None else get_settings()
+    setup_logging()
+    init_security(app_settings)
+    init_user_cache(app_settings)
+    init_task_cache(app_settings)
+    events.init_events(app_settings)
+    routing.init_read_routing(app_settings)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        """Eventos de startup y shutdown de la aplicación."""
+        logger.info("Iniciando la aplicación...")
+        started = time.perf_counter()
+        init_engines(app_settings)
+        warm_up_validation()
+        # Más allá de pool_size las conexiones se cerrarían al devolverse
+        connections = min(app_settings.DB_WARMUP_CONNECTIONS, app_settings.DB_POOL_SIZE)
+        warmed = await warm_up_pool(AsyncSessionLocal, connections)
+        if routing.db_router.has_replica:
+            warmed += await warm_up_pool(AsyncReadSessionLocal, connections)
+        await events.event_broker.start()
+        logger.info(f"Startup complete in {(time.perf_counter() - started) * 1000:.1f} ms ({warmed} connections warmed)")
+        yield
+        logger.info("La aplicación se está apagando.")
+        await events.event_broker.close()
+        await dispose_engines()
+        password_hasher.shutdown()
+        mark_process_dead(os.getpid())
+
+    app = FastAPI(
+        title="API de Tareas (TODOs)",
+        description="Una API para gestionar tareas personales.",
+        lifespan=lifespan
+    )
+
+    # Incluir routers
+    app.include_router(auth_routers.router, prefix="/users", tags=["users"])
+    app.include_router(task_routers.router, prefix="/tasks", tags=["tasks"])
+
+    if app_settings.ADMISSION_ENABLED:
+        # Dentro de CORS, para que los 429/503 lleguen al navegador con sus cabeceras
+        app.add_middleware(
+            AdmissionControlMiddleware,
+            max_concurrency=app_settings.ADMISSION_MAX_CONCURRENCY,
+            max_queue=app_settings.ADMISSION_MAX_QUEUE,
+            queue_timeout=app_settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+            rate=app_settings.RATE_LIMIT_PER_SECOND,
+            burst=app_settings.RATE_LIMIT_BURST,
+            max_keys=app_settings.RATE_LIMIT_MAX_KEYS,
+        )
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[task_routers.NEXT_CURSOR_HEADER, "ETag", "Retry-After"],
+    )
+
+    if app_settings.RESPONSE_GZIP_ENABLED:
+        app.add_middleware(
+            GZipMiddleware,
+            minimum_size=app_settings.RESPONSE_GZIP_MIN_BYTES,
+            compresslevel=app_settings.RESPONSE_GZIP_LEVEL,
+        )
+
+    app.add_middleware(DBTimingMiddleware, expose_header=app_settings.SERVER_TIMING_ENABLED)
+
+    if app_settings.METRICS_ENABLED:
+        # Se añade el último para ser el más externo: mide también a los demás middlewares
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/metrics", include_in_schema=False)
+        def metrics():
+            """Métricas en formato de exposición de Prometheus."""
+            content, content_type = render_metrics()
+            return Response(content=content, media_type=content_type)
+
+    @app.get("/", tags=["Root"])
+    async def read_root():
+        return {"message": "Bienvenido a la API de Tareas"}
+
+    return app
 
 
-@app.get("/", tags=["Root"])
-async def read_root():
-    return {"message": "Bienvenido a la API de Tareas"}
\ No newline at end of file
+def __getattr__(name: str):
+    # `uvicorn app.main:app` sigue funcionando: la app por defecto se crea al pedirla, no al importar
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,222 @@
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from jose import JWTError
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.cache import TTLCache
+from app.core.log import logger
+from app.core.metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_QUEUE_WAIT, ADMISSION_SHED
+from app.core.security import decode_access_token
+
+READ_METHODS = frozenset({"GET", "HEAD"})
+# Conexiones de larga duración: se limitan por usuario en el broker, no ocupan hueco de concurrencia
+STREAM_PATHS = frozenset({"/tasks/events"})
+
+
+def route_class(method: str, path: str) -> Optional[str]:
+    """Clase de ruta para la admisión; None si la ruta no está limitada (/, /docs, /metrics...)."""
+    if path.startswith("/users/"):
+        return "auth"
+    if path in STREAM_PATHS:
+        return "task_stream"
+    if path == "/tasks" or path.startswith("/tasks/"):
+        return "task_read" if method in READ_METHODS else "task_write"
+    return None
+
+
+class ConcurrencyLimiter:
+    """
+    Limita las peticiones simultáneas de una clase de ruta.
+
+    Como mucho `max_concurrent` se procesan a la vez y `max_queue` esperan turno
+    (en orden de llegada) durante `queue_timeout` segundos; el resto se rechaza al
+    momento. Pensado para un único event loop: no necesita locks.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters: "deque[asyncio.Future]" = deque()
+        self.queued = 0
+        self.shed: Dict[str, int] = {"queue_full": 0, "timeout": 0}
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def _shed(self, reason: str) -> bool:
+        self.shed[reason] += 1
+        ADMISSION_SHED.labels(self.name, reason).inc()
+        return False
+
+    def _admitted(self) -> bool:
+        ADMISSION_IN_FLIGHT.labels(self.name).set(self.in_flight)
+        return True
+
+    async def acquire(self) -> bool:
+        """True si la petición puede procesarse; False si se descarta (cola llena o plazo vencido)."""
+        if self.in_flight < self.max_concurrent and not self._waiters:
+            self.in_flight += 1
+            return self._admitted()
+        if len(self._waiters) >= self.max_queue:
+            return self._shed("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        ADMISSION_QUEUE_DEPTH.labels(self.name).set(len(self._waiters))
+        started = time.perf_counter()
+        try:
+            # release() pasa el hueco directamente al primero de la cola (in_flight no cambia)
+            await asyncio.wait_for(waiter, self.queue_timeout)
+            return self._admitted()
+        except asyncio.TimeoutError:
+            return self._shed("timeout")
+        except BaseException:
+            # Cancelada (p. ej. el cliente cerró la conexión) justo cuando recibía un hueco
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            ADMISSION_QUEUE_DEPTH.labels(self.name).set(len(self._waiters))
+            ADMISSION_QUEUE_WAIT.labels(self.name).observe(time.perf_counter() - started)
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+        ADMISSION_IN_FLIGHT.labels(self.name).set(self.in_flight)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "queued": self.queued,
+            "shed": dict(self.shed),
+        }
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket por clave: `rate` peticiones por segundo sostenidas con ráfagas de `burst`.
+
+    Los cubos viven en un TTLCache acotado; un cubo sin uso durante el tiempo de
+    rellenarse entero caduca, que equivale a tenerlo lleno. Local a cada proceso.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = TTLCache(max_entries=max_keys, ttl_seconds=burst / rate if rate > 0 else 0)
+        self.limited = 0
+
+    def acquire(self, key: str) -> float:
+        """Consume un token; devuelve 0 si hay, o los segundos hasta el siguiente si no."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key) or (float(self.burst), now)
+        tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self._buckets.set(key, (tokens, now))
+            self.limited += 1
+            return (1 - tokens) / self.rate
+        self._buckets.set(key, (tokens - 1, now))
+        return 0.0
+
+
+def _rate_limit_key(scope: Scope) -> str:
+    """Usuario del token si es válido; si no, la IP del cliente."""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                try:
+                    user_id = decode_access_token(token).get("uid")
+                except JWTError:
+                    user_id = None
+                if user_id is not None:
+                    return f"user:{user_id}"
+            break
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class AdmissionControlMiddleware:
+    """
+    Control de admisión antes de que la petición consuma recursos (pool de DB, bcrypt):
+    token bucket por usuario (429) y límite de concurrencia con cola acotada por
+    clase de ruta (503). Ambos rechazos llevan `Retry-After`.
+    """
+
+    def __init__(
+        self, app: ASGIApp, max_concurrency: Dict[str, int], max_queue: Dict[str, int],
+        queue_timeout: float, rate: float, burst: int, max_keys: int,
+    ):
+        self.app = app
+        self.limiters = {
+            name: ConcurrencyLimiter(name, limit, max_queue.get(name, 0), queue_timeout)
+            for name, limit in max_concurrency.items()
+        }
+        self.rate_limiter = TokenBucketLimiter(rate, burst, max_keys)
+
+    def stats(self) -> dict:
+        return {
+            "rate_limited": self.rate_limiter.limited,
+            **{name: limiter.stats() for name, limiter in self.limiters.items()},
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        name = route_class(scope["method"], scope["path"])
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = self.rate_limiter.acquire(_rate_limit_key(scope))
+        if retry_after:
+            ADMISSION_SHED.labels(name, "rate_limited").inc()
+            await _reject(send, 429, "Too many requests", retry_after)
+            return
+
+        limiter = self.limiters.get(name)
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+        if not await limiter.acquire():
+            logger.warning(f"Shedding {scope['method']} {scope['path']}: {name} saturated")
+            await _reject(send, 503, "Server busy, try again later", 1)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+
+async def _reject(send: Send, status_code: int, detail: str, retry_after: float):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,63 @@
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.log import logger, SAMPLED
+from app.db.instrumentation import start_request_stats, stop_request_stats
+
+
+class DBTimingMiddleware:
+    """
+    Mide por petición el número de sentencias SQL, el tiempo en la DB y la espera
+    por una conexión del pool.
+
+    Los valores se exponen en la cabecera `Server-Timing` (si `expose_header`) y
+    en una línea de log estructurada al terminar la petición.
+    """
+
+    def __init__(self, app: ASGIApp, expose_header: bool = True):
+        self.app = app
+        self.expose_header = expose_header
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = start_request_stats()
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.expose_header:
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        "Server-Timing",
+                        f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.statements} statements", '
+                        f"pool;dur={stats.pool_wait_seconds * 1000:.2f}, "
+                        f"app;dur={(time.perf_counter() - started) * 1000:.2f}",
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            total_ms = (time.perf_counter() - started) * 1000
+            stop_request_stats(token)
+            db_stats = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status_code,
+                "db_statements": stats.statements,
+                "db_ms": round(stats.db_seconds * 1000, 2),
+                "pool_wait_ms": round(stats.pool_wait_seconds * 1000, 2),
+                "total_ms": round(total_ms, 2),
+            }
+            logger.info(
+                " ".join(f"{key}={value}" for key, value in db_stats.items()),
+                extra={**SAMPLED, "db_stats": db_stats},
+            )
@@ -1,7 +1,8 @@
 
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Optional
+from uuid import UUID
 from enum import Enum
 
 # Enum para status
@@ -9,6 +10,13 @@ class StatusEnum(str, Enum):
     pending = "pending"
     completed = "completed"
 
+# Orden admitido en el listado ("-" = descendente)
+class TaskSortEnum(str, Enum):
+    created_at = "created_at"
+    created_at_desc = "-created_at"
+    title = "title"
+    title_desc = "-title"
+
 # Propiedades base compartidas
 class TaskBase(BaseModel):
     title: str
@@ -26,8 +34,69 @@ class TaskUpdate(BaseModel):
 
 # Propiedades a devolver al cliente (en la respuesta de la API)
 class Task(TaskBase):
-    id: str
+    id: UUID
     status: StatusEnum
     created_at: datetime
     user_id: int
+    updated_at: datetime
     model_config = ConfigDict(from_attributes=True)
+
+# Operaciones en lote: los elementos se validan uno a uno para informar errores por elemento
+class TaskBulkCreate(BaseModel):
+    items: List[Dict[str, Any]]
+
+class TaskBulkUpdateItem(TaskUpdate):
+    id: UUID
+
+class TaskBulkUpdate(BaseModel):
+    items: List[Dict[str, Any]]
+
+class TaskBulkDelete(BaseModel):
+    ids: List[str]
+
+# Resultado de cada elemento de una operación en lote
+class TaskBulkItemResult(BaseModel):
+    index: int
+    success: bool
+    id: Optional[str] = None
+    task: Optional[Task] = None
+    error: Optional[str] = None
+
+class TaskBulkResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[TaskBulkItemResult]
+
+# Resultado de una importación en streaming
+class TaskImportChunk(BaseModel):
+    chunk: int
+    accepted: int
+    rejected: int
+
+class TaskImportRejectedRow(BaseModel):
+    line: int
+    error: str
+
+# `chunks` y `rejected_rows` tienen un tamaño máximo; `truncated` indica que se omitieron elementos
+class TaskImportResult(BaseModel):
+    accepted: int
+    rejected: int
+    chunks: List[TaskImportChunk]
+    rejected_rows: List[TaskImportRejectedRow]
+    truncated: bool = False
+
+# Sincronización incremental (GET /tasks/changes): tareas cambiadas y borradas desde el token
+class TaskDeletion(BaseModel):
+    id: UUID
+    deleted_at: datetime
+
+class TaskChanges(BaseModel):
+    changes: List[Task]
+    deleted: List[TaskDeletion]
+    next_token: str
+    has_more: bool
+
+class TaskStats(BaseModel):
+    pending: int
+    completed: int
+    total: int
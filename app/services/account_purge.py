@@ -0,0 +1,151 @@
+# Imports
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import delete, text, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+# Models
+from app.db.models.account_purge import AccountPurge
+from app.db.models.task import Task as TaskModel
+from app.db.models.task_state import UserTaskState
+from app.db.models.task_tombstone import TaskTombstone
+from app.db.models.user import User as UserModel
+
+#Core
+from app.core.config import settings
+from app.core.log import logger, SAMPLED
+from app.core.metrics import ACCOUNT_PURGE_BATCH_SECONDS, ACCOUNT_PURGE_DELETED_ROWS, ACCOUNT_PURGE_THROTTLED_SECONDS
+
+# Tablas con filas por usuario que se vacían por lotes, en este orden: (modelo, clave primaria)
+PURGED_TABLES = ((TaskModel, TaskModel.id), (TaskTombstone, TaskTombstone.task_id))
+# Retraso de la réplica en segundos; 0 si ya aplicó todo lo recibido (sin escrituras en
+# el primario, now() - pg_last_xact_replay_timestamp() crecería aunque no haya retraso)
+REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+# Espera entre comprobaciones mientras la réplica va retrasada
+REPLICA_LAG_RECHECK_SECONDS = 1
+
+
+class AccountPurgeService:
+    """
+    Borra en segundo plano los datos de las cuentas eliminadas (DELETE /users/me).
+
+    Cada tabla se vacía en lotes de ACCOUNT_PURGE_BATCH_SIZE filas, con un commit por
+    lote y una pausa entre lotes. Si hay una réplica PostgreSQL (`replica_factory`), se
+    espera mientras su retraso supere ACCOUNT_PURGE_MAX_REPLICA_LAG_SECONDS. Así no hay
+    una transacción larga reteniendo bloqueos ni un pico de WAL que la réplica no pueda
+    seguir. La fila del usuario se borra al final, cuando ya no le quedan tareas.
+    """
+
+    def __init__(self, db: AsyncSession, replica_factory=None):
+        self.db = db
+        self.replica_factory = replica_factory
+
+    async def pending(self) -> List[AccountPurge]:
+        """Purgas sin terminar, de la más antigua a la más reciente, con su progreso."""
+        try:
+            result = await self.db.execute(
+                select(AccountPurge).filter(AccountPurge.finished_at.is_(None)).order_by(AccountPurge.requested_at)
+            )
+            return list(result.scalars().all())
+        except SQLAlchemyError as e:
+            logger.error(f"Error fetching pending account purges: {e}")
+            raise HTTPException(status_code=500, detail="Database error")
+
+    async def _replica_lag(self) -> Optional[float]:
+        """Retraso actual de la réplica en segundos; None si no hay réplica PostgreSQL."""
+        if self.replica_factory is None:
+            return None
+        async with self.replica_factory() as replica:
+            if replica.get_bind().dialect.name != "postgresql":
+                return None
+            return float(await replica.scalar(REPLICA_LAG_SQL) or 0)
+
+    async def _throttle(self):
+        """Pausa entre lotes; se prolonga mientras la réplica acumule retraso."""
+        if settings.ACCOUNT_PURGE_BATCH_DELAY_SECONDS > 0:
+            await asyncio.sleep(settings.ACCOUNT_PURGE_BATCH_DELAY_SECONDS)
+        while True:
+            lag = await self._replica_lag()
+            if lag is None or lag <= settings.ACCOUNT_PURGE_MAX_REPLICA_LAG_SECONDS:
+                return
+            logger.warning(f"Account purge paused: replica lag {lag:.1f}s", extra=SAMPLED)
+            ACCOUNT_PURGE_THROTTLED_SECONDS.inc(REPLICA_LAG_RECHECK_SECONDS)
+            await asyncio.sleep(REPLICA_LAG_RECHECK_SECONDS)
+
+    async def _delete_batch(self, purge_id: int, user_id: int, model, key) -> int:
+        """Borra hasta ACCOUNT_PURGE_BATCH_SIZE filas del usuario y anota el progreso, en una transacción."""
+        started = time.perf_counter()
+        batch = select(key).filter(model.user_id == user_id).limit(settings.ACCOUNT_PURGE_BATCH_SIZE)
+        # user_id también fuera de la subconsulta: el DELETE solo toca la partición del usuario
+        result = await self.db.execute(
+            delete(model).where(model.user_id == user_id, key.in_(batch)).execution_options(synchronize_session=False)
+        )
+        deleted = result.rowcount
+        await self.db.execute(
+            update(AccountPurge)
+            .where(AccountPurge.id == purge_id)
+            .values(deleted_rows=AccountPurge.deleted_rows + deleted)
+        )
+        await self.db.commit()
+        ACCOUNT_PURGE_BATCH_SECONDS.observe(time.perf_counter() - started)
+        ACCOUNT_PURGE_DELETED_ROWS.labels(model.__tablename__).inc(deleted)
+        return deleted
+
+    async def purge(self, purge: AccountPurge) -> int:
+        """Vacía los datos del usuario de `purge` por lotes y borra la cuenta. Devuelve las filas borradas."""
+        user_id = purge.user_id
+        purged = 0
+        try:
+            if purge.started_at is None:
+                await self.db.execute(
+                    update(AccountPurge).where(AccountPurge.id == purge.id)
+                    .values(started_at=datetime.now(timezone.utc))
+                )
+                await self.db.commit()
+            logger.info(f"Purging account {user_id} ({purge.deleted_rows} rows already deleted)")
+            for model, key in PURGED_TABLES:
+                while True:
+                    deleted = await self._delete_batch(purge.id, user_id, model, key)
+                    purged += deleted
+                    if deleted:
+                        logger.info(
+                            f"Purged {deleted} rows from {model.__tablename__} for user {user_id} ({purged} total)",
+                            extra=SAMPLED,
+                        )
+                    if deleted < settings.ACCOUNT_PURGE_BATCH_SIZE:
+                        break
+                    await self._throttle()
+            # Desde que se marcó deleted_at ninguna escritura de tareas hace commit
+            # (TaskService._bump_version), así que no quedan filas por detrás de los lotes
+            await self.db.execute(delete(UserTaskState).where(UserTaskState.user_id == user_id))
+            await self.db.execute(delete(UserModel).where(UserModel.id == user_id))
+            await self.db.execute(
+                update(AccountPurge).where(AccountPurge.id == purge.id)
+                .values(finished_at=datetime.now(timezone.utc))
+            )
+            await self.db.commit()
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logger.error(f"Error purging account {user_id} after {purged} rows: {e}")
+            raise HTTPException(status_code=500, detail="Database error")
+        logger.info(f"Account {user_id} purged ({purged} rows)")
+        return purged
+
+    async def run_pending(self) -> int:
+        """Purga una a una las cuentas pendientes (también las que llegan mientras tanto). Devuelve cuántas."""
+        accounts = 0
+        while True:
+            pending = await self.pending()
+            if not pending:
+                return accounts
+            await self.purge(pending[0])
+            accounts += 1
@@ -1,4 +1,5 @@
 # Imports
+from datetime import datetime, timezone
 from fastapi import HTTPException, status
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -7,13 +8,14 @@ from sqlalchemy.exc import SQLAlchemyError
 
 #Models
 from app.db.models.user import User
+from app.db.models.account_purge import AccountPurge
 
 #Schemas
 from app.schemas.user import UserCreate
 
 #Core
 from app.core.log import logger
-from app.core.security import verify_password, hash_password, create_access_token
+from app.core.security import password_hasher, create_access_token
 
 
 class AuthService:
@@ -35,7 +37,7 @@ class AuthService:
             # Crear nuevo usuario
             new_user = User(
                 email=user_data.email,
-                hashed_password=hash_password(user_data.password)
+                hashed_password=await password_hasher.hash(user_data.password)
             )
             self.db.add(new_user)
             await self.db.commit()
@@ -54,7 +56,7 @@ class AuthService:
                 select(User).filter(User.email == email)
             )
             user = result.scalars().first()
-            if not user or not verify_password(password, user.hashed_password):
+            if not user or user.deleted_at is not None or not await password_hasher.verify(password, user.hashed_password):
                 logger.warning(f"Failed login attempt for email: {email}")
                 return None
             return user
@@ -62,6 +64,28 @@ class AuthService:
             logger.error(f"Error authenticating user {email}: {e}")
             return None
 
+    async def delete_account(self, user_id: int):
+        """
+        Desactiva la cuenta al momento y encarga el borrado de sus datos al worker de
+        purga (app.commands.purge_deleted_accounts): aquí no se borra ninguna tarea.
+        Repetirlo sobre una cuenta ya desactivada no hace nada.
+        """
+        try:
+            user = await self.db.get(User, user_id, with_for_update=True)
+            if user is None or user.deleted_at is not None:
+                await self.db.rollback()
+                return
+            now = datetime.now(timezone.utc)
+            # Al ser una actualización del ORM, el evento after_update invalida la caché de autenticación
+            user.deleted_at = now
+            self.db.add(AccountPurge(user_id=user_id, requested_at=now))
+            await self.db.commit()
+            logger.info(f"User {user_id} disabled, account purge scheduled")
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logger.error(f"Error deleting account {user_id}: {e}")
+            raise HTTPException(status_code=500, detail="Database error")
+
     async def login(self, email: str, password: str):
         """Login de usuario y generación de token JWT."""
         user = await self._authenticate_user(email, password)
@@ -70,6 +94,6 @@ class AuthService:
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid credentials"
             )
-        token = create_access_token({"sub": user.email})
+        token = create_access_token({"sub": user.email, "uid": user.id})
         logger.info(f"User logged in: {email}")
         return {"access_token": token, "token_type": "bearer"}
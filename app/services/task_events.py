@@ -0,0 +1,94 @@
+import asyncio
+from typing import AsyncIterator, Tuple
+
+from fastapi import WebSocket, status
+from starlette.websockets import WebSocketDisconnect
+
+#Core
+from app.core import events
+from app.core.config import settings
+from app.core.log import logger
+
+# Services
+from app.services.task_serialization import encode_task_event
+from app.services.task_service import TaskService
+
+# Espera que indica EventSource al navegador antes de reconectar (milisegundos)
+SSE_RETRY_MS = 3000
+HEARTBEAT = encode_task_event("heartbeat", None)
+RESYNC = encode_task_event("resync", None)
+
+
+async def open_task_events(session_factory, user_id: int) -> Tuple[events.Subscription, int]:
+    """
+    Suscribe al usuario a sus eventos y lee su versión actual, en ese orden: una
+    escritura que termine entre ambos pasos llega como evento, nunca se pierde.
+    La sesión solo vive para esa lectura; la conexión de eventos no retiene una del pool.
+    """
+    subscription = events.event_broker.subscribe(user_id)
+    try:
+        async with session_factory() as session:
+            version = await TaskService(session).get_version(user_id)
+    except BaseException:
+        subscription.close()
+        raise
+    return subscription, version
+
+
+async def sse_stream(subscription: events.Subscription, version: int) -> AsyncIterator[str]:
+    """
+    Flujo text/event-stream: "ready" con la versión actual, luego un mensaje por evento
+    y un comentario cada EVENTS_HEARTBEAT_SECONDS sin eventos (mantiene viva la conexión
+    a través de proxies). Si el cliente se queda atrás recibe "resync" y se cierra.
+    """
+    try:
+        yield f"retry: {SSE_RETRY_MS}\ndata: {encode_task_event('ready', version)}\n\n"
+        while True:
+            payload = await subscription.get(settings.EVENTS_HEARTBEAT_SECONDS)
+            if payload is None:
+                yield ": heartbeat\n\n"
+            elif payload is events.OVERFLOW:
+                yield f"data: {RESYNC}\n\n"
+                return
+            else:
+                # El JSON no contiene saltos de línea: cabe en una sola línea data
+                yield f"data: {payload}\n\n"
+    finally:
+        subscription.close()
+
+
+async def _send_events(websocket: WebSocket, subscription: events.Subscription, version: int):
+    await websocket.send_text(encode_task_event("ready", version))
+    while True:
+        payload = await subscription.get(settings.EVENTS_HEARTBEAT_SECONDS)
+        if payload is None:
+            await websocket.send_text(HEARTBEAT)
+        elif payload is events.OVERFLOW:
+            await websocket.send_text(RESYNC)
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+            return
+        else:
+            await websocket.send_text(payload)
+
+
+async def _wait_disconnect(websocket: WebSocket):
+    # Los mensajes del cliente se ignoran: solo interesa saber cuándo cierra
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+async def websocket_stream(websocket: WebSocket, subscription: events.Subscription, version: int):
+    """Los mismos mensajes que sse_stream sobre un WebSocket ya aceptado, hasta que alguno de los dos cierra."""
+    sender = asyncio.create_task(_send_events(websocket, subscription, version))
+    receiver = asyncio.create_task(_wait_disconnect(websocket))
+    try:
+        done, pending = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, (WebSocketDisconnect, OSError)):
+                logger.error(f"Task event stream failed for user {subscription.user_id}: {error}")
+    finally:
+        subscription.close()
@@ -0,0 +1,96 @@
+import csv
+import json
+from typing import Any, AsyncIterator, Dict, Optional, Tuple, Union
+
+# Una línea más larga que esto se rechaza sin acumularla en memoria
+MAX_LINE_BYTES = 64 * 1024
+
+# (número de línea, registro) o (número de línea, mensaje de error)
+ParsedRecord = Tuple[int, Union[Dict[str, Any], str]]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    Parte un flujo de bytes en líneas numeradas sin cargarlo entero en memoria.
+    Las líneas de más de MAX_LINE_BYTES se devuelven como None.
+    """
+    buffer = b""
+    line_number = 0
+    oversized = False
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if oversized:
+                # Final de una línea demasiado larga que ya se rechazó
+                oversized = False
+                continue
+            # También las que empiezan y terminan dentro del mismo chunk
+            yield line_number, line.rstrip(b"\r") if len(line) <= MAX_LINE_BYTES else None
+        if len(buffer) > MAX_LINE_BYTES:
+            if not oversized:
+                yield line_number + 1, None
+            buffer, oversized = b"", True
+    if buffer and not oversized:
+        yield line_number + 1, buffer.rstrip(b"\r")
+
+
+async def iter_ndjson_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[ParsedRecord]:
+    """Un objeto JSON por línea; las líneas vacías se ignoran."""
+    async for line_number, line in iter_lines(chunks):
+        if line is None:
+            yield line_number, "Line too long"
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_number, "Invalid JSON"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, "Expected a JSON object"
+            continue
+        yield line_number, record
+
+
+async def iter_csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[ParsedRecord]:
+    """
+    CSV con cabecera en la primera línea.
+
+    Un campo entre comillas puede contener saltos de línea: el registro se da por
+    completo cuando el número de comillas acumuladas es par (RFC 4180 duplica las
+    comillas escapadas, así que la paridad se conserva).
+    """
+    header = None
+    pending = ""
+    start_line = 0
+    async for line_number, line in iter_lines(chunks):
+        if line is None:
+            pending = ""
+            yield line_number, "Line too long"
+            continue
+        text = line.decode("utf-8", errors="replace")
+        if not pending:
+            start_line = line_number
+        pending = f"{pending}\n{text}" if pending else text
+        if pending.count('"') % 2:
+            if len(pending) > MAX_LINE_BYTES:
+                pending = ""
+                yield start_line, "Line too long"
+            continue
+        record_text, pending = pending, ""
+        if not record_text.strip():
+            continue
+        values = next(csv.reader([record_text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield start_line, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        # Un campo vacío equivale a no enviarlo (se aplican los valores por defecto)
+        yield start_line, {name: value for name, value in zip(header, values) if value != ""}
+    if pending:
+        yield start_line, "Unterminated quoted field"
@@ -0,0 +1,202 @@
+import json
+from datetime import datetime, timedelta
+from typing import Any, Iterable, NamedTuple, Optional, Sequence, Tuple
+
+import msgpack
+
+# Schemas
+from app.schemas import task as task_schema
+
+# Models
+from app.db.models.task import Task as TaskModel
+
+# Campos de la respuesta JSON, en el orden en que task_schema.Task los serializa
+TASK_JSON_FIELDS = tuple(task_schema.Task.model_fields)
+# Columnas a seleccionar para serializar sin pasar por el ORM ni por pydantic
+TASK_JSON_COLUMNS = tuple(getattr(TaskModel, name) for name in TASK_JSON_FIELDS)
+_ID_INDEX = TASK_JSON_FIELDS.index("id")
+_DATETIME_FIELDS = ("created_at", "updated_at")
+_DATETIME_INDEXES = tuple(TASK_JSON_FIELDS.index(field) for field in _DATETIME_FIELDS)
+
+_ZERO = timedelta(0)
+# Mismas opciones que JSONResponse de Starlette
+_encoder = json.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+# Tipos que aceptan las lecturas de tareas en Accept (incluye los nombres previos de MessagePack)
+_ACCEPTED_MEDIA_TYPES = {
+    JSON_MEDIA_TYPE: JSON_MEDIA_TYPE,
+    "*/*": JSON_MEDIA_TYPE,
+    "application/*": JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE: MSGPACK_MEDIA_TYPE,
+    "application/x-msgpack": MSGPACK_MEDIA_TYPE,
+    "application/vnd.msgpack": MSGPACK_MEDIA_TYPE,
+}
+COLUMNAR_LAYOUT = "columnar"
+
+
+class TaskRepresentation(NamedTuple):
+    """
+    Formato de una respuesta de tareas: JSON o MessagePack y, para las listas,
+    por filas (una lista de objetos) o por columnas (un objeto con una lista por
+    campo, que envía cada nombre de campo una sola vez).
+    """
+    media_type: str = JSON_MEDIA_TYPE
+    columnar: bool = False
+
+    @property
+    def content_type(self) -> str:
+        return f"{self.media_type}; layout={COLUMNAR_LAYOUT}" if self.columnar else self.media_type
+
+    @property
+    def cache_key(self) -> str:
+        """Parte de la clave de caché que distingue el formato serializado."""
+        return self.content_type.replace(" ", "")
+
+    @property
+    def single(self) -> "TaskRepresentation":
+        """El formato de una tarea suelta: la disposición por columnas solo aplica a listas."""
+        return self._replace(columnar=False)
+
+
+JSON_REPRESENTATION = TaskRepresentation()
+
+
+def negotiate_representation(accept: Optional[str]) -> TaskRepresentation:
+    """
+    Elige el formato según la cabecera Accept: el tipo soportado con mayor `q` (a
+    igualdad, el primero). `layout=columnar` como parámetro del tipo pide la
+    disposición por columnas. Sin cabecera, o si ningún tipo es soportado, JSON:
+    es el comportamiento que ya tenían los clientes.
+    """
+    if not accept:
+        return JSON_REPRESENTATION
+    best, best_q = JSON_REPRESENTATION, 0.0
+    for media_range in accept.split(","):
+        media_type, *raw_params = media_range.split(";")
+        media_type = _ACCEPTED_MEDIA_TYPES.get(media_type.strip().lower())
+        if media_type is None:
+            continue
+        params = {}
+        for param in raw_params:
+            name, _, value = param.partition("=")
+            params[name.strip().lower()] = value.strip().strip('"').lower()
+        try:
+            quality = float(params.get("q", 1))
+        except ValueError:
+            continue
+        if quality > best_q:
+            best = TaskRepresentation(media_type, params.get("layout") == COLUMNAR_LAYOUT)
+            best_q = quality
+    return best
+
+
+def json_datetime(value: datetime) -> str:
+    """Fecha en el formato de pydantic: ISO 8601 con "Z" para UTC y offset ±HH:MM en otro caso."""
+    offset = value.utcoffset()
+    if offset is None:
+        return value.isoformat()
+    text = value.replace(tzinfo=None).isoformat()
+    if offset == _ZERO:
+        return text + "Z"
+    # pydantic descarta los segundos del offset (conservando el signo)
+    seconds = int(offset.total_seconds())
+    sign = "-" if seconds < 0 else "+"
+    hours, minutes = divmod(abs(seconds) // 60, 60)
+    return f"{text}{sign}{hours:02d}:{minutes:02d}"
+
+
+def _task_dict(row: Sequence[Any]) -> dict:
+    values = list(row)
+    values[_ID_INDEX] = str(values[_ID_INDEX])
+    for index in _DATETIME_INDEXES:
+        values[index] = json_datetime(values[index])
+    return dict(zip(TASK_JSON_FIELDS, values))
+
+
+def _task_columns(rows: Iterable[Sequence[Any]]) -> dict:
+    columns = {field: [] for field in TASK_JSON_FIELDS}
+    appends = [columns[field].append for field in TASK_JSON_FIELDS]
+    for row in rows:
+        for append, value in zip(appends, row):
+            append(value)
+    columns["id"] = [str(task_id) for task_id in columns["id"]]
+    for field in _DATETIME_FIELDS:
+        columns[field] = [json_datetime(value) for value in columns[field]]
+    return columns
+
+
+def _encode(data: Any, representation: TaskRepresentation) -> bytes:
+    if representation.media_type == MSGPACK_MEDIA_TYPE:
+        # Mismos valores que en JSON (ids y fechas como texto): decodificar da lo mismo en ambos formatos
+        return msgpack.packb(data)
+    return _encoder.encode(data).encode()
+
+
+def encode_task(row: Sequence[Any], representation: TaskRepresentation = JSON_REPRESENTATION) -> bytes:
+    """Serializa una fila de TASK_JSON_COLUMNS como un objeto (en JSON, igual que devolver task_schema.Task)."""
+    return _encode(_task_dict(row), representation)
+
+
+def encode_task_list(
+    rows: Iterable[Sequence[Any]], representation: TaskRepresentation = JSON_REPRESENTATION
+) -> bytes:
+    """
+    Serializa filas de TASK_JSON_COLUMNS en el formato pedido. En JSON por filas es
+    byte a byte igual a devolver List[task_schema.Task] desde un endpoint, sin
+    instanciar modelos.
+    """
+    if representation.columnar:
+        return _encode(_task_columns(rows), representation)
+    return _encode([_task_dict(row) for row in rows], representation)
+
+
+def encode_task_ndjson(rows: Iterable[Sequence[Any]]) -> bytes:
+    """Serializa filas de TASK_JSON_COLUMNS como NDJSON (igual que Task.model_dump_json por línea)."""
+    return b"".join(_encoder.encode(_task_dict(row)).encode() + b"\n" for row in rows)
+
+
+def encode_task_changes(
+    rows: Iterable[Sequence[Any]], deleted: Iterable[Tuple[Any, datetime]], next_token: str, has_more: bool,
+    representation: TaskRepresentation = JSON_REPRESENTATION,
+) -> bytes:
+    """
+    Serializa una respuesta de GET /tasks/changes (task_schema.TaskChanges): tareas
+    cambiadas como filas de TASK_JSON_COLUMNS y borradas como pares (id, deleted_at).
+    """
+    data = {
+        "changes": [_task_dict(row) for row in rows],
+        "deleted": [{"id": str(task_id), "deleted_at": json_datetime(deleted_at)} for task_id, deleted_at in deleted],
+        "next_token": next_token,
+        "has_more": has_more,
+    }
+    return _encode(data, representation.single)
+
+
+def task_row(task: Any) -> tuple:
+    """Valores de TASK_JSON_COLUMNS de una instancia del ORM, para serializarla como las filas."""
+    return tuple(getattr(task, field) for field in TASK_JSON_FIELDS)
+
+
+def encode_task_event(
+    event_type: str, version: Optional[int], task_id: Any = None, row: Optional[Sequence[Any]] = None,
+    max_bytes: Optional[int] = None,
+) -> str:
+    """
+    Serializa un evento de cambio de tareas como JSON: tipo, versión del usuario tras
+    la escritura y, si aplica, id y tarea (como en GET /tasks/{id}). Si con la tarea
+    supera `max_bytes` se envía sin ella: el cliente la pide por id.
+    """
+    event = {"type": event_type}
+    if version is not None:
+        event["version"] = version
+    if task_id is not None:
+        event["id"] = str(task_id)
+    if row is not None:
+        event["task"] = _task_dict(row)
+        encoded = _encoder.encode(event)
+        if max_bytes is None or len(encoded.encode()) <= max_bytes:
+            return encoded
+        del event["task"]
+    return _encoder.encode(event)
@@ -1,23 +1,209 @@
 # Imports
+import csv
+import io
+import json
+import sys
+from uuid import UUID
+from datetime import datetime, timedelta, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.exc import SQLAlchemyError
-from fastapi import HTTPException
+from sqlalchemy import BigInteger, Row, bindparam, tuple_, insert, update, delete, func, literal
+from sqlalchemy.dialects import postgresql, sqlite
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
 
 # Schemas
 from app.schemas import task as task_schema
 
 # Models
 from app.db.models.task import Task as TaskModel
+from app.db.models.task_state import UserTaskState
+from app.db.models.task_tombstone import TaskTombstone
+from app.db.models.user import User as UserModel
+from app.db.routing import mark_user_write
+
+# Import
+from app.services.task_import import iter_csv_records, iter_ndjson_records
+from app.services.task_serialization import (
+    JSON_REPRESENTATION, TASK_JSON_COLUMNS, TaskRepresentation, encode_task, encode_task_changes, encode_task_event,
+    encode_task_list, encode_task_ndjson, task_row,
+)
 
 #Core
-from app.core.log import logger
+from app.core import events
+from app.core.config import Settings, settings
+from app.core.cache import CacheBackend, create_cache_backend
+from app.core.log import logger, SAMPLED
+from app.core.ids import uuid7
+from app.core.pagination import encode_cursor, decode_cursor, encode_sync_token, decode_sync_token
+
+# Columnas del CSV exportado (el NDJSON usa el orden de la respuesta JSON)
+EXPORT_COLUMNS = ("id", "title", "description", "status", "created_at", "user_id")
+# Columnas que carga la importación (COPY o INSERT)
+IMPORT_COLUMNS = EXPORT_COLUMNS + ("updated_at",)
+# Filas que se piden al cursor del servidor (y se envían) en cada bloque
+EXPORT_CHUNK_ROWS = 1000
+
+# Caché de lecturas (respuestas ya serializadas, una entrada por formato). Las claves incluyen la versión de las tareas
+# del usuario: cada escritura la incrementa en su propia transacción, así que las
+# entradas anteriores dejan de alcanzarse en el mismo commit (y desaparecen por LRU/TTL).
+# None (sin caché) hasta que create_app llama a init_task_cache
+task_cache: Optional[CacheBackend] = None
+
+
+def init_task_cache(app_settings: Settings):
+    """Crea la caché de lecturas de tareas según la configuración (o la desactiva)."""
+    global task_cache
+    task_cache = create_cache_backend(
+        app_settings.TASK_CACHE_BACKEND,
+        max_entries=app_settings.TASK_CACHE_MAX_ENTRIES,
+        ttl_seconds=app_settings.TASK_CACHE_TTL_SECONDS,
+        url=app_settings.TASK_CACHE_URL,
+        prefix="tasks:",
+        name="tasks",
+    ) if app_settings.TASK_CACHE_ENABLED else None
+
 
 class TaskService:
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.cache = task_cache
+        self.events = events.event_broker
+        # Versión de las tareas del usuario tras la última escritura de este servicio
+        self.version: Optional[int] = None
+
+    def _dialect_name(self) -> str:
+        return self.db.get_bind().dialect.name
+
+    async def get_version(self, user_id: int) -> int:
+        """Versión actual de las tareas del usuario (0 si nunca ha escrito)."""
+        try:
+            result = await self.db.execute(
+                select(UserTaskState.version).filter(UserTaskState.user_id == user_id)
+            )
+            return result.scalar() or 0
+        except SQLAlchemyError as e:
+            logger.error(f"Error fetching task version for user {user_id}: {e}")
+            raise HTTPException(status_code=500, detail="Database error")
 
-    async def get_task(self, task_id: int, user_id: int):
+    async def get_stats(self, user_id: int) -> task_schema.TaskStats:
+        """Contadores de tareas por estado: una lectura por clave primaria, sin recorrer `tasks`."""
+        try:
+            result = await self.db.execute(
+                select(UserTaskState.pending_count, UserTaskState.completed_count)
+                .filter(UserTaskState.user_id == user_id)
+            )
+            row = result.first()
+        except SQLAlchemyError as e:
+            logger.error(f"Error fetching task stats for user {user_id}: {e}")
+            raise HTTPException(status_code=500, detail="Database error")
+        pending, completed = (row.pending_count, row.completed_count) if row else (0, 0)
+        return task_schema.TaskStats(pending=pending, completed=completed, total=pending + completed)
+
+    @staticmethod
+    def _status_deltas(added=(), removed=()) -> Dict[str, int]:
+        """Variación de los contadores por estado a partir de los estados añadidos y quitados."""
+        deltas = {status_value.value: 0 for status_value in task_schema.StatusEnum}
+        for task_status in added:
+            deltas[task_schema.StatusEnum(task_status).value] += 1
+        for task_status in removed:
+            deltas[task_schema.StatusEnum(task_status).value] -= 1
+        return deltas
+
+    async def _bump_version(
+        self, user_id: int, expected_version: Optional[int] = None,
+        deltas: Optional[Dict[str, int]] = None,
+    ) -> int:
+        """
+        Registra una escritura en el estado del usuario dentro de la transacción actual:
+        incrementa la versión y aplica `deltas` a los contadores por estado (un solo UPSERT).
+
+        Con `expected_version` el incremento es condicional (concurrencia optimista):
+        si otra escritura ya cambió la versión se deshace la transacción y se lanza 412.
+        Se ejecuta después de escribir las tareas: todas las escrituras bloquean primero
+        las filas de tareas (en orden de id) y por último la fila de estado, así que
+        dos transacciones concurrentes nunca se bloquean en orden inverso.
+
+        La fila de estado sale de la del usuario si no está eliminado, con FOR SHARE: una
+        cuenta aún en la caché de autenticación de otro worker no puede escribir tras
+        DELETE /users/me (que la bloquea con FOR UPDATE), y la purga no deja filas atrás.
+        """
+        deltas = deltas or {}
+        pending_delta = deltas.get("pending", 0)
+        completed_delta = deltas.get("completed", 0)
+        dialect_insert = postgresql.insert if self._dialect_name() == "postgresql" else sqlite.insert
+        active_user = (
+            select(
+                UserModel.id, literal(1, BigInteger), literal(pending_delta, BigInteger),
+                literal(completed_delta, BigInteger),
+            )
+            .where(UserModel.id == user_id, UserModel.deleted_at.is_(None))
+            .with_for_update(read=True)
+        )
+        stmt = dialect_insert(UserTaskState).from_select(
+            ["user_id", "version", "pending_count", "completed_count"], active_user
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserTaskState.user_id],
+            set_={
+                "version": UserTaskState.version + 1,
+                "pending_count": UserTaskState.pending_count + pending_delta,
+                "completed_count": UserTaskState.completed_count + completed_delta,
+            },
+            where=(UserTaskState.version == expected_version) if expected_version is not None else None,
+        ).returning(UserTaskState.version)
+        new_version = (await self.db.execute(stmt)).scalar()
+        if new_version is None and await self._account_deleted(user_id):
+            await self.db.rollback()
+            logger.warning(f"Write rejected for deleted account {user_id}")
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        if expected_version is not None and new_version != expected_version + 1:
+            await self.db.rollback()
+            logger.warning(f"Task version conflict for user {user_id}: expected {expected_version}")
+            raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Precondition failed")
+        # Tras el commit, las lecturas del usuario irán al primario durante un tiempo
+        mark_user_write(self.db, user_id)
+        self.version = new_version
+        return new_version
+
+    async def _account_deleted(self, user_id: int) -> bool:
+        """True si la cuenta ya no existe o está eliminada (pendiente de purga)."""
+        active = await self.db.scalar(
+            select(UserModel.id).where(UserModel.id == user_id, UserModel.deleted_at.is_(None))
+        )
+        return active is None
+
+    async def _publish(self, user_id: int, event_type: str, tasks: Iterable[Any] = (), task_ids: Iterable[Any] = ()):
+        """
+        Publica los eventos de la escritura en curso (tras _bump_version, con su versión):
+        uno por tarea en `tasks` (instancias del ORM) y uno por id en `task_ids`. Se
+        entregan a las conexiones del usuario solo si la transacción hace commit.
+        """
+        max_bytes = self.events.max_payload_bytes
+        payloads = [
+            encode_task_event(event_type, self.version, task.id, task_row(task), max_bytes=max_bytes)
+            for task in tasks
+        ]
+        payloads.extend(encode_task_event(event_type, self.version, task_id) for task_id in task_ids)
+        if payloads:
+            await self.events.publish(self.db, user_id, payloads)
+
+    async def _record_deletions(self, user_id: int, task_ids: Iterable[UUID]):
+        """
+        Deja constancia de las tareas borradas en la transacción actual para GET /tasks/changes
+        (se ejecuta tras el DELETE, antes de _bump_version: mismo orden de bloqueos).
+        """
+        rows = [{"task_id": task_id, "user_id": user_id} for task_id in task_ids]
+        if rows:
+            await self.db.execute(insert(TaskTombstone).values(rows))
+
+    async def get_task(self, task_id: UUID, user_id: int):
         """Obtiene una tarea específica por su ID."""
         try:
             result = await self.db.execute(
@@ -32,29 +218,245 @@ class TaskService:
             logger.error(f"Error fetching task {task_id}: {e}")
             raise HTTPException(status_code=500, detail="Database error")
 
-    async def get_tasks(self, user_id: int, skip: int = 0, limit: int = 100):
-        """Obtiene una lista paginada de tareas para un usuario específico."""
+    async def get_task_body(
+        self, task_id: UUID, user_id: int, version: int,
+        representation: TaskRepresentation = JSON_REPRESENTATION,
+    ) -> bytes:
+        """
+        Una tarea serializada en `representation`, servida desde la caché si existe
+        para la versión actual (`version`, la misma que el ETag de la respuesta).
+        """
+        representation = representation.single
+        key = f"task:{user_id}:{version}:{representation.cache_key}:{task_id}"
+        if self.cache is not None:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                return cached
         try:
             result = await self.db.execute(
-                select(TaskModel)
-                .filter(TaskModel.user_id == user_id)
-                .offset(skip)
-                .limit(limit)
+                select(*TASK_JSON_COLUMNS).filter(TaskModel.id == task_id, TaskModel.user_id == user_id)
             )
-            tasks = result.scalars().all()
-            logger.info(f"Fetched {len(tasks)} tasks for user {user_id}")
-            return tasks
+            row = result.first()
+        except SQLAlchemyError as e:
+            logger.error(f"Error fetching task {task_id}: {e}")
+            raise HTTPException(status_code=500, detail="Database error")
+        if row is None:
+            logger.warning(f"Task {task_id} not found for user {user_id}")
+            raise HTTPException(status_code=404, detail="Task not found")
+        body = encode_task(row, representation)
+        if self.cache is not None:
+            await self.cache.set(key, body)
+        return body
+
+    def _sort_column(self, field: str):
+        """Columna de orden; en PostgreSQL el título se compara por bytes (COLLATE "C", como SQLite)."""
+        if field == "title":
+            return TaskModel.title.collate("C") if self._dialect_name() == "postgresql" else TaskModel.title
+        return TaskModel.created_at
+
+    @staticmethod
+    def _as_utc(value: datetime) -> datetime:
+        """Normaliza un filtro de fecha a UTC (sin zona se asume UTC)."""
+        return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+    @staticmethod
+    def _prefix_upper_bound(prefix: str) -> Optional[str]:
+        """
+        Menor cadena mayor que todas las que empiezan por `prefix` (orden por puntos de
+        código): el prefijo con su último carácter incrementado. Los U+10FFFF finales no
+        se pueden incrementar y se acarrean al carácter anterior; si todos lo son, no
+        hay cota superior (None).
+        """
+        stem = prefix.rstrip(chr(sys.maxunicode))
+        if not stem:
+            return None
+        next_code_point = ord(stem[-1]) + 1
+        if 0xD800 <= next_code_point <= 0xDFFF:
+            # Los sustitutos no se pueden codificar en UTF-8: el siguiente carácter válido es U+E000
+            next_code_point = 0xE000
+        return stem[:-1] + chr(next_code_point)
+
+    async def get_tasks(
+        self, user_id: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+        status_filter: Optional[task_schema.StatusEnum] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        title_prefix: Optional[str] = None,
+        sort: task_schema.TaskSortEnum = task_schema.TaskSortEnum.created_at,
+    ) -> Tuple[List[Row], Optional[str]]:
+        """
+        Obtiene una página de tareas de un usuario, filtrada y ordenada por (`sort`, id).
+
+        Con `cursor` se usa paginación por keyset (coste constante sin importar la
+        profundidad de la página); sin él se mantiene el OFFSET `skip` heredado.
+        Cada combinación de filtros y orden tiene un índice compuesto que empieza por
+        user_id. Devuelve las tareas y el cursor de la página siguiente (None si no hay más).
+
+        Las tareas son filas con TASK_JSON_COLUMNS, no instancias del ORM: se
+        serializan directamente con task_serialization.encode_task_list.
+        """
+        sort = task_schema.TaskSortEnum(sort).value
+        field, descending = sort.lstrip("-"), sort.startswith("-")
+        sort_column = self._sort_column(field)
+
+        query = select(*TASK_JSON_COLUMNS).filter(TaskModel.user_id == user_id)
+        if status_filter is not None:
+            query = query.filter(TaskModel.status == task_schema.StatusEnum(status_filter).value)
+        if created_after is not None:
+            query = query.filter(TaskModel.created_at > self._as_utc(created_after))
+        if created_before is not None:
+            query = query.filter(TaskModel.created_at < self._as_utc(created_before))
+        if title_prefix:
+            # Rango [prefijo, siguiente prefijo): usa el índice, a diferencia de LIKE
+            title_column = self._sort_column("title")
+            query = query.filter(title_column >= title_prefix)
+            upper_bound = self._prefix_upper_bound(title_prefix)
+            if upper_bound is not None:
+                query = query.filter(title_column < upper_bound)
+
+        if descending:
+            query = query.order_by(sort_column.desc(), TaskModel.id.desc())
+        else:
+            query = query.order_by(sort_column, TaskModel.id)
+        if cursor is not None:
+            value, task_id = decode_cursor(cursor, sort)
+            position = tuple_(sort_column, TaskModel.id)
+            after = tuple_(value, task_id)
+            query = query.filter(position < after if descending else position > after)
+        elif skip:
+            query = query.offset(skip)
+        try:
+            # Se pide una fila extra para saber si existe una página siguiente
+            result = await self.db.execute(query.limit(limit + 1))
+            tasks = result.all()
+            next_cursor = None
+            if len(tasks) > limit:
+                tasks = tasks[:limit]
+                next_cursor = encode_cursor(sort, getattr(tasks[-1], field), tasks[-1].id)
+            logger.info(f"Fetched {len(tasks)} tasks for user {user_id}", extra=SAMPLED)
+            return tasks, next_cursor
         except SQLAlchemyError as e:
             logger.error(f"Error fetching tasks for user {user_id}: {e}")
             raise HTTPException(status_code=500, detail="Database error")
 
+    async def get_tasks_page(
+        self, user_id: int, version: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+        status_filter: Optional[task_schema.StatusEnum] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        title_prefix: Optional[str] = None,
+        sort: task_schema.TaskSortEnum = task_schema.TaskSortEnum.created_at,
+        representation: TaskRepresentation = JSON_REPRESENTATION,
+    ) -> Tuple[bytes, Optional[str]]:
+        """
+        Página de tareas serializada en `representation` y cursor siguiente (ver
+        get_tasks). Solo la primera página de cada combinación de filtros se guarda
+        en caché.
+        """
+        filters = dict(
+            status_filter=status_filter, created_after=created_after, created_before=created_before,
+            title_prefix=title_prefix, sort=sort,
+        )
+        key = None
+        if self.cache is not None and cursor is None and not skip:
+            params = [
+                task_schema.StatusEnum(status_filter).value if status_filter is not None else None,
+                self._as_utc(created_after).isoformat() if created_after is not None else None,
+                self._as_utc(created_before).isoformat() if created_before is not None else None,
+                title_prefix, task_schema.TaskSortEnum(sort).value, limit,
+            ]
+            key = f"list:{user_id}:{version}:{representation.cache_key}:{json.dumps(params, separators=(',', ':'))}"
+            cached = await self.cache.get(key)
+            if cached is not None:
+                next_cursor, body = cached.split(b"\n", 1)
+                return body, next_cursor.decode() or None
+        tasks, next_cursor = await self.get_tasks(
+            user_id=user_id, skip=skip, limit=limit, cursor=cursor, **filters
+        )
+        body = encode_task_list(tasks, representation)
+        if key is not None:
+            # El cursor (base64url) nunca contiene saltos de línea
+            await self.cache.set(key, (next_cursor or "").encode() + b"\n" + body)
+        return body, next_cursor
+
+    async def get_changes(
+        self, user_id: int, since: Optional[str] = None, limit: int = 500,
+        representation: TaskRepresentation = JSON_REPRESENTATION,
+    ) -> bytes:
+        """
+        Cambios en las tareas del usuario desde el token `since` (sin él, todas las
+        tareas): las creadas o modificadas y las borradas, en orden de (fecha del
+        cambio, id), hasta `limit` en total. Devuelve la respuesta serializada con el
+        token de la siguiente llamada y has_more si quedan cambios por leer.
+
+        Las tareas se leen por el índice (user_id, updated_at, id) y los borrados por
+        (user_id, deleted_at, task_id): el coste depende de lo que cambió, no del
+        total de tareas. Un token anterior a TASK_SYNC_WINDOW_DAYS recibe 410, porque
+        sus borrados pueden estar ya compactados.
+        """
+        now = datetime.now(timezone.utc)
+        # Lo anterior a este instante se da por visible (ver TASK_SYNC_SAFETY_SECONDS)
+        settled = now - timedelta(seconds=settings.TASK_SYNC_SAFETY_SECONDS)
+        if since is None:
+            # Sincronización inicial: el cliente no tiene tareas, solo le sirven los borrados posteriores
+            position, floor = None, settled
+        else:
+            (position_at, position_id), floor = decode_sync_token(since)
+            position, floor = (self._as_utc(position_at), position_id), self._as_utc(floor)
+            if max(position[0], floor) < now - timedelta(days=settings.TASK_SYNC_WINDOW_DAYS):
+                logger.warning(f"Expired sync token for user {user_id}")
+                raise HTTPException(status_code=status.HTTP_410_GONE, detail="Sync token expired")
+
+        task_query = select(*TASK_JSON_COLUMNS).filter(TaskModel.user_id == user_id)
+        deleted_query = select(TaskTombstone.task_id, TaskTombstone.deleted_at).filter(
+            TaskTombstone.user_id == user_id, TaskTombstone.deleted_at > floor
+        )
+        if position is not None:
+            task_query = task_query.filter(tuple_(TaskModel.updated_at, TaskModel.id) > tuple_(*position))
+            deleted_query = deleted_query.filter(
+                tuple_(TaskTombstone.deleted_at, TaskTombstone.task_id) > tuple_(*position)
+            )
+        try:
+            # Una fila extra de cada lado basta para saber si hay más tras mezclar ambos
+            tasks = (await self.db.execute(
+                task_query.order_by(TaskModel.updated_at, TaskModel.id).limit(limit + 1)
+            )).all()
+            deletions = (await self.db.execute(
+                deleted_query.order_by(TaskTombstone.deleted_at, TaskTombstone.task_id).limit(limit + 1)
+            )).all()
+        except SQLAlchemyError as e:
+            logger.error(f"Error fetching task changes for user {user_id}: {e}")
+            raise HTTPException(status_code=500, detail="Database error")
+
+        merged = sorted(
+            [((self._as_utc(row.updated_at), row.id), row) for row in tasks]
+            + [((self._as_utc(row.deleted_at), row.task_id), None) for row in deletions],
+            key=lambda item: item[0],
+        )
+        has_more = len(merged) > limit
+        merged = merged[:limit]
+        # Sin más cambios, el siguiente token vuelve al margen de seguridad: lo que se
+        # repita al final de la ventana es idempotente, lo que se salte no
+        next_position = merged[-1][0] if has_more else (settled, UUID(int=0))
+        changes = [row for _, row in merged if row is not None]
+        deleted = [(task_id, deleted_at) for (deleted_at, task_id), row in merged if row is None]
+        logger.info(
+            f"Fetched {len(changes)} changed and {len(deleted)} deleted tasks for user {user_id}", extra=SAMPLED
+        )
+        return encode_task_changes(
+            changes, deleted, encode_sync_token(next_position, floor), has_more, representation
+        )
+
     async def create_user_task(self, task: task_schema.TaskCreate, user_id: int):
-        """Crea una nueva tarea asociada a un usuario."""
+        """Crea una nueva tarea asociada a un usuario (INSERT ... RETURNING)."""
         try:
-            db_task = TaskModel(**task.model_dump(), user_id=user_id)
-            self.db.add(db_task)
+            created = await self.db.scalars(
+                insert(TaskModel).returning(TaskModel), [{**task.model_dump(), "user_id": user_id}]
+            )
+            db_task = created.one()
+            await self._bump_version(user_id, deltas=self._status_deltas(added=[db_task.status]))
+            await self._publish(user_id, "created", tasks=[db_task])
             await self.db.commit()
-            await self.db.refresh(db_task)
             logger.info(f"Task {db_task.id} created for user {user_id}")
             return db_task
         except SQLAlchemyError as e:
@@ -62,15 +464,44 @@ class TaskService:
             logger.error(f"Error creating task for user {user_id}: {e}")
             raise HTTPException(status_code=500, detail="Database error")
 
-    async def update_task(self, task_id: int, user_id: int, task_update: task_schema.TaskUpdate):
-        """Actualiza los datos de una tarea existente."""
-        try:
+    async def update_task(
+        self, task_id: UUID, user_id: int, task_update: task_schema.TaskUpdate,
+        expected_version: Optional[int] = None,
+    ):
+        """Actualiza los datos de una tarea existente (UPDATE ... RETURNING)."""
+        update_data = task_update.model_dump(exclude_unset=True)
+        if not update_data:
+            # Nada que escribir: la versión no cambia, pero If-Match se comprueba igual y
+            # la respuesta lleva el ETag actual (versión leída antes que la tarea)
+            version = await self.get_version(user_id)
+            if expected_version is not None and version != expected_version:
+                logger.warning(f"Task version conflict for user {user_id}: expected {expected_version}")
+                raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Precondition failed")
             db_task = await self.get_task(task_id, user_id)
-            update_data = task_update.model_dump(exclude_unset=True)
-            for key, value in update_data.items():
-                setattr(db_task, key, value)
+            self.version = version
+            return db_task
+        try:
+            deltas = None
+            if "status" in update_data:
+                db_task, old_status = await self._update_task_returning_old_status(task_id, user_id, update_data)
+                if db_task is not None:
+                    deltas = self._status_deltas(added=[db_task.status], removed=[old_status])
+            else:
+                result = await self.db.execute(
+                    update(TaskModel)
+                    .where(TaskModel.id == task_id, TaskModel.user_id == user_id)
+                    .values(**update_data)
+                    .returning(TaskModel)
+                    .execution_options(synchronize_session=False)
+                )
+                db_task = result.scalars().first()
+            if db_task is None:
+                await self.db.rollback()
+                logger.warning(f"Task {task_id} not found for user {user_id}")
+                raise HTTPException(status_code=404, detail="Task not found")
+            await self._bump_version(user_id, expected_version, deltas)
+            await self._publish(user_id, "updated", tasks=[db_task])
             await self.db.commit()
-            await self.db.refresh(db_task)
             logger.info(f"Task {task_id} updated for user {user_id}")
             return db_task
         except SQLAlchemyError as e:
@@ -78,11 +509,58 @@ class TaskService:
             logger.error(f"Error updating task {task_id} for user {user_id}: {e}")
             raise HTTPException(status_code=500, detail="Database error")
 
-    async def delete_task(self, task_id: int, user_id: int):
-        """Elimina una tarea de la base de datos."""
+    async def _update_task_returning_old_status(
+        self, task_id: UUID, user_id: int, update_data: Dict[str, Any]
+    ) -> Tuple[Optional[TaskModel], Any]:
+        """
+        Actualiza la tarea y devuelve también el estado que tenía, con la fila bloqueada
+        entre la lectura y la escritura: otra transacción no puede cambiar el estado en
+        medio y descuadrar los contadores. (None, None) si la tarea no existe.
+        """
+        locked = (
+            select(TaskModel.id, TaskModel.status)
+            .where(TaskModel.id == task_id, TaskModel.user_id == user_id)
+            .with_for_update()
+        )
+        statement = (
+            update(TaskModel)
+            .where(TaskModel.id == task_id, TaskModel.user_id == user_id)
+            .values(**update_data)
+            .execution_options(synchronize_session=False)
+        )
+        if self._dialect_name() == "postgresql":
+            # Una sola sentencia: WITH old AS (SELECT ... FOR UPDATE) UPDATE ... RETURNING old.status
+            old = locked.cte("old")
+            result = await self.db.execute(
+                statement.where(TaskModel.id == old.c.id).returning(TaskModel, old.c.status)
+            )
+            row = result.first()
+            return (row[0], row[1]) if row is not None else (None, None)
+        # SQLite no admite columnas de FROM en RETURNING ni FOR UPDATE: lectura y UPDATE
+        # en la misma transacción, que falla (SQLITE_BUSY) si otra escribió entre ambas
+        previous = (await self.db.execute(locked)).first()
+        if previous is None:
+            return None, None
+        result = await self.db.execute(statement.returning(TaskModel))
+        return result.scalars().first(), previous.status
+
+    async def delete_task(self, task_id: UUID, user_id: int, expected_version: Optional[int] = None):
+        """Elimina una tarea de la base de datos (DELETE ... RETURNING)."""
         try:
-            db_task = await self.get_task(task_id, user_id)
-            await self.db.delete(db_task)
+            result = await self.db.execute(
+                delete(TaskModel)
+                .where(TaskModel.id == task_id, TaskModel.user_id == user_id)
+                .returning(TaskModel)
+                .execution_options(synchronize_session=False)
+            )
+            db_task = result.scalars().first()
+            if db_task is None:
+                await self.db.rollback()
+                logger.warning(f"Task {task_id} not found for user {user_id}")
+                raise HTTPException(status_code=404, detail="Task not found")
+            await self._record_deletions(user_id, [db_task.id])
+            await self._bump_version(user_id, expected_version, self._status_deltas(removed=[db_task.status]))
+            await self._publish(user_id, "deleted", task_ids=[db_task.id])
             await self.db.commit()
             logger.info(f"Task {task_id} deleted for user {user_id}")
             return db_task
@@ -90,3 +568,435 @@ class TaskService:
             await self.db.rollback()
             logger.error(f"Error deleting task {task_id} for user {user_id}: {e}")
             raise HTTPException(status_code=500, detail="Database error")
+
+    def _check_batch_size(self, size: int):
+        """Rechaza lotes vacíos o mayores que el máximo configurado."""
+        if size == 0:
+            raise HTTPException(status_code=422, detail="Batch must contain at least one item")
+        if size > settings.TASK_BULK_MAX_ITEMS:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Batch size exceeds maximum of {settings.TASK_BULK_MAX_ITEMS}",
+            )
+
+    @staticmethod
+    def _validation_message(error: ValidationError) -> str:
+        """Resume el primer error de validación de un elemento."""
+        first = error.errors()[0]
+        location = ".".join(str(part) for part in first["loc"])
+        return f"{location}: {first['msg']}" if location else first["msg"]
+
+    @staticmethod
+    def _column_error(values: Dict[str, Any]) -> Optional[str]:
+        """
+        Error de un elemento que el esquema acepta pero la tabla no (título o estado
+        nulos, título más largo que la columna). Se informa por elemento: si llegara a
+        la base de datos, un solo elemento haría fallar el lote entero.
+        """
+        for field in ("title", "status"):
+            if field in values and values[field] is None:
+                return f"{field}: Field cannot be null"
+        title_max_length = TaskModel.title.type.length
+        if values.get("title") is not None and len(values["title"]) > title_max_length:
+            return f"title: String should have at most {title_max_length} characters"
+        return None
+
+    @staticmethod
+    def _bulk_result(results: List[task_schema.TaskBulkItemResult]) -> task_schema.TaskBulkResult:
+        succeeded = sum(1 for result in results if result.success)
+        return task_schema.TaskBulkResult(
+            succeeded=succeeded, failed=len(results) - succeeded, results=results
+        )
+
+    async def bulk_create_tasks(self, items: List[Dict[str, Any]], user_id: int):
+        """Crea varias tareas con un único INSERT multi-fila y un solo commit."""
+        self._check_batch_size(len(items))
+        results: List[Optional[task_schema.TaskBulkItemResult]] = [None] * len(items)
+        rows, row_indexes = [], []
+        for index, item in enumerate(items):
+            try:
+                task = task_schema.TaskCreate.model_validate(item)
+            except ValidationError as e:
+                results[index] = task_schema.TaskBulkItemResult(
+                    index=index, success=False, error=self._validation_message(e)
+                )
+                continue
+            error = self._column_error(task.model_dump())
+            if error is not None:
+                results[index] = task_schema.TaskBulkItemResult(index=index, success=False, error=error)
+                continue
+            rows.append({**task.model_dump(), "user_id": user_id})
+            row_indexes.append(index)
+        try:
+            if rows:
+                created = await self.db.scalars(
+                    insert(TaskModel).returning(TaskModel, sort_by_parameter_order=True), rows
+                )
+                created_tasks = created.all()
+                for index, db_task in zip(row_indexes, created_tasks):
+                    results[index] = task_schema.TaskBulkItemResult(
+                        index=index, success=True, id=str(db_task.id),
+                        task=task_schema.Task.model_validate(db_task),
+                    )
+                await self._bump_version(
+                    user_id, deltas=self._status_deltas(added=[db_task.status for db_task in created_tasks])
+                )
+                await self._publish(user_id, "created", tasks=created_tasks)
+                await self.db.commit()
+            logger.info(f"Bulk created {len(rows)} of {len(items)} tasks for user {user_id}")
+            return self._bulk_result(results)
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logger.error(f"Error bulk creating tasks for user {user_id}: {e}")
+            raise HTTPException(status_code=500, detail="Database error")
+
+    async def bulk_update_tasks(self, items: List[Dict[str, Any]], user_id: int):
+        """
+        Actualiza varias tareas en una sola transacción, con escrituras por conjuntos.
+
+        Un SELECT ... FOR UPDATE (en orden de id) bloquea las tareas del usuario y da
+        su estado previo; después va un UPDATE por cada conjunto de columnas cambiadas,
+        en un executemany. Ni asyncpg ni aiosqlite admiten RETURNING en un executemany,
+        así que las tareas devueltas se componen con la fila bloqueada y lo escrito
+        (updated_at se fija aquí, igual para todo el lote).
+        """
+        self._check_batch_size(len(items))
+        results: List[Optional[task_schema.TaskBulkItemResult]] = [None] * len(items)
+        updates = []
+        for index, item in enumerate(items):
+            try:
+                task_update = task_schema.TaskBulkUpdateItem.model_validate(item)
+            except ValidationError as e:
+                task_id = item.get("id")
+                results[index] = task_schema.TaskBulkItemResult(
+                    index=index, success=False, id=task_id if isinstance(task_id, str) else None,
+                    error=self._validation_message(e),
+                )
+                continue
+            error = self._column_error(task_update.model_dump(exclude_unset=True))
+            if error is not None:
+                results[index] = task_schema.TaskBulkItemResult(
+                    index=index, success=False, id=str(task_update.id), error=error
+                )
+                continue
+            updates.append((index, task_update))
+        try:
+            if updates:
+                result = await self.db.execute(
+                    select(TaskModel.__table__)
+                    .where(
+                        TaskModel.user_id == user_id,
+                        TaskModel.id.in_({task_update.id for _, task_update in updates}),
+                    )
+                    .order_by(TaskModel.id)
+                    .with_for_update()
+                )
+                previous = {row.id: row for row in result.all()}
+                # Cambios por tarea en el orden del lote: si un id se repite, gana el último valor
+                changes: Dict[UUID, Dict[str, Any]] = {}
+                for index, task_update in updates:
+                    if task_update.id not in previous:
+                        results[index] = task_schema.TaskBulkItemResult(
+                            index=index, success=False, id=str(task_update.id), error="Task not found"
+                        )
+                        continue
+                    changes.setdefault(task_update.id, {}).update(
+                        task_update.model_dump(mode="json", exclude_unset=True, exclude={"id"})
+                    )
+                now = datetime.now(timezone.utc)
+                groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+                # Un elemento sin campos no escribe nada (como un PUT vacío)
+                changes = {task_id: values for task_id, values in changes.items() if values}
+                for task_id, values in changes.items():
+                    groups.setdefault(tuple(sorted(values)), []).append(
+                        {**values, "updated_at": now, "task_id": task_id}
+                    )
+                tasks_table = TaskModel.__table__
+                for params in groups.values():
+                    await self.db.execute(
+                        update(tasks_table).where(
+                            tasks_table.c.user_id == user_id, tasks_table.c.id == bindparam("task_id")
+                        ),
+                        params,
+                    )
+                # Instancias sin sesión, solo para serializar la respuesta y los eventos
+                updated = {
+                    task_id: TaskModel(**{**previous[task_id]._mapping, **values, "updated_at": now})
+                    for task_id, values in changes.items()
+                }
+                for index, task_update in updates:
+                    if results[index] is None:
+                        results[index] = task_schema.TaskBulkItemResult(
+                            index=index, success=True, id=str(task_update.id),
+                            task=task_schema.Task.model_validate(
+                                updated.get(task_update.id) or previous[task_update.id]._mapping
+                            ),
+                        )
+                # Sin tareas cambiadas no hay escritura: la versión (y los ETag y la caché) no cambia
+                if updated:
+                    await self._bump_version(user_id, deltas=self._status_deltas(
+                        added=[db_task.status for db_task in updated.values()],
+                        removed=[previous[task_id].status for task_id in updated],
+                    ))
+                    await self._publish(user_id, "updated", tasks=updated.values())
+                await self.db.commit()
+            bulk_result = self._bulk_result(results)
+            logger.info(f"Bulk updated {bulk_result.succeeded} of {len(items)} tasks for user {user_id}")
+            return bulk_result
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logger.error(f"Error bulk updating tasks for user {user_id}: {e}")
+            raise HTTPException(status_code=500, detail="Database error")
+
+    @staticmethod
+    def _parse_task_id(task_id: str) -> Optional[UUID]:
+        """UUID de un id recibido como texto; None si está mal formado (no puede existir)."""
+        try:
+            return UUID(task_id)
+        except ValueError:
+            return None
+
+    async def bulk_delete_tasks(self, task_ids: List[str], user_id: int):
+        """
+        Elimina varias tareas con un único DELETE ... IN ... RETURNING.
+
+        Los ids mal formados se informan como no encontrados sin llegar a la base de datos.
+        """
+        self._check_batch_size(len(task_ids))
+        parsed_ids = [self._parse_task_id(task_id) for task_id in task_ids]
+        try:
+            result = await self.db.execute(
+                delete(TaskModel)
+                .where(TaskModel.user_id == user_id, TaskModel.id.in_({i for i in parsed_ids if i is not None}))
+                .returning(TaskModel.id, TaskModel.status)
+                .execution_options(synchronize_session=False)
+            )
+            deleted_rows = result.all()
+            deleted = {row.id for row in deleted_rows}
+            # Sin filas borradas no hay escritura: la versión (y los ETag y la caché) no cambia
+            if deleted_rows:
+                await self._record_deletions(user_id, [row.id for row in deleted_rows])
+                await self._bump_version(
+                    user_id, deltas=self._status_deltas(removed=[row.status for row in deleted_rows])
+                )
+                await self._publish(user_id, "deleted", task_ids=[row.id for row in deleted_rows])
+            await self.db.commit()
+            results = [
+                task_schema.TaskBulkItemResult(index=index, success=True, id=task_id)
+                if parsed_id in deleted
+                else task_schema.TaskBulkItemResult(index=index, success=False, id=task_id, error="Task not found")
+                for index, (task_id, parsed_id) in enumerate(zip(task_ids, parsed_ids))
+            ]
+            logger.info(f"Bulk deleted {len(deleted)} of {len(task_ids)} tasks for user {user_id}")
+            return self._bulk_result(results)
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logger.error(f"Error bulk deleting tasks for user {user_id}: {e}")
+            raise HTTPException(status_code=500, detail="Database error")
+
+    async def export_tasks(self, user_id: int, export_format: str = "ndjson") -> AsyncIterator[bytes]:
+        """
+        Genera todas las tareas del usuario como NDJSON o CSV, bloque a bloque.
+
+        Las filas se leen de un cursor del lado del servidor (`AsyncSession.stream`),
+        así que la memoria usada no depende del número de tareas.
+        """
+        columns = (
+            [getattr(TaskModel, column) for column in EXPORT_COLUMNS] if export_format == "csv" else TASK_JSON_COLUMNS
+        )
+        query = (
+            select(*columns)
+            .filter(TaskModel.user_id == user_id)
+            .order_by(TaskModel.created_at, TaskModel.id)
+            .execution_options(yield_per=EXPORT_CHUNK_ROWS)
+        )
+        exported = 0
+        try:
+            result = await self.db.stream(query)
+            if export_format == "csv":
+                yield (",".join(EXPORT_COLUMNS) + "\r\n").encode()
+            async for rows in result.partitions():
+                exported += len(rows)
+                if export_format == "csv":
+                    buffer = io.StringIO()
+                    writer = csv.writer(buffer)
+                    writer.writerows(
+                        (task_id, title, description or "", task_status, created_at.isoformat(), owner_id)
+                        for task_id, title, description, task_status, created_at, owner_id in rows
+                    )
+                    yield buffer.getvalue().encode()
+                else:
+                    yield encode_task_ndjson(rows)
+            logger.info(f"Exported {exported} tasks for user {user_id} as {export_format}")
+        except SQLAlchemyError as e:
+            # La respuesta ya empezó: solo se puede registrar y cortar el stream
+            logger.error(f"Error exporting tasks for user {user_id} after {exported} rows: {e}")
+            raise
+
+    async def _load_import_chunk(self, rows: List[tuple]):
+        """Carga un bloque de filas ya validadas: COPY en PostgreSQL, executemany en otros motores."""
+        if self._dialect_name() == "postgresql":
+            connection = await self.db.connection()
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(
+                TaskModel.__tablename__, records=rows, columns=list(IMPORT_COLUMNS)
+            )
+        else:
+            await self.db.execute(
+                insert(TaskModel.__table__), [dict(zip(IMPORT_COLUMNS, row)) for row in rows]
+            )
+
+    async def import_tasks(self, chunks: AsyncIterator[bytes], user_id: int, import_format: str = "ndjson"):
+        """
+        Importa tareas desde un flujo NDJSON o CSV sin tenerlo entero en memoria.
+
+        Las filas se validan contra TaskCreate y se cargan en bloques de
+        TASK_IMPORT_CHUNK_ROWS, cada uno en su propia transacción. Una fila inválida
+        se rechaza sin afectar al resto. La respuesta detalla como mucho
+        TASK_IMPORT_MAX_REPORTED_CHUNKS bloques y TASK_IMPORT_MAX_REPORTED_ERRORS
+        filas rechazadas, para que su tamaño no crezca con el del fichero.
+        """
+        records = iter_csv_records(chunks) if import_format == "csv" else iter_ndjson_records(chunks)
+        chunk_size = settings.TASK_IMPORT_CHUNK_ROWS
+        result = task_schema.TaskImportResult(accepted=0, rejected=0, chunks=[], rejected_rows=[])
+        rows: List[tuple] = []
+        chunk_rejected = 0
+        chunk_number = 0
+
+        def reject(line_number: int, error: str):
+            nonlocal chunk_rejected
+            chunk_rejected += 1
+            result.rejected += 1
+            if len(result.rejected_rows) < settings.TASK_IMPORT_MAX_REPORTED_ERRORS:
+                result.rejected_rows.append(task_schema.TaskImportRejectedRow(line=line_number, error=error))
+            else:
+                result.truncated = True
+
+        async def flush():
+            nonlocal rows, chunk_rejected, chunk_number
+            if rows:
+                await self._load_import_chunk(rows)
+                await self._bump_version(user_id, deltas=self._status_deltas(added=[row[3] for row in rows]))
+                # Un bloque puede tener miles de filas: un solo evento para volver a leer la lista
+                await self.events.publish(self.db, user_id, [encode_task_event("resync", self.version)])
+                await self.db.commit()
+            result.accepted += len(rows)
+            chunk_number += 1
+            if len(result.chunks) < settings.TASK_IMPORT_MAX_REPORTED_CHUNKS:
+                result.chunks.append(task_schema.TaskImportChunk(
+                    chunk=chunk_number, accepted=len(rows), rejected=chunk_rejected
+                ))
+            else:
+                result.truncated = True
+            logger.info(
+                f"Imported chunk {chunk_number} for user {user_id}: "
+                f"{len(rows)} accepted, {chunk_rejected} rejected ({result.accepted} total)"
+            )
+            rows, chunk_rejected = [], 0
+
+        try:
+            async for line_number, record in records:
+                error = record if isinstance(record, str) else None
+                if error is None:
+                    try:
+                        task = task_schema.TaskCreate.model_validate(record)
+                        error = self._column_error(task.model_dump())
+                    except ValidationError as e:
+                        error = self._validation_message(e)
+                if error is not None:
+                    reject(line_number, error)
+                else:
+                    now = datetime.now(timezone.utc)
+                    rows.append((uuid7(), task.title, task.description, task.status.value, now, user_id, now))
+                if len(rows) + chunk_rejected >= chunk_size:
+                    await flush()
+            if rows or chunk_rejected:
+                await flush()
+            return result
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logger.error(f"Error importing tasks for user {user_id} after {result.accepted} rows: {e}")
+            raise HTTPException(status_code=500, detail="Database error")
+
+    async def rebuild_stats(self, user_id: Optional[int] = None) -> int:
+        """
+        Recalcula los contadores por estado a partir de `tasks` (de un usuario o de todos),
+        un usuario por transacción; la versión no cambia. Puede ejecutarse con la API en
+        marcha: ver _rebuild_user_stats. Devuelve el número de usuarios recalculados.
+        """
+        users = select(UserModel.id).order_by(UserModel.id)
+        if user_id is not None:
+            users = users.where(UserModel.id == user_id)
+        rebuilt = 0
+        try:
+            user_ids = (await self.db.scalars(users)).all()
+            for current_user_id in user_ids:
+                await self._rebuild_user_stats(current_user_id)
+                await self.db.commit()
+                rebuilt += 1
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logger.error(f"Error rebuilding task stats after {rebuilt} users: {e}")
+            raise HTTPException(status_code=500, detail="Database error")
+        logger.info(f"Rebuilt task stats for {rebuilt} users")
+        return rebuilt
+
+    async def _rebuild_user_stats(self, user_id: int):
+        """
+        Bloquea (o crea) la fila de estado del usuario y después cuenta sus tareas. Las
+        escrituras actualizan esa fila al final de su transacción: las que ya hicieron
+        commit entran en el recuento, y las demás esperan al commit de este y suman su
+        delta sobre el valor recalculado, así que ningún delta se pierde.
+        """
+        dialect_insert = postgresql.insert if self._dialect_name() == "postgresql" else sqlite.insert
+        # UPSERT sin cambios: bloquea la fila en PostgreSQL y toma el bloqueo de escritura en SQLite
+        lock = dialect_insert(UserTaskState).values(user_id=user_id)
+        await self.db.execute(lock.on_conflict_do_update(
+            index_elements=[UserTaskState.user_id],
+            set_={"pending_count": UserTaskState.pending_count},
+        ))
+
+        def count(task_status: str):
+            # Subconsulta en una sentencia posterior al bloqueo: su instantánea ya lo incluye todo
+            return (
+                select(func.count(TaskModel.id))
+                .where(TaskModel.user_id == user_id, TaskModel.status == task_status)
+                .scalar_subquery()
+            )
+
+        await self.db.execute(
+            update(UserTaskState)
+            .where(UserTaskState.user_id == user_id)
+            .values(pending_count=count("pending"), completed_count=count("completed"))
+            .execution_options(synchronize_session=False)
+        )
+
+    async def compact_tombstones(self, cutoff: Optional[datetime] = None, batch_size: int = 10000) -> int:
+        """
+        Borra los registros de tareas borradas anteriores a `cutoff` (por defecto, el
+        inicio de la ventana TASK_SYNC_WINDOW_DAYS: ningún token aceptado los necesita).
+        Trabaja en lotes de `batch_size` con un commit por lote, para no retener
+        bloqueos ni generar una única transacción enorme. Devuelve cuántos borró.
+        """
+        if cutoff is None:
+            cutoff = datetime.now(timezone.utc) - timedelta(days=settings.TASK_SYNC_WINDOW_DAYS)
+        expired = select(TaskTombstone.task_id).filter(TaskTombstone.deleted_at < cutoff).limit(batch_size)
+        statement = (
+            delete(TaskTombstone)
+            .where(TaskTombstone.task_id.in_(expired))
+            .execution_options(synchronize_session=False)
+        )
+        compacted = 0
+        try:
+            while True:
+                result = await self.db.execute(statement)
+                await self.db.commit()
+                compacted += result.rowcount
+                if result.rowcount < batch_size:
+                    break
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logger.error(f"Error compacting task tombstones after {compacted} rows: {e}")
+            raise HTTPException(status_code=500, detail="Database error")
+        logger.info(f"Compacted {compacted} task tombstones older than {cutoff.isoformat()}")
+        return compacted
@@ -0,0 +1,61 @@
+import asyncio
+import uuid
+from contextlib import AsyncExitStack
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+# Schemas
+from app.schemas.user import UserOut
+
+# Models
+from app.db.models.task import Task as TaskModel
+from app.db.models.user import User
+
+# Services
+from app.services.task_serialization import TASK_JSON_COLUMNS
+from app.services.task_service import TaskService
+
+# Ids que no existen: las consultas se preparan y ejecutan sin devolver filas
+_MISSING_USER_ID = 0
+_MISSING_TASK_ID = uuid.UUID(int=0)
+
+
+async def _run_hot_reads(session: AsyncSession):
+    """Las lecturas de cada petición autenticada, con las mismas sentencias que los servicios."""
+    service = TaskService(session)
+    # get_current_user (token con uid)
+    await session.execute(select(User).filter(User.id == _MISSING_USER_ID))
+    # ETag de GET /tasks/ y GET /tasks/{id}
+    await service.get_version(_MISSING_USER_ID)
+    # GET /tasks/{id} (get_task_body)
+    await session.execute(
+        select(*TASK_JSON_COLUMNS).filter(TaskModel.id == _MISSING_TASK_ID, TaskModel.user_id == _MISSING_USER_ID)
+    )
+    # Primera página de GET /tasks/ y GET /tasks/stats
+    await service.get_tasks(user_id=_MISSING_USER_ID)
+    await service.get_stats(_MISSING_USER_ID)
+
+
+def warm_up_validation():
+    """
+    Primera validación de los esquemas de cada petición: EmailStr importa
+    email_validator la primera vez que se usa (decenas de milisegundos).
+    """
+    UserOut.model_validate({"id": _MISSING_USER_ID, "email": "warm-up@example.com"})
+
+
+async def warm_up_pool(session_factory, connections: int) -> int:
+    """
+    Abre `connections` conexiones del pool a la vez y ejecuta en cada una las lecturas
+    frecuentes. Así el connect, la caché de SQL compilado de SQLAlchemy y las sentencias
+    preparadas de cada conexión (asyncpg) no los paga la primera petición. Las
+    conexiones vuelven al pool abiertas. Devuelve cuántas se prepararon.
+    """
+    if connections <= 0:
+        return 0
+    async with AsyncExitStack() as stack:
+        # Todas las sesiones siguen abiertas hasta el final: cada una retiene su conexión
+        sessions = [await stack.enter_async_context(session_factory()) for _ in range(connections)]
+        await asyncio.gather(*(_run_hot_reads(session) for session in sessions))
+    return connections
@@ -0,0 +1,363 @@
+"""
+Prueba de carga reproducible de la API: siembra N usuarios × M tareas y lanza una
+mezcla de operaciones (registro, login, CRUD, listado) con un cliente HTTP
+asíncrono y concurrencia configurable. Informa p50/p95/p99 y RPS por endpoint,
+guarda el resultado en JSON y lo compara con una línea base.
+
+Uso contra un servidor ya arrancado (SQLite o PostgreSQL, según su configuración):
+    python -m benchmarks.load_test --base-url http://localhost:8000 \\
+        --users 20 --tasks-per-user 200 --concurrency 32 --duration 30 \\
+        --output results.json
+
+Uso en el mismo proceso (sin red), con una base SQLite desechable:
+    DB_URL=sqlite+aiosqlite:///./load.db python -m benchmarks.load_test --in-process
+
+Comparación con una línea base (termina con código 1 si hay regresión):
+    python -m benchmarks.load_test ... --baseline baseline.json --max-regression 0.2
+
+`--seed` fija la secuencia de operaciones de cada worker; los emails llevan un
+sufijo aleatorio para poder repetir la prueba contra la misma base de datos.
+
+Configuración del servidor: la prueba mide el rendimiento de los endpoints, no el
+limitador de ritmo. Con los valores por defecto (RATE_LIMIT_PER_SECOND=50, ráfaga
+de 100 por usuario o IP) unos pocos usuarios sembrados reciben enseguida 429, así
+que el servidor debe arrancarse con RATE_LIMIT_PER_SECOND=0 (con --in-process se
+aplica solo). El control de admisión se deja con su configuración: forma parte de
+lo que se mide. Los 429 (límite de ritmo) y 503 (cola de admisión o de bcrypt
+llena) se cuentan aparte de los errores y no entran en latencias ni en RPS.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import httpx
+
+PASSWORD = "load-test-password"
+DEFAULT_MIX = "list=40,get=25,stats=5,create=10,update=10,delete=5,login=4,register=1"
+# Lote de creación en la siembra (por debajo de TASK_BULK_MAX_ITEMS)
+SEED_BATCH = 200
+# Muestras mínimas de un endpoint para compararlo con la línea base
+MIN_SAMPLES = 20
+# Configuración que la prueba espera del servidor (ver el docstring del módulo)
+EXPECTED_SERVER_SETTINGS = {"RATE_LIMIT_PER_SECOND": 0}
+
+
+@dataclass
+class UserSession:
+    email: str
+    headers: Dict[str, str]
+    task_ids: List[str] = field(default_factory=list)
+
+
+class Recorder:
+    """
+    Latencias y errores por endpoint. Los rechazos por carga (429 del limitador de
+    ritmo, 503 de la cola de admisión o de bcrypt) se cuentan aparte: no son errores
+    del endpoint ni peticiones atendidas, y sus latencias (inmediatas) no se mezclan.
+    """
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.rate_limited: Dict[str, int] = {}
+        self.shed: Dict[str, int] = {}
+
+    def observe(self, endpoint: str, seconds: float, status_code: Optional[int]):
+        """`status_code` None: la petición no obtuvo respuesta (error de red o timeout)."""
+        if status_code == 429:
+            self.rate_limited[endpoint] = self.rate_limited.get(endpoint, 0) + 1
+            return
+        if status_code == 503:
+            self.shed[endpoint] = self.shed.get(endpoint, 0) + 1
+            return
+        self.latencies.setdefault(endpoint, []).append(seconds)
+        if status_code is None or status_code >= 400:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def summary(self, elapsed: float) -> Dict[str, dict]:
+        result = {}
+        for endpoint in sorted({*self.latencies, *self.rate_limited, *self.shed}):
+            ordered = sorted(self.latencies.get(endpoint, []))
+            result[endpoint] = {
+                "requests": len(ordered),
+                "errors": self.errors.get(endpoint, 0),
+                "rate_limited": self.rate_limited.get(endpoint, 0),
+                "shed": self.shed.get(endpoint, 0),
+                "rps": len(ordered) / elapsed,
+                "p50_ms": _percentile(ordered, 0.50) * 1000,
+                "p95_ms": _percentile(ordered, 0.95) * 1000,
+                "p99_ms": _percentile(ordered, 0.99) * 1000,
+            }
+        return result
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """"list=40,get=25" -> pesos por operación."""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in OPERATIONS:
+            raise ValueError(f"Unknown operation in mix: {name}")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+async def _timed(client: httpx.AsyncClient, recorder: Recorder, endpoint: str, method: str, url: str, **kwargs):
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError:
+        response = None
+    recorder.observe(endpoint, time.perf_counter() - started, response.status_code if response is not None else None)
+    return response
+
+
+async def _login(client: httpx.AsyncClient, recorder: Recorder, email: str) -> Optional[Dict[str, str]]:
+    response = await _timed(
+        client, recorder, "POST /users/login", "POST", "/users/login",
+        data={"username": email, "password": PASSWORD},
+    )
+    if response is None or response.status_code != 200:
+        return None
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def _register(client: httpx.AsyncClient, recorder: Recorder, email: str) -> bool:
+    response = await _timed(
+        client, recorder, "POST /users/register", "POST", "/users/register",
+        json={"email": email, "password": PASSWORD},
+    )
+    return response is not None and response.status_code == 200
+
+
+async def seed(client: httpx.AsyncClient, users: int, tasks_per_user: int, run_id: str) -> List[UserSession]:
+    """Crea los usuarios y sus tareas (fuera de la medición)."""
+    recorder = Recorder()
+    sessions = []
+    for index in range(users):
+        email = f"load-{run_id}-{index}@example.com"
+        if not await _register(client, recorder, email):
+            raise RuntimeError(f"Could not register {email}")
+        headers = await _login(client, recorder, email)
+        if headers is None:
+            raise RuntimeError(f"Could not log in {email}")
+        session = UserSession(email=email, headers=headers)
+        for start in range(0, tasks_per_user, SEED_BATCH):
+            items = [
+                {"title": f"Tarea {number}", "description": "Sembrada por load_test",
+                 "status": "completed" if number % 3 == 0 else "pending"}
+                for number in range(start, min(start + SEED_BATCH, tasks_per_user))
+            ]
+            response = await client.post("/tasks/bulk", json={"items": items}, headers=headers)
+            response.raise_for_status()
+            session.task_ids.extend(result["id"] for result in response.json()["results"] if result["success"])
+        sessions.append(session)
+    return sessions
+
+
+# Cada operación recibe (cliente, recorder, sesión del usuario elegido, rng, run_id)
+
+async def op_list(client, recorder, session, rng, run_id):
+    await _timed(client, recorder, "GET /tasks/", "GET", "/tasks/", params={"limit": 50}, headers=session.headers)
+
+
+async def op_get(client, recorder, session, rng, run_id):
+    if session.task_ids:
+        task_id = rng.choice(session.task_ids)
+        await _timed(client, recorder, "GET /tasks/{id}", "GET", f"/tasks/{task_id}", headers=session.headers)
+
+
+async def op_stats(client, recorder, session, rng, run_id):
+    await _timed(client, recorder, "GET /tasks/stats", "GET", "/tasks/stats", headers=session.headers)
+
+
+async def op_create(client, recorder, session, rng, run_id):
+    response = await _timed(
+        client, recorder, "POST /tasks/", "POST", "/tasks/",
+        json={"title": f"Nueva {rng.randrange(10 ** 6)}", "description": "load_test"}, headers=session.headers,
+    )
+    if response is not None and response.status_code == 201:
+        session.task_ids.append(response.json()["id"])
+
+
+async def op_update(client, recorder, session, rng, run_id):
+    if session.task_ids:
+        task_id = rng.choice(session.task_ids)
+        await _timed(
+            client, recorder, "PUT /tasks/{id}", "PUT", f"/tasks/{task_id}",
+            json={"status": rng.choice(["pending", "completed"])}, headers=session.headers,
+        )
+
+
+async def op_delete(client, recorder, session, rng, run_id):
+    if len(session.task_ids) > 1:
+        task_id = session.task_ids.pop(rng.randrange(len(session.task_ids)))
+        await _timed(client, recorder, "DELETE /tasks/{id}", "DELETE", f"/tasks/{task_id}", headers=session.headers)
+
+
+async def op_login(client, recorder, session, rng, run_id):
+    await _login(client, recorder, session.email)
+
+
+async def op_register(client, recorder, session, rng, run_id):
+    await _register(client, recorder, f"load-{run_id}-new-{uuid.uuid4().hex[:12]}@example.com")
+
+
+OPERATIONS = {
+    "list": op_list, "get": op_get, "stats": op_stats, "create": op_create,
+    "update": op_update, "delete": op_delete, "login": op_login, "register": op_register,
+}
+
+
+async def drive(
+    client: httpx.AsyncClient, sessions: List[UserSession], mix: Dict[str, float],
+    concurrency: int, duration: float, seed_value: int, run_id: str,
+):
+    """Lanza `concurrency` workers durante `duration` segundos; devuelve el resumen por endpoint."""
+    recorder = Recorder()
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_id: int):
+        rng = random.Random(seed_value * 1000 + worker_id)
+        while time.perf_counter() < deadline:
+            operation = OPERATIONS[rng.choices(names, weights)[0]]
+            await operation(client, recorder, rng.choice(sessions), rng, run_id)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(worker_id) for worker_id in range(concurrency)))
+    return recorder.summary(time.perf_counter() - started)
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], max_regression: float) -> List[str]:
+    """
+    Regresiones respecto a la línea base: más errores, 429 o 503, p95 más de
+    `max_regression` peor o RPS más de `max_regression` menor. Latencias y RPS se
+    ignoran en endpoints con pocas muestras.
+    """
+    failures = []
+    for endpoint, current in results.items():
+        previous = baseline.get(endpoint)
+        if previous is None:
+            continue
+        for counter in ("errors", "rate_limited", "shed"):
+            # Líneas base anteriores a estos contadores no los tienen
+            if current[counter] > previous.get(counter, 0):
+                failures.append(f"{endpoint}: {counter} {previous.get(counter, 0)} -> {current[counter]}")
+        if min(current["requests"], previous["requests"]) < MIN_SAMPLES:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + max_regression):
+            failures.append(f"{endpoint}: p95 {previous['p95_ms']:.1f}ms -> {current['p95_ms']:.1f}ms")
+        if current["rps"] < previous["rps"] * (1 - max_regression):
+            failures.append(f"{endpoint}: rps {previous['rps']:.1f} -> {current['rps']:.1f}")
+    return failures
+
+
+def _report(results: Dict[str, dict]):
+    print(
+        f"{'endpoint':<22}{'requests':>10}{'errors':>8}{'429':>7}{'503':>7}"
+        f"{'rps':>10}{'p50_ms':>10}{'p95_ms':>10}{'p99_ms':>10}"
+    )
+    for endpoint, stats in results.items():
+        print(
+            f"{endpoint:<22}{stats['requests']:>10}{stats['errors']:>8}{stats['rate_limited']:>7}{stats['shed']:>7}"
+            f"{stats['rps']:>10.1f}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+        )
+    rate_limited = sum(stats["rate_limited"] for stats in results.values())
+    if rate_limited:
+        print(
+            f"WARNING {rate_limited} requests rate limited (429): the server is throttling the test, "
+            f"start it with RATE_LIMIT_PER_SECOND=0"
+        )
+
+
+@asynccontextmanager
+async def _in_process_transport():
+    """
+    Transporte ASGI contra la app (con EXPECTED_SERVER_SETTINGS), con su lifespan;
+    en SQLite crea las tablas si no existen.
+    """
+    from app.core.config import get_settings
+    from app.db.base import Base
+    from app.db.session import init_engines
+    from app.main import create_app
+
+    app = create_app(get_settings().model_copy(update=EXPECTED_SERVER_SETTINGS))
+    # Antes del lifespan: el calentamiento del pool ya necesita las tablas
+    engine = init_engines(get_settings())
+    if engine.dialect.name == "sqlite":
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    async with app.router.lifespan_context(app):
+        yield httpx.ASGITransport(app=app)
+
+
+async def main_async(args) -> int:
+    mix = parse_mix(args.mix)
+    run_id = uuid.uuid4().hex[:8]
+    async with AsyncExitStack() as stack:
+        if args.in_process:
+            transport = await stack.enter_async_context(_in_process_transport())
+            client = httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=args.timeout)
+        else:
+            limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+            client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits)
+        await stack.enter_async_context(client)
+        sessions = await seed(client, args.users, args.tasks_per_user, run_id)
+        print(f"seeded {len(sessions)} users x {args.tasks_per_user} tasks (run {run_id})")
+        results = await drive(client, sessions, mix, args.concurrency, args.duration, args.seed, run_id)
+
+    _report(results)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({
+                "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+                "results": results,
+            }, output, indent=2)
+        print(f"results saved to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+        failures = compare(results, baseline, args.max_regression)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        if failures:
+            return 1
+        print("no regressions against baseline")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--in-process", action="store_true", help="Usa la app importada (ASGI) en lugar de HTTP")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--tasks-per-user", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20, help="Segundos de medición")
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--output", help="Fichero JSON donde guardar los resultados")
+    parser.add_argument("--baseline", help="Resultados JSON previos con los que comparar")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Compara la latencia por llamada de `logger.info` con el FileHandler síncrono
+anterior frente al pipeline basado en cola de app.core.log.
+
+Uso:
+    python -m benchmarks.logging_latency --calls 20000 --threads 8 --io-delay-ms 1
+
+`--io-delay-ms` simula un disco lento (o un volumen de red) añadiendo una espera a
+cada escritura: es el caso en el que el handler síncrono bloquea al event loop.
+"""
+import argparse
+import logging
+import logging.handlers
+import os
+import queue
+import statistics
+import tempfile
+import threading
+import time
+
+from app.core.log import JSONFormatter, DroppingQueueHandler
+
+
+class SlowDiskHandler(logging.Handler):
+    """Envuelve un handler añadiendo una espera fija por escritura."""
+
+    def __init__(self, inner: logging.Handler, delay_seconds: float):
+        super().__init__()
+        self.inner = inner
+        self.delay_seconds = delay_seconds
+
+    def emit(self, record):
+        if self.delay_seconds:
+            time.sleep(self.delay_seconds)
+        self.inner.emit(record)
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def _run(logger: logging.Logger, calls: int, threads: int):
+    """Registra `calls` líneas desde `threads` hilos y devuelve las latencias en microsegundos."""
+    latencies = []
+    lock = threading.Lock()
+
+    def worker():
+        local = []
+        for i in range(calls // threads):
+            started = time.perf_counter()
+            logger.info("Fetched %d tasks for user %d", 100, i)
+            local.append((time.perf_counter() - started) * 1_000_000)
+        with lock:
+            latencies.extend(local)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return latencies
+
+
+def _report(name, latencies):
+    print(
+        f"{name:<8} mean={statistics.mean(latencies):8.2f}us "
+        f"p50={_percentile(latencies, 0.50):8.2f}us "
+        f"p99={_percentile(latencies, 0.99):8.2f}us "
+        f"max={max(latencies):10.2f}us"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--io-delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    delay = args.io_delay_ms / 1000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Antes: FileHandler síncrono en el hilo que registra
+        sync_logger = logging.getLogger("bench_sync")
+        sync_logger.propagate = False
+        sync_handler = logging.FileHandler(os.path.join(tmp, "sync.log"))
+        sync_handler.setFormatter(logging.Formatter(
+            '[%(asctime)s] - [%(levelname)s] - [%(name)s] - [%(funcName)s:%(lineno)d] - %(message)s'
+        ))
+        sync_logger.addHandler(SlowDiskHandler(sync_handler, delay))
+        sync_logger.setLevel(logging.INFO)
+
+        # Después: cola + listener en segundo plano con JSON y rotación
+        async_logger = logging.getLogger("bench_queue")
+        async_logger.propagate = False
+        file_handler = logging.handlers.RotatingFileHandler(os.path.join(tmp, "queue.log"), maxBytes=50 * 1024 * 1024)
+        file_handler.setFormatter(JSONFormatter())
+        log_queue = queue.Queue(maxsize=args.calls)
+        async_logger.addHandler(DroppingQueueHandler(log_queue))
+        async_logger.setLevel(logging.INFO)
+        listener = logging.handlers.QueueListener(log_queue, SlowDiskHandler(file_handler, delay))
+        listener.start()
+
+        _report("sync", _run(sync_logger, args.calls, args.threads))
+        _report("queue", _run(async_logger, args.calls, args.threads))
+
+        dropped = sum(getattr(handler, "dropped", 0) for handler in async_logger.handlers)
+        print(f"queue dropped={dropped}")
+        listener.stop()
+        sync_handler.close()
+        file_handler.close()
+
+
+if __name__ == "__main__":
+    main()
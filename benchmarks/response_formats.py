@@ -0,0 +1,86 @@
+"""
+Compara, para una página de `GET /tasks`, los bytes enviados y el CPU del servidor
+de cada formato negociable (JSON y MessagePack, por filas y por columnas), sin
+comprimir y con gzip como lo aplica GZipMiddleware.
+
+Uso:
+    python -m benchmarks.response_formats --rows 100 500 --iterations 500 --gzip-level 6
+
+Serializa filas generadas en memoria con la forma de TASK_JSON_COLUMNS: mide solo
+la codificación y la compresión, que es lo que cambia entre formatos. El CPU es
+tiempo de proceso (time.process_time) por respuesta. No necesita variables de entorno.
+"""
+import argparse
+import gzip
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from app.core.ids import uuid7
+from app.services.task_serialization import (
+    JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, TASK_JSON_FIELDS, TaskRepresentation, encode_task_list,
+)
+
+REPRESENTATIONS = [
+    TaskRepresentation(JSON_MEDIA_TYPE),
+    TaskRepresentation(JSON_MEDIA_TYPE, columnar=True),
+    TaskRepresentation(MSGPACK_MEDIA_TYPE),
+    TaskRepresentation(MSGPACK_MEDIA_TYPE, columnar=True),
+]
+WORDS = "revisar enviar llamar preparar informe reunión cliente factura código despliegue prueba".split()
+
+
+def _rows(count: int, seed: int = 42) -> List[tuple]:
+    """Filas en el orden de TASK_JSON_FIELDS, con títulos y descripciones de longitud variable."""
+    rng = random.Random(seed)
+    start = datetime.now(timezone.utc)
+    values = []
+    for i in range(count):
+        task = {
+            "id": uuid7(),
+            "title": " ".join(rng.choices(WORDS, k=rng.randint(2, 6))).capitalize(),
+            "description": " ".join(rng.choices(WORDS, k=rng.randint(0, 30))) or None,
+            "status": "completed" if i % 3 else "pending",
+            "created_at": start + timedelta(seconds=i),
+            "updated_at": start + timedelta(seconds=i),
+            "user_id": 1,
+        }
+        values.append(tuple(task[field] for field in TASK_JSON_FIELDS))
+    return values
+
+
+def _cpu_us(function, iterations: int) -> float:
+    function()
+    started = time.process_time()
+    for _ in range(iterations):
+        function()
+    return (time.process_time() - started) / iterations * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 500])
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--gzip-level", type=int, default=6)
+    args = parser.parse_args()
+
+    print(f"{'rows':>5} {'format':<38} {'bytes':>8} {'cpu_us':>8} {'gzip_bytes':>11} {'gzip_cpu_us':>12}")
+    for count in args.rows:
+        rows = _rows(count)
+        for representation in REPRESENTATIONS:
+            body = encode_task_list(rows, representation)
+            compressed = gzip.compress(body, compresslevel=args.gzip_level)
+            encode_us = _cpu_us(lambda: encode_task_list(rows, representation), args.iterations)
+            gzip_us = _cpu_us(
+                lambda: gzip.compress(encode_task_list(rows, representation), compresslevel=args.gzip_level),
+                args.iterations,
+            )
+            print(
+                f"{count:>5} {representation.content_type:<38} {len(body):>8} {encode_us:>8.1f} "
+                f"{len(compressed):>11} {gzip_us:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
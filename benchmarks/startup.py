@@ -0,0 +1,146 @@
+"""
+Mide el coste de arranque de la API:
+
+- import: segundos para importar `app.main` en un intérprete nuevo.
+- ready: desde lanzar uvicorn hasta que `GET /` responde (incluye el lifespan).
+- first burst: ráfaga de peticiones autenticadas concurrentes a `GET /tasks/` justo
+  tras el arranque (pool frío salvo lo preparado con DB_WARMUP_CONNECTIONS).
+- steady: mediana de peticiones secuenciales una vez caliente, como referencia.
+
+Uso:
+    python -m benchmarks.startup --warmup 0 10 --burst 10 --runs 5
+
+Usa la configuración del entorno (DB_*, SECRET_KEY) y una base ya migrada.
+`--app-dir` mide otro checkout (p. ej. la versión anterior) con este mismo script.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+
+EMAIL = "startup-bench@example.com"
+PASSWORD = "startup-bench-password"
+IMPORT_SNIPPET = "import time; started = time.perf_counter(); import app.main; print(time.perf_counter() - started)"
+
+
+def measure_import(app_dir: str, runs: int) -> float:
+    """Mediana del tiempo de `import app.main` en procesos nuevos."""
+    samples = [
+        float(subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET], cwd=app_dir, capture_output=True, text=True, check=True,
+        ).stdout)
+        for _ in range(runs)
+    ]
+    return statistics.median(samples)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(app_dir: str, port: int, warmup: int) -> subprocess.Popen:
+    env = {**os.environ, "DB_WARMUP_CONNECTIONS": str(warmup)}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--app-dir", app_dir,
+         "--port", str(port), "--log-level", "warning"],
+        cwd=app_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+async def _wait_ready(client: httpx.AsyncClient, process: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Server exited during startup")
+        try:
+            if (await client.get("/")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.005)
+    raise RuntimeError("Server did not become ready")
+
+
+async def _timed_get(client: httpx.AsyncClient, headers: Dict[str, str]) -> float:
+    started = time.perf_counter()
+    response = await client.get("/tasks/", params={"limit": 20}, headers=headers)
+    response.raise_for_status()
+    return (time.perf_counter() - started) * 1000
+
+
+async def _login(app_dir: str) -> Dict[str, str]:
+    """Registra (si hace falta) y autentica al usuario de la prueba en un servidor desechable."""
+    port = _free_port()
+    process = _start_server(app_dir, port, warmup=0)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+            await _wait_ready(client, process)
+            await client.post("/users/register", json={"email": EMAIL, "password": PASSWORD})
+            response = await client.post("/users/login", data={"username": EMAIL, "password": PASSWORD})
+            response.raise_for_status()
+            return {"Authorization": f"Bearer {response.json()['access_token']}"}
+    finally:
+        process.terminate()
+        process.wait()
+
+
+async def measure_run(app_dir: str, warmup: int, burst: int, headers: Dict[str, str]) -> dict:
+    port = _free_port()
+    launched = time.perf_counter()
+    process = _start_server(app_dir, port, warmup)
+    try:
+        limits = httpx.Limits(max_connections=burst, max_keepalive_connections=burst)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=30, limits=limits) as client:
+            await _wait_ready(client, process)
+            ready_ms = (time.perf_counter() - launched) * 1000
+            first = await asyncio.gather(*(_timed_get(client, headers) for _ in range(burst)))
+            steady = [await _timed_get(client, headers) for _ in range(20)]
+    finally:
+        process.terminate()
+        process.wait()
+    return {
+        "ready_ms": ready_ms,
+        "first_p50_ms": statistics.median(first),
+        "first_max_ms": max(first),
+        "steady_p50_ms": statistics.median(steady),
+    }
+
+
+def _median_runs(runs: List[dict]) -> dict:
+    return {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+
+
+async def main_async(args):
+    app_dir = os.path.abspath(args.app_dir)
+    print(f"import app.main: {measure_import(app_dir, args.runs) * 1000:.1f} ms (median of {args.runs})")
+    headers = await _login(app_dir)
+    print(f"{'warmup':>6} {'ready_ms':>9} {'first_p50':>10} {'first_max':>10} {'steady_p50':>11}   (burst {args.burst})")
+    for warmup in args.warmup:
+        result = _median_runs([await measure_run(app_dir, warmup, args.burst, headers) for _ in range(args.runs)])
+        print(
+            f"{warmup:>6} {result['ready_ms']:>9.1f} {result['first_p50_ms']:>10.1f} "
+            f"{result['first_max_ms']:>10.1f} {result['steady_p50_ms']:>11.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-dir", default=".")
+    parser.add_argument("--warmup", type=int, nargs="+", default=[0, 10], help="Valores de DB_WARMUP_CONNECTIONS")
+    parser.add_argument("--burst", type=int, default=10, help="Peticiones concurrentes tras el arranque")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Compara la clave primaria anterior de `tasks` (varchar(36) con uuid4 aleatorio) con
+la actual (uuid nativo con uuid7 ordenado por tiempo): velocidad de inserción y
+tamaño de la clave primaria y del índice (user_id, created_at, id).
+
+Uso:
+    python -m benchmarks.task_id_layout --rows 500000 --batch 1000
+
+Necesita PostgreSQL: usa la base configurada (DB_* o DB_URL) y crea y borra dos
+tablas de trabajo, sin tocar `tasks`.
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, Uuid, insert, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
+from app.core.ids import uuid7
+
+
+def _layout(metadata: MetaData, name: str, id_type, id_factory):
+    table = Table(
+        name, metadata,
+        Column("id", id_type, primary_key=True),
+        Column("title", String(50), nullable=False),
+        Column("created_at", DateTime(timezone=True), nullable=False),
+        Column("user_id", Integer, nullable=False),
+    )
+    Index(f"ix_{name}_user_id_created_at_id", table.c.user_id, table.c.created_at, table.c.id)
+    return table, id_factory
+
+
+async def _measure(engine, table: Table, id_factory, rows: int, batch: int, users: int) -> dict:
+    started = time.perf_counter()
+    for offset in range(0, rows, batch):
+        values = [
+            {"id": id_factory(), "title": f"Tarea {offset + i}", "created_at": datetime.now(timezone.utc),
+             "user_id": random.randint(1, users)}
+            for i in range(min(batch, rows - offset))
+        ]
+        async with engine.begin() as conn:
+            await conn.execute(insert(table), values)
+    elapsed = time.perf_counter() - started
+
+    async with engine.connect() as conn:
+        sizes = (await conn.execute(text(
+            "SELECT pg_relation_size(:table), pg_relation_size(:pkey), pg_relation_size(:index)"
+        ), {
+            "table": table.name, "pkey": f"{table.name}_pkey", "index": f"ix_{table.name}_user_id_created_at_id",
+        })).one()
+    return {"rows_per_second": rows / elapsed, "table": sizes[0], "pkey": sizes[1], "index": sizes[2]}
+
+
+def _mb(size: int) -> str:
+    return f"{size / 1024 / 1024:8.1f} MB"
+
+
+async def main_async(rows: int, batch: int, users: int):
+    engine = create_async_engine(settings.GET_URL_DB())
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("This benchmark needs PostgreSQL")
+    metadata = MetaData()
+    layouts = {
+        "varchar+uuid4": _layout(metadata, "bench_task_ids_text", String(36), lambda: str(uuid.uuid4())),
+        "uuid+uuid7": _layout(metadata, "bench_task_ids_uuid", Uuid, uuid7),
+    }
+    async with engine.begin() as conn:
+        await conn.run_sync(metadata.drop_all)
+        await conn.run_sync(metadata.create_all)
+    try:
+        results = {}
+        for name, (table, id_factory) in layouts.items():
+            results[name] = await _measure(engine, table, id_factory, rows, batch, users)
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(metadata.drop_all)
+        await engine.dispose()
+
+    print(f"{rows} rows, batches of {batch}, {users} users")
+    print(f"{'layout':<14} {'rows/s':>10} {'table':>11} {'pkey':>11} {'(user,created,id)':>18}")
+    for name, result in results.items():
+        print(
+            f"{name:<14} {result['rows_per_second']:10.0f} {_mb(result['table'])} "
+            f"{_mb(result['pkey'])} {_mb(result['index']):>18}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.rows, args.batch, args.users))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Compara el coste de una página de `GET /tasks` con el camino anterior (instancias
+del ORM + validación de response_model + JSONResponse) frente al actual (tuplas de
+columnas serializadas directamente a bytes JSON).
+
+Uso:
+    python -m benchmarks.task_list_serialization --rows 100 --iterations 2000
+
+Usa SQLite en memoria: mide el trabajo en Python alrededor de la consulta, que es
+lo que cambia entre ambos caminos. No necesita variables de entorno.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.future import select
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.db.models.task import Task as TaskModel
+from app.db.models.user import User
+from app.schemas.task import Task
+from app.services.task_serialization import TASK_JSON_COLUMNS, encode_task_list
+
+_adapter = TypeAdapter(List[Task])
+
+
+async def _orm_page(session: AsyncSession, limit: int) -> bytes:
+    """Camino anterior: ORM, validación con from_attributes y JSONResponse."""
+    result = await session.execute(
+        select(TaskModel).filter(TaskModel.user_id == 1).order_by(TaskModel.created_at, TaskModel.id).limit(limit)
+    )
+    tasks = result.scalars().all()
+    content = _adapter.dump_python(_adapter.validate_python(tasks, from_attributes=True), mode="json")
+    body = JSONResponse(content).body
+    # Como en cada petición, la sesión no conserva el identity map entre páginas
+    session.expunge_all()
+    return body
+
+
+async def _rows_page(session: AsyncSession, limit: int) -> bytes:
+    """Camino actual: tuplas de columnas y encode_task_list."""
+    result = await session.execute(
+        select(*TASK_JSON_COLUMNS).filter(TaskModel.user_id == 1).order_by(TaskModel.created_at, TaskModel.id).limit(limit)
+    )
+    return encode_task_list(result.all())
+
+
+async def _time(page, session: AsyncSession, limit: int, iterations: int) -> List[float]:
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await page(session, limit)
+        latencies.append((time.perf_counter() - started) * 1_000_000)
+    return latencies
+
+
+def _report(name, latencies):
+    ordered = sorted(latencies)
+    print(
+        f"{name:<5} mean={statistics.mean(latencies):9.1f}us "
+        f"p50={ordered[len(ordered) // 2]:9.1f}us "
+        f"p99={ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]:9.1f}us"
+    )
+
+
+async def main_async(rows: int, iterations: int):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as session:
+        await session.execute(insert(User), [{"id": 1, "email": "bench@example.com", "hashed_password": "x"}])
+        start = datetime.now(timezone.utc)
+        await session.execute(insert(TaskModel), [
+            {"title": f"Tarea {i}", "description": "Descripción de prueba", "user_id": 1,
+             "status": "completed" if i % 3 else "pending", "created_at": start + timedelta(microseconds=i)}
+            for i in range(rows)
+        ])
+        await session.commit()
+
+        orm_body = await _orm_page(session, rows)
+        rows_body = await _rows_page(session, rows)
+        assert orm_body == rows_body, "Both paths must produce the same bytes"
+        print(f"page: {rows} rows, {len(rows_body)} bytes (identical output)")
+
+        # Calentamiento y medición alternando para repartir el ruido
+        await _time(_orm_page, session, rows, iterations // 10)
+        await _time(_rows_page, session, rows, iterations // 10)
+        orm = await _time(_orm_page, session, rows, iterations)
+        fast = await _time(_rows_page, session, rows, iterations)
+    await engine.dispose()
+
+    _report("orm", orm)
+    _report("rows", fast)
+    print(f"speedup (mean) x{statistics.mean(orm) / statistics.mean(fast):.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.rows, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Compara `tasks` en una sola tabla con la tabla particionada por HASH (user_id) de la
+migración b7f3a9c2d481: latencia de las operaciones de TaskService, particiones que
+recorre cada consulta (EXPLAIN), duración de VACUUM tras modificar un 5 % de las
+filas y tamaño en disco.
+
+Uso:
+    python -m benchmarks.task_partitioning --rows 10000000 --users 10000 --partitions 16
+
+Necesita PostgreSQL: crea dos esquemas de trabajo (bench_tasks_single y
+bench_tasks_hash) con las tablas de la aplicación y los borra al terminar, sin tocar
+`tasks`. Ambos reciben las mismas filas; las operaciones se alternan entre los dos
+para que la caché no favorezca a ninguno.
+"""
+import argparse
+import asyncio
+import re
+import statistics
+import time
+from collections import defaultdict
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.schema import CreateIndex
+
+from app.core.config import settings
+from app.db.base import Base, Task as TaskModel
+from app.schemas import task as task_schema
+from app.services.task_service import TaskService
+
+SCHEMAS = {"single": "bench_tasks_single", "hash": "bench_tasks_hash"}
+# Filas por INSERT ... SELECT al cargar los datos
+LOAD_BATCH_ROWS = 1_000_000
+PARTITION_NAME = re.compile(r"\btasks_p\d+\b")
+TASKS_TABLE = re.compile(r"\btasks\b")
+
+
+def _engine(schema: str):
+    # Cada esquema tiene sus propias tablas con los nombres reales: TaskService no cambia
+    return create_async_engine(
+        settings.GET_URL_DB(), connect_args={"server_settings": {"search_path": schema}}
+    )
+
+
+async def _create_layout(engine, layout: str, schema: str, partitions: int):
+    """Tablas de la aplicación en `schema`; `tasks` sin índices hasta después de la carga."""
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {schema}"))
+        await conn.run_sync(Base.metadata.create_all)
+        if layout == "hash":
+            await conn.execute(text("ALTER TABLE tasks RENAME TO tasks_template"))
+            await conn.execute(text(
+                "CREATE TABLE tasks (LIKE tasks_template INCLUDING DEFAULTS) PARTITION BY HASH (user_id)"
+            ))
+            for remainder in range(partitions):
+                await conn.execute(text(
+                    f"CREATE TABLE tasks_p{remainder} PARTITION OF tasks "
+                    f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"
+                ))
+            await conn.execute(text("DROP TABLE tasks_template"))
+        else:
+            await conn.execute(text("ALTER TABLE tasks DROP CONSTRAINT tasks_pkey"))
+            await conn.execute(text("ALTER TABLE tasks DROP CONSTRAINT tasks_user_id_fkey"))
+            for index in TaskModel.__table__.indexes:
+                await conn.execute(text(f"DROP INDEX {index.name}"))
+
+
+async def _load(engines: dict, rows: int, users: int):
+    """Mismas filas en ambos esquemas: se generan en el primero y se copian al segundo."""
+    async with engines["single"].begin() as conn:
+        await conn.execute(
+            text("INSERT INTO users (id, email, hashed_password) SELECT i, 'user' || i || '@bench', 'x' "
+                 "FROM generate_series(1, CAST(:users AS integer)) i"),
+            {"users": users},
+        )
+    for start in range(0, rows, LOAD_BATCH_ROWS):
+        async with engines["single"].begin() as conn:
+            await conn.execute(text(
+                "INSERT INTO tasks (id, title, description, status, created_at, updated_at, user_id) "
+                "SELECT gen_random_uuid(), 'Tarea ' || i, NULL, "
+                "CASE WHEN i % 3 = 0 THEN 'completed' ELSE 'pending' END::status_enum, "
+                "now() - i * interval '1 second', now() - i * interval '1 second', 1 + i % :users "
+                "FROM generate_series(CAST(:first AS integer), CAST(:last AS integer)) i"
+            ), {"users": users, "first": start + 1, "last": min(start + LOAD_BATCH_ROWS, rows)})
+        print(f"loaded {min(start + LOAD_BATCH_ROWS, rows)} rows", flush=True)
+    columns = "id, title, description, status, created_at, updated_at, user_id"
+    async with engines["hash"].begin() as conn:
+        await conn.execute(text(f"INSERT INTO users SELECT * FROM {SCHEMAS['single']}.users"))
+        # Cada esquema tiene su propio tipo status_enum
+        await conn.execute(text(
+            f"INSERT INTO tasks ({columns}) SELECT id, title, description, status::text::status_enum, "
+            f"created_at, updated_at, user_id FROM {SCHEMAS['single']}.tasks"
+        ))
+    for layout, engine in engines.items():
+        started = time.perf_counter()
+        async with engine.begin() as conn:
+            primary_key = "(id)" if layout == "single" else "(id, user_id)"
+            await conn.execute(text(f"ALTER TABLE tasks ADD CONSTRAINT tasks_pkey PRIMARY KEY {primary_key}"))
+            await conn.execute(text(
+                "ALTER TABLE tasks ADD CONSTRAINT tasks_user_id_fkey "
+                "FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE"
+            ))
+            for index in TaskModel.__table__.indexes:
+                # En la tabla particionada se crea en cada partición
+                await conn.execute(CreateIndex(index))
+        async with engine.connect() as conn:
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text("VACUUM ANALYZE tasks"))
+        async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+            await TaskService(session).rebuild_stats()
+        print(f"{layout}: indexes built in {time.perf_counter() - started:.0f}s", flush=True)
+
+
+async def _sample_tasks(engine, samples: int) -> list:
+    async with engine.connect() as conn:
+        result = await conn.execute(text(
+            "SELECT user_id, id FROM tasks TABLESAMPLE SYSTEM (1) ORDER BY random() LIMIT :samples"
+        ), {"samples": samples})
+        return result.all()
+
+
+def _operations(user_id: int, task_id):
+    """(nombre, llamada) con las operaciones de TaskService sobre una tarea existente del usuario."""
+    created = {}
+
+    async def create(service):
+        created["id"] = (await service.create_user_task(task_schema.TaskCreate(title="Nueva"), user_id)).id
+
+    return [
+        ("get_tasks", lambda service: service.get_tasks(user_id, limit=50)),
+        ("get_tasks title", lambda service: service.get_tasks(user_id, limit=50, sort="title")),
+        ("get_task_body", lambda service: service.get_task_body(task_id, user_id, version=0)),
+        ("get_changes", lambda service: service.get_changes(user_id, limit=100)),
+        ("create", create),
+        ("update", lambda service: service.update_task(
+            task_id, user_id, task_schema.TaskUpdate(title="Editada")
+        )),
+        ("bulk_update", lambda service: service.bulk_update_tasks(
+            [{"id": str(task_id), "status": "completed"}], user_id
+        )),
+        ("delete", lambda service: service.delete_task(created["id"], user_id)),
+        ("rebuild_stats", lambda service: service.rebuild_stats(user_id)),
+    ]
+
+
+async def _measure_operations(engines: dict, samples: list) -> dict:
+    """Latencias por operación y esquema; guarda las sentencias sobre `tasks` del esquema particionado."""
+    timings = {layout: defaultdict(list) for layout in engines}
+    # Por operación, cada sentencia distinta con los parámetros de su primera ejecución
+    statements = defaultdict(dict)
+    current = {}
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if TASKS_TABLE.search(statement):
+            statements[current["operation"]].setdefault(statement, parameters[0] if executemany else parameters)
+
+    event.listen(engines["hash"].sync_engine, "before_cursor_execute", capture)
+    sessions = {layout: async_sessionmaker(engine, expire_on_commit=False) for layout, engine in engines.items()}
+    for user_id, task_id in samples:
+        for layout in engines:
+            for name, operation in _operations(user_id, task_id):
+                current["operation"] = name
+                async with sessions[layout]() as session:
+                    started = time.perf_counter()
+                    await operation(TaskService(session))
+                    timings[layout][name].append(time.perf_counter() - started)
+    event.remove(engines["hash"].sync_engine, "before_cursor_execute", capture)
+    return {"timings": timings, "statements": statements}
+
+
+async def _partitions_scanned(engine, statements: dict) -> dict:
+    """
+    Máximo de particiones que aparecen en el plan de las sentencias de cada operación
+    ("routed" si solo inserta: la partición se elige al ejecutar, fila a fila).
+    """
+    scanned = {}
+    async with engine.connect() as conn:
+        for name, executed in statements.items():
+            counts = []
+            for statement, parameters in executed.items():
+                plan = "\n".join(row[0] for row in await conn.exec_driver_sql(f"EXPLAIN {statement}", parameters))
+                if not plan.startswith("Insert on tasks"):
+                    counts.append(len(set(PARTITION_NAME.findall(plan))))
+            scanned[name] = str(max(counts)) if counts else "routed"
+        await conn.rollback()
+    return scanned
+
+
+async def _measure_vacuum(engines: dict, partitions: int) -> dict:
+    """Modifica el 5 % de las filas (los mismos usuarios en ambos) y mide VACUUM."""
+    results = {}
+    for layout, engine in engines.items():
+        async with engine.begin() as conn:
+            await conn.execute(text("UPDATE tasks SET title = title || '.' WHERE user_id % 20 = 0"))
+        async with engine.connect() as conn:
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text("CHECKPOINT"))
+            tables = ["tasks"] if layout == "single" else [f"tasks_p{i}" for i in range(partitions)]
+            durations = []
+            for table in tables:
+                started = time.perf_counter()
+                await conn.execute(text(f"VACUUM {table}"))
+                durations.append(time.perf_counter() - started)
+            sizes = (await conn.execute(text(
+                "SELECT sum(pg_total_relation_size(relid)), max(pg_total_relation_size(relid)) "
+                "FROM pg_partition_tree('tasks') WHERE isleaf"
+            ) if layout == "hash" else text(
+                "SELECT pg_total_relation_size('tasks'), pg_total_relation_size('tasks')"
+            ))).one()
+        results[layout] = {"max": max(durations), "total": sum(durations), "size": sizes[0], "largest": sizes[1]}
+    return results
+
+
+def _ms(values: list, quantile: float) -> float:
+    return statistics.quantiles(values, n=100)[int(quantile * 100) - 1] * 1000 if len(values) > 1 else values[0] * 1000
+
+
+def _mb(size: int) -> str:
+    return f"{size / 1024 / 1024:8.0f} MB"
+
+
+async def main_async(rows: int, users: int, partitions: int, samples: int):
+    engines = {layout: _engine(schema) for layout, schema in SCHEMAS.items()}
+    if engines["single"].dialect.name != "postgresql":
+        raise SystemExit("This benchmark needs PostgreSQL")
+    try:
+        for layout, engine in engines.items():
+            await _create_layout(engine, layout, SCHEMAS[layout], partitions)
+        await _load(engines, rows, users)
+        measured = await _measure_operations(engines, await _sample_tasks(engines["single"], samples))
+        scanned = await _partitions_scanned(engines["hash"], measured["statements"])
+        vacuum = await _measure_vacuum(engines, partitions)
+    finally:
+        async with engines["single"].begin() as conn:
+            for schema in SCHEMAS.values():
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        for engine in engines.values():
+            await engine.dispose()
+
+    timings = measured["timings"]
+    print(f"{rows} rows, {users} users, {partitions} partitions, {samples} samples")
+    print(f"{'operation':<16} {'single p50':>11} {'hash p50':>9} {'single p95':>11} {'hash p95':>9} {'partitions':>11}")
+    for name in timings["single"]:
+        single, hashed = timings["single"][name], timings["hash"][name]
+        print(
+            f"{name:<16} {_ms(single, 0.5):9.2f}ms {_ms(hashed, 0.5):7.2f}ms "
+            f"{_ms(single, 0.95):9.2f}ms {_ms(hashed, 0.95):7.2f}ms {scanned.get(name, '-'):>11}"
+        )
+    print(f"{'layout':<8} {'size':>11} {'largest':>11} {'VACUUM (max)':>13} {'VACUUM (total)':>15}")
+    for layout, result in vacuum.items():
+        print(
+            f"{layout:<8} {_mb(result['size'])} {_mb(result['largest'])} "
+            f"{result['max']:12.2f}s {result['total']:14.2f}s"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--partitions", type=int, default=settings.TASK_PARTITIONS)
+    parser.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.rows, args.users, args.partitions, args.samples))
+
+
+if __name__ == "__main__":
+    main()
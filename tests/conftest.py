@@ -1,17 +1,20 @@
 #Imports
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 import os
 #Main
-from app.main import app
+from app.core.config import Settings
+from app.main import create_app
 
 #Database
 from app.db.base import Base
+from app.db.instrumentation import instrument_engine
 #Dependens
-from app.dependens.db import get_db
+from app.dependens.db import get_db, get_session_factory, get_read_session_factory
 
 
 os.environ["APP_ENV"] = "testing"
@@ -21,6 +24,10 @@ os.environ["APP_ENV"] = "testing"
 
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
+# La app de test no arranca el lifespan (TestClient sin `with`): no crea motores y
+# las dependencias de sesión se sustituyen abajo por las de la DB de test
+app = create_app(Settings(DB_URL=TEST_DATABASE_URL, SECRET_KEY="test-secret-key"))
+
 # Usamos StaticPool para que la misma conexión persista en toda la sesión
 engine_test = create_async_engine(
     TEST_DATABASE_URL,
@@ -30,6 +37,8 @@ engine_test = create_async_engine(
     echo=False
 )
 
+instrument_engine(engine_test)
+
 async_session_maker_test = sessionmaker(
     engine_test, class_=AsyncSession, expire_on_commit=False
 )
@@ -69,6 +78,8 @@ def override_get_db():
     return _get_db
 
 app.dependency_overrides[get_db] = override_get_db()
+app.dependency_overrides[get_session_factory] = lambda: async_session_maker_test
+app.dependency_overrides[get_read_session_factory] = lambda: async_session_maker_test
 
 # ---------------------------
 # Fixture del cliente de test
@@ -80,3 +91,20 @@ def client():
     Cliente síncrono de FastAPI para tests
     """
     return TestClient(app)
+
+# ---------------------------
+# Fixture para contar sentencias SQL
+# ---------------------------
+
+@pytest.fixture
+def sql_statements():
+    """
+    Lista con las sentencias SQL ejecutadas contra la DB de test durante el test.
+    Se puede vaciar con .clear() para medir solo una operación.
+    """
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine_test.sync_engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine_test.sync_engine, "before_cursor_execute", record)
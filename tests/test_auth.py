@@ -97,3 +97,171 @@ def test_get_profile_unauthenticated(client: TestClient):
     response = client.get("/users/me")
     assert response.status_code == 401
     assert "Not authenticated" in response.json()["detail"]
+
+def _login_headers(client: TestClient, user_data):
+    client.post("/users/register", json=user_data)
+    login_response = client.post(
+        "/users/login", data={"username": user_data["email"], "password": user_data["password"]}
+    )
+    return {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+def test_authenticated_requests_skip_database(client: TestClient, test_user_data, sql_statements):
+    """
+    Tras la primera petición, el usuario se resuelve desde caché sin consultas a la DB.
+    """
+    headers = _login_headers(client, test_user_data)
+    assert client.get("/users/me", headers=headers).status_code == 200
+
+    sql_statements.clear()
+    response = client.get("/users/me", headers=headers)
+    assert response.status_code == 200
+    assert sql_statements == []
+
+def test_deleted_user_is_evicted_from_cache(client: TestClient):
+    """
+    Borrar un usuario invalida su entrada en caché y su token deja de ser válido.
+    """
+    import asyncio
+    from sqlalchemy.future import select
+    from app.db.models.user import User
+    from tests.conftest import async_session_maker_test
+
+    user_data = {"email": "borrado@example.com", "password": "strongpassword123"}
+    headers = _login_headers(client, user_data)
+    assert client.get("/users/me", headers=headers).status_code == 200
+
+    async def delete_user():
+        async with async_session_maker_test() as session:
+            result = await session.execute(select(User).filter(User.email == user_data["email"]))
+            await session.delete(result.scalars().first())
+            await session.commit()
+    asyncio.run(delete_user())
+
+    assert client.get("/users/me", headers=headers).status_code == 401
+
+def test_delete_account_disables_then_purges_in_batches(client: TestClient, monkeypatch):
+    """
+    DELETE /users/me desactiva la cuenta al momento; el worker borra sus tareas por lotes y después la cuenta.
+    """
+    import asyncio
+    from sqlalchemy import func
+    from sqlalchemy.future import select
+    from app.core.config import settings
+    from app.db.models.account_purge import AccountPurge
+    from app.db.models.task import Task
+    from app.db.models.user import User
+    from app.services.account_purge import AccountPurgeService
+    from tests.conftest import async_session_maker_test
+
+    user_data = {"email": "baja@example.com", "password": "strongpassword123"}
+    headers = _login_headers(client, user_data)
+    user_id = client.get("/users/me", headers=headers).json()["id"]
+    for i in range(5):
+        client.post("/tasks/", json={"title": f"Tarea {i}"}, headers=headers)
+    client.delete(f"/tasks/{client.post('/tasks/', json={'title': 'Borrada'}, headers=headers).json()['id']}", headers=headers)
+
+    assert client.delete("/users/me", headers=headers).status_code == 202
+    # Desactivada ya: ni el token ni la contraseña sirven, aunque las tareas sigan ahí
+    assert client.get("/users/me", headers=headers).status_code == 401
+    login = client.post("/users/login", data={"username": user_data["email"], "password": user_data["password"]})
+    assert login.status_code == 401
+
+    monkeypatch.setattr(settings, "ACCOUNT_PURGE_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "ACCOUNT_PURGE_BATCH_DELAY_SECONDS", 0)
+
+    async def purge():
+        async with async_session_maker_test() as session:
+            service = AccountPurgeService(session)
+            assert [purge.user_id for purge in await service.pending()] == [user_id]
+            accounts = await service.run_pending()
+            purge_row = (await session.execute(select(AccountPurge).filter(AccountPurge.user_id == user_id))).scalars().first()
+            tasks = await session.scalar(select(func.count()).select_from(Task).filter(Task.user_id == user_id))
+            user = await session.get(User, user_id)
+            return accounts, purge_row, tasks, user
+
+    accounts, purge_row, tasks, user = asyncio.run(purge())
+    assert accounts == 1
+    assert (tasks, user) == (0, None)
+    # 5 tareas y 1 registro de borrado
+    assert purge_row.deleted_rows == 6 and purge_row.finished_at is not None
+
+    # Purgada la cuenta, el email queda libre
+    assert client.post("/users/register", json=user_data).status_code == 200
+
+def test_deleted_account_cannot_write_from_stale_cache(client: TestClient):
+    """
+    Otro worker puede tener aún la cuenta en su caché de autenticación: las escrituras
+    se rechazan igualmente, para que la purga no deje tareas atrás.
+    """
+    from app.dependens import security
+    from app.schemas.user import UserOut
+
+    user_data = {"email": "cache-obsoleta@example.com", "password": "strongpassword123"}
+    headers = _login_headers(client, user_data)
+    task_id = client.post("/tasks/", json={"title": "Antes de la baja"}, headers=headers).json()["id"]
+    cached = UserOut.model_validate(client.get("/users/me", headers=headers).json())
+
+    assert client.delete("/users/me", headers=headers).status_code == 202
+    security.user_cache.set(user_data["email"], cached)
+
+    assert client.get("/tasks/stats", headers=headers).status_code == 200
+    assert client.post("/tasks/", json={"title": "Después de la baja"}, headers=headers).status_code == 401
+    assert client.put(f"/tasks/{task_id}", json={"status": "completed"}, headers=headers).status_code == 401
+    titles = [task["title"] for task in client.get("/tasks/", headers=headers).json()]
+    assert titles == ["Antes de la baja"]
+    security.invalidate_user(user_data["email"])
+
+def test_password_hashing_rejects_when_saturated(client: TestClient, monkeypatch):
+    """
+    Con el pool de bcrypt lleno, el registro falla al momento con 503 y Retry-After.
+    """
+    from app.core.security import password_hasher
+
+    monkeypatch.setattr(password_hasher, "_pending", password_hasher.workers + password_hasher.max_queue)
+    rejected_before = password_hasher.rejected
+    response = client.post("/users/register", json={"email": "saturado@example.com", "password": "x"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert password_hasher.rejected == rejected_before + 1
+
+def test_password_hashing_records_metrics(client: TestClient, test_user_data):
+    from app.core.security import password_hasher
+
+    client.post("/users/register", json=test_user_data)
+    client.post("/users/login", data={"username": test_user_data["email"], "password": test_user_data["password"]})
+    stats = password_hasher.stats()
+    assert stats["hash"]["count"] >= 1
+    assert stats["verify"]["count"] >= 1
+    assert stats["queue_depth"] == 0
+
+def test_password_hashing_exports_queue_gauges():
+    """Ocupación y cola del pool de bcrypt en /metrics mientras hay operaciones en curso."""
+    import asyncio
+    import threading
+    from prometheus_client import REGISTRY
+    from app.core.security import PasswordHasher
+
+    hasher = PasswordHasher(workers=1, max_queue=2)
+    release = threading.Event()
+
+    def gauges():
+        return (
+            REGISTRY.get_sample_value("password_hash_in_flight"),
+            REGISTRY.get_sample_value("password_hash_queue_depth"),
+        )
+
+    async def scenario():
+        # Una operación ocupa el único hilo y la otra espera turno
+        jobs = [asyncio.ensure_future(hasher._run("hash", release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        busy = gauges()
+        release.set()
+        await asyncio.gather(*jobs)
+        return busy, gauges()
+
+    try:
+        busy, idle = asyncio.run(scenario())
+    finally:
+        hasher.shutdown()
+    assert busy == (2.0, 1.0)
+    assert idle == (0.0, 0.0)
@@ -1,3 +1,5 @@
+import uuid
+
 import pytest
 from fastapi.testclient import TestClient
 
@@ -101,3 +103,1023 @@ def test_delete_task(client: TestClient, auth_headers, task_data):
     # Verificar que ya no existe
     get_resp = client.get(f"/tasks/{task_id}", headers=auth_headers)
     assert get_resp.status_code == 404
+
+def test_read_tasks_cursor_pagination(client: TestClient, auth_headers, task_data):
+    # Crear 3 tareas para asegurar varias páginas
+    for i in range(3):
+        client.post("/tasks/", json={**task_data, "title": f"Paginada {i}"}, headers=auth_headers)
+
+    all_tasks = client.get("/tasks/", params={"limit": 10000}, headers=auth_headers).json()
+
+    # Recorrer todas las páginas con el cursor
+    seen = []
+    response = client.get("/tasks/", params={"limit": 2}, headers=auth_headers)
+    while True:
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 2
+        seen.extend(task["id"] for task in page)
+        next_cursor = response.headers.get("X-Next-Cursor")
+        if not next_cursor:
+            break
+        response = client.get("/tasks/", params={"limit": 2, "cursor": next_cursor}, headers=auth_headers)
+
+    assert seen == [task["id"] for task in all_tasks]
+
+def test_read_tasks_skip_still_supported(client: TestClient, auth_headers, task_data):
+    client.post("/tasks/", json=task_data, headers=auth_headers)
+    client.post("/tasks/", json=task_data, headers=auth_headers)
+
+    all_tasks = client.get("/tasks/", headers=auth_headers).json()
+    response = client.get("/tasks/", params={"skip": 1, "limit": 1}, headers=auth_headers)
+    assert response.status_code == 200
+    assert [task["id"] for task in response.json()] == [all_tasks[1]["id"]]
+    assert "X-Next-Cursor" in response.headers
+
+def test_read_tasks_invalid_cursor(client: TestClient, auth_headers):
+    response = client.get("/tasks/", params={"cursor": "no-es-un-cursor"}, headers=auth_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+def test_bulk_create_tasks(client: TestClient, auth_headers, task_data):
+    payload = {"items": [task_data, {"description": "sin título"}, {**task_data, "status": "completed"}]}
+    response = client.post("/tasks/bulk", json=payload, headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["succeeded"] == 2
+    assert data["failed"] == 1
+    ok, bad, completed = data["results"]
+    assert ok["success"] and ok["task"]["title"] == task_data["title"]
+    assert not bad["success"] and bad["error"].startswith("title")
+    assert completed["task"]["status"] == "completed"
+
+    get_resp = client.get(f"/tasks/{completed['id']}", headers=auth_headers)
+    assert get_resp.status_code == 200
+
+def test_bulk_update_tasks(client: TestClient, auth_headers, task_data, sql_statements):
+    created = client.post("/tasks/bulk", json={"items": [task_data, task_data, task_data]}, headers=auth_headers).json()
+    first_id, second_id, third_id = [result["id"] for result in created["results"]]
+
+    payload = {"items": [
+        {"id": first_id, "status": "completed"},
+        {"id": second_id, "title": "Actualizada en lote"},
+        {"id": str(uuid.uuid4()), "title": "x"},
+        {"id": first_id, "status": "otro"},
+        {"id": "no-existe", "title": "x"},
+    ]}
+    response = client.patch("/tasks/bulk", json=payload, headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["succeeded"] == 2
+    assert [result["success"] for result in data["results"]] == [True, True, False, False, False]
+    assert data["results"][2]["error"] == "Task not found"
+    assert data["results"][4]["id"] == "no-existe" and data["results"][4]["error"].startswith("id")
+
+    assert client.get(f"/tasks/{first_id}", headers=auth_headers).json()["status"] == "completed"
+    assert client.get(f"/tasks/{second_id}", headers=auth_headers).json()["title"] == "Actualizada en lote"
+
+    # Un UPDATE (executemany) por conjunto de columnas; con ids repetidos gana el último valor
+    sql_statements.clear()
+    payload = {"items": [
+        {"id": first_id, "title": "Primera"},
+        {"id": second_id, "title": "Segunda"},
+        {"id": third_id, "title": "Tercera", "status": "completed"},
+        {"id": first_id, "title": "Primera bis"},
+        {"id": second_id},
+    ]}
+    data = client.patch("/tasks/bulk", json=payload, headers=auth_headers).json()
+    assert data["succeeded"] == 5
+    assert [result["task"]["title"] for result in data["results"]] == [
+        "Primera bis", "Segunda", "Tercera", "Primera bis", "Segunda",
+    ]
+    assert len([sql for sql in sql_statements if sql.startswith("UPDATE tasks")]) == 2
+    assert client.get(f"/tasks/{first_id}", headers=auth_headers).json()["title"] == "Primera bis"
+    assert client.get(f"/tasks/{third_id}", headers=auth_headers).json()["status"] == "completed"
+
+def test_bulk_rejects_items_that_do_not_fit_the_table(client: TestClient, auth_headers, task_data):
+    """Un título nulo o demasiado largo falla solo en su elemento, no en todo el lote."""
+    long_title = "x" * 51
+    response = client.post(
+        "/tasks/bulk", json={"items": [task_data, {"title": long_title}]}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [result["success"] for result in data["results"]] == [True, False]
+    assert data["results"][1]["error"] == "title: String should have at most 50 characters"
+    task_id = data["results"][0]["id"]
+
+    payload = {"items": [
+        {"id": task_id, "title": None},
+        {"id": task_id, "status": None},
+        {"id": task_id, "title": long_title},
+        {"id": task_id, "description": "Sigue funcionando"},
+    ]}
+    response = client.patch("/tasks/bulk", json=payload, headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert [result["success"] for result in data["results"]] == [False, False, False, True]
+    assert [result["error"] for result in data["results"][:3]] == [
+        "title: Field cannot be null",
+        "status: Field cannot be null",
+        "title: String should have at most 50 characters",
+    ]
+    task = client.get(f"/tasks/{task_id}", headers=auth_headers).json()
+    assert task["title"] == task_data["title"] and task["description"] == "Sigue funcionando"
+
+def test_bulk_delete_tasks(client: TestClient, auth_headers, task_data):
+    created = client.post("/tasks/bulk", json={"items": [task_data, task_data]}, headers=auth_headers).json()
+    ids = [result["id"] for result in created["results"]]
+
+    response = client.request("DELETE", "/tasks/bulk", json={"ids": ids + ["no-existe"]}, headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["succeeded"] == 2
+    assert data["results"][2] == {"index": 2, "success": False, "id": "no-existe", "task": None, "error": "Task not found"}
+    for task_id in ids:
+        assert client.get(f"/tasks/{task_id}", headers=auth_headers).status_code == 404
+
+def test_bulk_rejects_oversized_batch(client: TestClient, auth_headers, task_data, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "TASK_BULK_MAX_ITEMS", 2)
+    response = client.post("/tasks/bulk", json={"items": [task_data] * 3}, headers=auth_headers)
+    assert response.status_code == 413
+
+# ---------------------------
+# Número de sentencias por operación
+# ---------------------------
+
+def _assert_single_write(sql_statements, verb):
+    """
+    Una sentencia para la tarea (con RETURNING) más el UPSERT de versión y contadores del usuario;
+    al borrar, entre ambas, el registro del borrado para la sincronización incremental.
+    """
+    expected_extra = ["INSERT INTO task_tombstones"] if verb == "DELETE" else []
+    assert len(sql_statements) == 2 + len(expected_extra)
+    task_write, *extra, state_upsert = sql_statements
+    assert task_write.startswith(verb) and "RETURNING" in task_write
+    assert [statement[:len(prefix)] for statement, prefix in zip(extra, expected_extra)] == expected_extra
+    assert state_upsert.startswith("INSERT INTO user_task_state")
+
+def test_create_task_single_statement(client: TestClient, auth_headers, task_data, sql_statements):
+    client.get("/users/me", headers=auth_headers)  # calienta la caché de autenticación
+    sql_statements.clear()
+    response = client.post("/tasks/", json=task_data, headers=auth_headers)
+    assert response.status_code == 201
+    _assert_single_write(sql_statements, "INSERT")
+
+def test_update_task_single_statement(client: TestClient, auth_headers, task_data, sql_statements):
+    task_id = client.post("/tasks/", json=task_data, headers=auth_headers).json()["id"]
+    sql_statements.clear()
+    response = client.put(f"/tasks/{task_id}", json={"status": "completed"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "completed"
+    assert response.json()["title"] == task_data["title"]
+    # En SQLite el estado anterior se lee antes del UPDATE (en PostgreSQL, misma sentencia)
+    locked_read, *writes = sql_statements
+    assert locked_read.startswith("SELECT tasks.id, tasks.status")
+    _assert_single_write(writes, "UPDATE")
+
+def test_delete_task_single_statement(client: TestClient, auth_headers, task_data, sql_statements):
+    task_id = client.post("/tasks/", json=task_data, headers=auth_headers).json()["id"]
+    sql_statements.clear()
+    response = client.delete(f"/tasks/{task_id}", headers=auth_headers)
+    assert response.status_code == 204
+    _assert_single_write(sql_statements, "DELETE")
+
+def test_update_and_delete_missing_task(client: TestClient, auth_headers):
+    missing_id = uuid.uuid4()
+    assert client.put(f"/tasks/{missing_id}", json={"title": "x"}, headers=auth_headers).status_code == 404
+    assert client.delete(f"/tasks/{missing_id}", headers=auth_headers).status_code == 404
+
+def test_task_queries_filter_by_partition_key(client: TestClient, auth_headers, task_data, sql_statements):
+    """
+    En PostgreSQL `tasks` está particionada por user_id: toda consulta sobre ella salvo
+    las altas (que se enrutan solas) debe filtrar por user_id para tocar una partición.
+    """
+    created = client.post("/tasks/bulk", json={"items": [task_data, task_data]}, headers=auth_headers).json()
+    ids = [result["id"] for result in created["results"]]
+    sql_statements.clear()
+    assert client.get("/tasks/?limit=1", headers=auth_headers).status_code == 200
+    assert client.get(f"/tasks/{ids[0]}", headers=auth_headers).status_code == 200
+    assert client.get("/tasks/changes", headers=auth_headers).status_code == 200
+    assert client.put(f"/tasks/{ids[0]}", json={"title": "x"}, headers=auth_headers).status_code == 200
+    # El flush del ORM escribe por clave primaria, que incluye user_id
+    payload = {"items": [{"id": ids[1], "status": "completed"}]}
+    assert client.patch("/tasks/bulk", json=payload, headers=auth_headers).status_code == 200
+    assert client.delete(f"/tasks/{ids[0]}", headers=auth_headers).status_code == 204
+    assert client.request("DELETE", "/tasks/bulk", json={"ids": ids[1:]}, headers=auth_headers).status_code == 200
+    task_queries = [
+        statement for statement in sql_statements
+        if " tasks" in statement and not statement.startswith("INSERT INTO tasks")
+    ]
+    assert len(task_queries) >= 7
+    assert all("tasks.user_id = " in statement for statement in task_queries), task_queries
+
+def test_task_ids_are_time_ordered_uuids(client: TestClient, auth_headers, task_data):
+    ids = [client.post("/tasks/", json=task_data, headers=auth_headers).json()["id"] for _ in range(3)]
+    parsed = [uuid.UUID(task_id) for task_id in ids]
+    assert all(task_id.version == 7 for task_id in parsed)
+    assert parsed == sorted(parsed)
+
+def test_malformed_task_id_rejected_before_db(client: TestClient, auth_headers, sql_statements):
+    sql_statements.clear()
+    assert client.get("/tasks/no-existe", headers=auth_headers).status_code == 422
+    assert client.put("/tasks/no-existe", json={"title": "x"}, headers=auth_headers).status_code == 422
+    assert client.delete("/tasks/no-existe", headers=auth_headers).status_code == 422
+    assert not any("tasks" in statement for statement in sql_statements)
+
+def test_server_timing_header(client: TestClient, auth_headers, task_data):
+    task_id = client.post("/tasks/", json=task_data, headers=auth_headers).json()["id"]
+    response = client.get(f"/tasks/{task_id}", headers=auth_headers)
+    assert response.status_code == 200
+    server_timing = response.headers["Server-Timing"]
+    # Versión para el ETag + lectura de la tarea
+    assert 'desc="2 statements"' in server_timing
+    assert "pool;dur=" in server_timing
+    assert "app;dur=" in server_timing
+
+# ---------------------------
+# ETag / peticiones condicionales
+# ---------------------------
+
+def test_read_tasks_not_modified(client: TestClient, auth_headers, task_data, sql_statements):
+    client.post("/tasks/", json=task_data, headers=auth_headers)
+    response = client.get("/tasks/", headers=auth_headers)
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    sql_statements.clear()
+    response = client.get("/tasks/", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+    # Solo se consulta la versión, no las tareas
+    assert len(sql_statements) == 1
+    assert "user_task_state" in sql_statements[0]
+
+    # Cualquier escritura cambia la versión
+    client.post("/tasks/", json=task_data, headers=auth_headers)
+    response = client.get("/tasks/", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+def test_read_task_not_modified(client: TestClient, auth_headers, task_data):
+    create_resp = client.post("/tasks/", json=task_data, headers=auth_headers)
+    task_id = create_resp.json()["id"]
+    etag = create_resp.headers["ETag"]
+    response = client.get(f"/tasks/{task_id}", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+def test_bulk_writes_without_matches_keep_etag(client: TestClient, auth_headers, task_data):
+    client.post("/tasks/", json=task_data, headers=auth_headers)
+    etag = client.get("/tasks/", headers=auth_headers).headers["ETag"]
+    missing_id = str(uuid.uuid4())
+
+    response = client.request("DELETE", "/tasks/bulk", json={"ids": [missing_id]}, headers=auth_headers)
+    assert response.json()["failed"] == 1
+    response = client.patch("/tasks/bulk", json={"items": [{"id": missing_id, "title": "x"}]}, headers=auth_headers)
+    assert response.json()["failed"] == 1
+    # Nada cambió: el ETag sigue siendo válido
+    response = client.get("/tasks/", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+def test_update_with_if_match(client: TestClient, auth_headers, task_data):
+    create_resp = client.post("/tasks/", json=task_data, headers=auth_headers)
+    task_id = create_resp.json()["id"]
+    etag = create_resp.headers["ETag"]
+
+    response = client.put(f"/tasks/{task_id}", json={"title": "Con If-Match"}, headers={**auth_headers, "If-Match": etag})
+    assert response.status_code == 200
+    new_etag = response.headers["ETag"]
+    assert new_etag != etag
+
+    # El ETag anterior ya no es válido: la escritura se rechaza y no se aplica
+    response = client.put(f"/tasks/{task_id}", json={"title": "Obsoleta"}, headers={**auth_headers, "If-Match": etag})
+    assert response.status_code == 412
+    assert client.get(f"/tasks/{task_id}", headers=auth_headers).json()["title"] == "Con If-Match"
+
+    # Un PUT vacío no escribe, pero comprueba If-Match y devuelve el ETag actual
+    response = client.put(f"/tasks/{task_id}", json={}, headers={**auth_headers, "If-Match": etag})
+    assert response.status_code == 412
+    response = client.put(f"/tasks/{task_id}", json={}, headers={**auth_headers, "If-Match": new_etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] == new_etag
+
+    response = client.delete(f"/tasks/{task_id}", headers={**auth_headers, "If-Match": etag})
+    assert response.status_code == 412
+    response = client.delete(f"/tasks/{task_id}", headers={**auth_headers, "If-Match": new_etag})
+    assert response.status_code == 204
+
+# ---------------------------
+# Exportación en streaming
+# ---------------------------
+
+def test_export_tasks_ndjson(client: TestClient, auth_headers, task_data):
+    import json
+    client.post("/tasks/", json=task_data, headers=auth_headers)
+    listed = client.get("/tasks/", params={"limit": 10000}, headers=auth_headers).json()
+
+    response = client.get("/tasks/export", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    exported = [json.loads(line) for line in response.text.splitlines()]
+    assert exported == listed
+
+def test_export_tasks_csv(client: TestClient, auth_headers, task_data):
+    import csv
+    import io
+    client.post("/tasks/", json={**task_data, "title": "Con, coma"}, headers=auth_headers)
+    listed = client.get("/tasks/", params={"limit": 10000}, headers=auth_headers).json()
+
+    response = client.get("/tasks/export", params={"format": "csv"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["id"] for row in rows] == [task["id"] for task in listed]
+    assert "Con, coma" in [row["title"] for row in rows]
+
+def test_export_tasks_invalid_format(client: TestClient, auth_headers):
+    response = client.get("/tasks/export", params={"format": "xml"}, headers=auth_headers)
+    assert response.status_code == 422
+
+# ---------------------------
+# Importación en streaming
+# ---------------------------
+
+def test_import_tasks_ndjson(client: TestClient, auth_headers, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "TASK_IMPORT_CHUNK_ROWS", 2)
+    body = "\n".join([
+        '{"title": "Importada 1"}',
+        '{"title": "Importada 2", "status": "completed"}',
+        'no es json',
+        '{"description": "sin título"}',
+        '{"title": "Importada 3"}',
+    ])
+    response = client.post("/tasks/import", content=body, headers={**auth_headers, "Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["accepted"] == 3
+    assert data["rejected"] == 2
+    assert [chunk["accepted"] + chunk["rejected"] for chunk in data["chunks"]] == [2, 2, 1]
+    assert [row["line"] for row in data["rejected_rows"]] == [3, 4]
+    assert data["rejected_rows"][0]["error"] == "Invalid JSON"
+    assert data["truncated"] is False
+
+    # Los detalles tienen un máximo; los totales siguen contando todo
+    monkeypatch.setattr(settings, "TASK_IMPORT_MAX_REPORTED_CHUNKS", 1)
+    monkeypatch.setattr(settings, "TASK_IMPORT_MAX_REPORTED_ERRORS", 1)
+    data = client.post("/tasks/import", content=body, headers={**auth_headers, "Content-Type": "application/x-ndjson"}).json()
+    assert (data["accepted"], data["rejected"], data["truncated"]) == (3, 2, True)
+    assert [chunk["chunk"] for chunk in data["chunks"]] == [1]
+    assert [row["line"] for row in data["rejected_rows"]] == [3]
+
+    titles = [task["title"] for task in client.get("/tasks/", params={"limit": 10000}, headers=auth_headers).json()]
+    assert {"Importada 1", "Importada 2", "Importada 3"} <= set(titles)
+
+def test_import_rejects_long_lines_inside_one_chunk():
+    import asyncio
+    from app.services.task_import import MAX_LINE_BYTES, iter_lines
+
+    long_line = b"x" * (MAX_LINE_BYTES + 1)
+
+    async def lines(*chunks):
+        async def stream():
+            for chunk in chunks:
+                yield chunk
+        return [item async for item in iter_lines(stream())]
+
+    expected = [(1, b"a"), (2, None), (3, b"b")]
+    # La línea larga cabe entera en un chunk o se reparte entre varios
+    assert asyncio.run(lines(b"a\n" + long_line + b"\nb")) == expected
+    assert asyncio.run(lines(b"a\n" + long_line[:10], long_line[10:] + b"\nb")) == expected
+
+def test_import_tasks_csv(client: TestClient, auth_headers):
+    body = 'title,description,status\r\nCSV 1,"línea 1\nlínea 2",completed\r\nCSV 2,,\r\n,sin título,\r\n'
+    response = client.post("/tasks/import", params={"format": "csv"}, content=body.encode(), headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["accepted"] == 2
+    assert data["rejected"] == 1
+    assert data["rejected_rows"][0]["line"] == 5
+
+    tasks = {task["title"]: task for task in client.get("/tasks/", params={"limit": 10000}, headers=auth_headers).json()}
+    assert tasks["CSV 1"]["description"] == "línea 1\nlínea 2"
+    assert tasks["CSV 1"]["status"] == "completed"
+    assert tasks["CSV 2"]["description"] is None
+    assert tasks["CSV 2"]["status"] == "pending"
+
+# ---------------------------
+# Filtros y orden
+# ---------------------------
+
+def test_read_tasks_filters(client: TestClient, auth_headers):
+    created = client.post("/tasks/bulk", json={"items": [
+        {"title": "Filtro alfa", "status": "completed"},
+        {"title": "Filtro beta"},
+        {"title": "filtro minúscula"},
+    ]}, headers=auth_headers).json()
+    created_at = [result["task"]["created_at"] for result in created["results"]]
+
+    response = client.get("/tasks/", params={"title_prefix": "Filtro ", "limit": 10000}, headers=auth_headers)
+    assert response.status_code == 200
+    titles = {task["title"] for task in response.json()}
+    assert {"Filtro alfa", "Filtro beta"} <= titles
+    assert all(title.startswith("Filtro ") for title in titles)
+
+    response = client.get(
+        "/tasks/", params={"title_prefix": "Filtro ", "status": "completed", "limit": 10000}, headers=auth_headers
+    )
+    assert all(task["status"] == "completed" for task in response.json())
+    assert "Filtro alfa" in {task["title"] for task in response.json()}
+
+    response = client.get(
+        "/tasks/", params={"title_prefix": "Filtro ", "created_after": min(created_at), "limit": 10000},
+        headers=auth_headers,
+    )
+    assert all(task["created_at"] > min(created_at) for task in response.json())
+
+    response = client.get("/tasks/", params={"status": "otro"}, headers=auth_headers)
+    assert response.status_code == 422
+
+def test_read_tasks_title_prefix_at_maximum_code_point(client: TestClient, auth_headers):
+    """Un prefijo que acaba en U+10FFFF (no incrementable) o en U+D7FF (le siguen los sustitutos)."""
+    client.post("/tasks/bulk", json={"items": [
+        {"title": "Máx\U0010ffff"}, {"title": "Máx\U0010ffffz"}, {"title": "Máy"},
+        {"title": "\ud7ff fin"}, {"title": "\U0010ffff"},
+    ]}, headers=auth_headers)
+
+    def titles(prefix):
+        response = client.get("/tasks/", params={"title_prefix": prefix, "limit": 10000}, headers=auth_headers)
+        assert response.status_code == 200
+        return sorted(task["title"] for task in response.json())
+
+    assert titles("Máx\U0010ffff") == ["Máx\U0010ffff", "Máx\U0010ffffz"]
+    assert titles("\U0010ffff") == ["\U0010ffff"]
+    assert titles("\ud7ff") == ["\ud7ff fin"]
+
+def test_read_tasks_sort_with_cursor(client: TestClient, auth_headers):
+    client.post("/tasks/bulk", json={"items": [{"title": f"Orden {letter}"} for letter in "cabd"]}, headers=auth_headers)
+    params = {"title_prefix": "Orden ", "sort": "-title", "limit": 1}
+
+    titles = []
+    response = client.get("/tasks/", params=params, headers=auth_headers)
+    while True:
+        titles.extend(task["title"] for task in response.json())
+        next_cursor = response.headers.get("X-Next-Cursor")
+        if not next_cursor:
+            break
+        response = client.get("/tasks/", params={**params, "cursor": next_cursor}, headers=auth_headers)
+    assert titles == sorted(titles, reverse=True)
+    assert {"Orden a", "Orden b", "Orden c", "Orden d"} <= set(titles)
+
+    # Un cursor solo es válido para el orden con el que se emitió
+    first = client.get("/tasks/", params=params, headers=auth_headers)
+    response = client.get("/tasks/", params={"sort": "title", "cursor": first.headers["X-Next-Cursor"]}, headers=auth_headers)
+    assert response.status_code == 400
+
+# ---------------------------
+# Contadores por estado
+# ---------------------------
+
+def _stats(client: TestClient, auth_headers):
+    response = client.get("/tasks/stats", headers=auth_headers)
+    assert response.status_code == 200
+    return response.json()
+
+def test_task_stats_follow_writes(client: TestClient, auth_headers, task_data, sql_statements):
+    before = _stats(client, auth_headers)
+
+    task_id = client.post("/tasks/", json=task_data, headers=auth_headers).json()["id"]
+    created = client.post("/tasks/bulk", json={"items": [task_data, {**task_data, "status": "completed"}]}, headers=auth_headers).json()
+    bulk_ids = [result["id"] for result in created["results"]]
+    client.put(f"/tasks/{task_id}", json={"status": "completed"}, headers=auth_headers)
+    client.put(f"/tasks/{task_id}", json={"status": "completed"}, headers=auth_headers)  # sin cambio de estado
+    client.patch("/tasks/bulk", json={"items": [{"id": bulk_ids[1], "status": "pending"}]}, headers=auth_headers)
+    client.request("DELETE", "/tasks/bulk", json={"ids": [bulk_ids[0]]}, headers=auth_headers)
+
+    after = _stats(client, auth_headers)
+    assert after["pending"] - before["pending"] == 1
+    assert after["completed"] - before["completed"] == 1
+    assert after["total"] == after["pending"] + after["completed"]
+
+    client.delete(f"/tasks/{task_id}", headers=auth_headers)
+    assert _stats(client, auth_headers)["completed"] == after["completed"] - 1
+
+    # La lectura no depende del número de tareas: una consulta por clave primaria
+    sql_statements.clear()
+    _stats(client, auth_headers)
+    assert len(sql_statements) == 1 and "FROM user_task_state" in sql_statements[0]
+
+def test_update_with_same_status_keeps_stats(client: TestClient, auth_headers, task_data, sql_statements):
+    task_id = client.post("/tasks/", json={**task_data, "status": "completed"}, headers=auth_headers).json()["id"]
+    before = _stats(client, auth_headers)
+
+    response = client.put(f"/tasks/{task_id}", json={"status": "completed", "title": "Same status"}, headers=auth_headers)
+    assert response.status_code == 200 and response.json()["title"] == "Same status"
+    assert _stats(client, auth_headers) == before
+
+    # El cambio de estado se aplica con un único UPDATE sobre la tarea
+    sql_statements.clear()
+    client.put(f"/tasks/{task_id}", json={"status": "pending"}, headers=auth_headers)
+    assert len([sql for sql in sql_statements if sql.lstrip().startswith("UPDATE tasks")]) == 1
+    after = _stats(client, auth_headers)
+    assert (after["pending"], after["completed"]) == (before["pending"] + 1, before["completed"] - 1)
+
+def test_rebuild_task_stats(client: TestClient, auth_headers, task_data):
+    import asyncio
+    from sqlalchemy import update
+    from tests.conftest import async_session_maker_test
+    from app.db.models.task_state import UserTaskState
+    from app.services.task_service import TaskService
+
+    client.post("/tasks/", json=task_data, headers=auth_headers)
+    expected = _stats(client, auth_headers)
+    user_id = client.get("/users/me", headers=auth_headers).json()["id"]
+
+    async def corrupt_and_rebuild():
+        async with async_session_maker_test() as session:
+            await session.execute(
+                update(UserTaskState).where(UserTaskState.user_id == user_id).values(pending_count=0, completed_count=99)
+            )
+            await session.commit()
+            return await TaskService(session).rebuild_stats(user_id=user_id)
+
+    assert asyncio.run(corrupt_and_rebuild()) == 1
+    assert _stats(client, auth_headers) == expected
+
+# ---------------------------
+# Serialización sin ORM
+# ---------------------------
+
+def test_list_and_export_match_pydantic_serialization(client: TestClient, auth_headers):
+    from typing import List
+    from pydantic import TypeAdapter
+    from fastapi.responses import JSONResponse
+    from app.schemas.task import Task
+
+    items = [
+        {"title": "Ñandú \"comillas\" \\ / \u0001", "description": "línea 1\nlínea 2   😀"},
+        {"title": "Sin descripción", "status": "completed"},
+    ]
+    client.post("/tasks/bulk", json={"items": items}, headers=auth_headers)
+
+    response = client.get("/tasks/", params={"sort": "-created_at", "limit": 5}, headers=auth_headers)
+    assert response.headers["content-type"] == "application/json"
+    # Mismos bytes que devolver List[Task] validado por FastAPI
+    adapter = TypeAdapter(List[Task])
+    expected = JSONResponse(adapter.dump_python(adapter.validate_json(response.content), mode="json")).body
+    assert response.content == expected
+    assert {task["title"] for task in response.json()} >= {item["title"] for item in items}
+
+    export = client.get("/tasks/export", headers=auth_headers)
+    for line in export.content.splitlines():
+        assert Task.model_validate_json(line).model_dump_json().encode() == line
+
+# ---------------------------
+# Negociación de formato y compresión
+# ---------------------------
+
+def test_read_tasks_msgpack_and_columnar(client: TestClient, auth_headers):
+    import msgpack
+
+    items = [{"title": f"Formato {i}", "description": "ñ" * i} for i in range(3)]
+    client.post("/tasks/bulk", json={"items": items}, headers=auth_headers)
+    tasks = client.get("/tasks/", headers=auth_headers).json()
+
+    # Mismos datos que en JSON; la caché guarda cada formato por separado
+    response = client.get("/tasks/", headers={**auth_headers, "Accept": "application/msgpack"})
+    assert response.headers["content-type"] == "application/msgpack"
+    assert "Accept" in response.headers["vary"]
+    assert msgpack.unpackb(response.content) == tasks
+
+    response = client.get("/tasks/", headers={**auth_headers, "Accept": "application/msgpack; layout=columnar"})
+    assert response.headers["content-type"] == "application/msgpack; layout=columnar"
+    columns = msgpack.unpackb(response.content)
+    assert columns == {field: [task[field] for task in tasks] for field in tasks[0]}
+
+    # Gana el tipo con mayor q; sin tipos soportados se mantiene JSON
+    response = client.get("/tasks/", headers={**auth_headers, "Accept": "application/msgpack;q=0.5, application/json"})
+    assert response.json() == tasks
+    response = client.get("/tasks/", headers={**auth_headers, "Accept": "text/html"})
+    assert response.json() == tasks
+
+    task = tasks[0]
+    response = client.get(f"/tasks/{task['id']}", headers={**auth_headers, "Accept": "application/msgpack; layout=columnar"})
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content) == task
+
+def test_responses_gzip_over_threshold(client: TestClient, auth_headers):
+    items = [{"title": f"Comprimible {i}", "description": "texto repetido " * 20} for i in range(20)]
+    client.post("/tasks/bulk", json={"items": items}, headers=auth_headers)
+
+    response = client.get("/tasks/", headers={**auth_headers, "Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert len(response.json()) >= 20
+
+    # Sin negociarla, o por debajo del umbral, la respuesta va sin comprimir
+    response = client.get("/tasks/", headers={**auth_headers, "Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    response = client.get("/tasks/stats", headers={**auth_headers, "Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+# ---------------------------
+# Eventos de cambios (SSE / WebSocket)
+# ---------------------------
+
+def _sse_messages(body: str):
+    import json
+    return [json.loads(line[len("data: "):]) for line in body.splitlines() if line.startswith("data: ")]
+
+def test_task_events_websocket(client: TestClient, auth_headers, task_data):
+    from starlette.websockets import WebSocketDisconnect
+
+    token = auth_headers["Authorization"].split()[1]
+    with client.websocket_connect(f"/tasks/events/ws?access_token={token}") as websocket:
+        ready = websocket.receive_json()
+        assert ready["type"] == "ready"
+
+        created = client.post("/tasks/", json=task_data, headers=auth_headers)
+        task = created.json()
+        assert websocket.receive_json() == {
+            "type": "created", "version": ready["version"] + 1, "id": task["id"], "task": task,
+        }
+        updated = client.put(f"/tasks/{task['id']}", json={"status": "completed"}, headers=auth_headers)
+        event = websocket.receive_json()
+        assert (event["type"], event["task"]) == ("updated", updated.json())
+
+        # Una escritura que no hace commit no publica nada
+        stale = client.delete(f"/tasks/{task['id']}", headers={**auth_headers, "If-Match": created.headers["ETag"]})
+        assert stale.status_code == 412
+        client.delete(f"/tasks/{task['id']}", headers=auth_headers)
+        assert websocket.receive_json() == {"type": "deleted", "version": ready["version"] + 3, "id": task["id"]}
+
+    with pytest.raises(WebSocketDisconnect) as rejected:
+        with client.websocket_connect("/tasks/events/ws?access_token=invalid"):
+            pass
+    assert rejected.value.code == 1008
+
+def test_task_events_sse(client: TestClient, auth_headers, task_data):
+    import threading
+    import time
+    from app.core import events
+    from tests.conftest import app
+
+    def write_then_resync():
+        deadline = time.monotonic() + 5
+        while not events.event_broker.stats()["connections"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        TestClient(app).post("/tasks/", json=task_data, headers=auth_headers)
+        # Cierra el stream (como un cliente que se queda atrás) para poder leer la respuesta entera
+        events.event_broker.resync_all()
+
+    writer = threading.Thread(target=write_then_resync)
+    writer.start()
+    response = client.get("/tasks/events", headers=auth_headers)
+    writer.join()
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    ready, created, resync = _sse_messages(response.text)
+    assert ready["type"] == "ready"
+    assert (created["type"], created["version"], created["task"]["title"]) == ("created", ready["version"] + 1, task_data["title"])
+    assert resync == {"type": "resync"}
+    assert events.event_broker.stats()["connections"] == 0
+
+def test_task_events_connection_limit(client: TestClient, auth_headers, monkeypatch):
+    from app.core import events
+
+    monkeypatch.setattr(events.event_broker, "max_connections_per_user", 0)
+    response = client.get("/tasks/events", headers=auth_headers)
+    assert response.status_code == 429
+
+def test_task_events_slow_consumer_resyncs():
+    import asyncio
+    from app.core import events
+    from app.services.task_events import sse_stream
+
+    async def scenario():
+        broker = events.MemoryEventBroker(max_connections_per_user=1, queue_size=2)
+        subscription = broker.subscribe(1)
+        # Más eventos de los que caben en la cola: se descartan y queda solo "resync"
+        for number in range(3):
+            broker.dispatch(1, f'{{"type":"created","version":{number}}}')
+        return [chunk async for chunk in sse_stream(subscription, version=0)], broker.stats()
+
+    chunks, stats = asyncio.run(scenario())
+    assert _sse_messages("".join(chunks)) == [{"type": "ready", "version": 0}, {"type": "resync"}]
+    assert stats["connections"] == 0
+
+def test_event_broker_requires_publish():
+    from app.core import events
+
+    class Incomplete(events.EventBroker):
+        pass
+    # Un backend sin publish falla al crearlo, no en la primera escritura
+    with pytest.raises(TypeError):
+        Incomplete(max_connections_per_user=1, queue_size=1)
+
+# ---------------------------
+# Sincronización incremental
+# ---------------------------
+
+def _sync(client: TestClient, auth_headers, token=None, limit=1000):
+    """Recorre GET /tasks/changes hasta has_more = false; devuelve tareas, borrados y el último token."""
+    changes, deleted = [], []
+    while True:
+        params = {"limit": limit, **({"since": token} if token else {})}
+        response = client.get("/tasks/changes", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        page = response.json()
+        changes += page["changes"]
+        deleted += page["deleted"]
+        token = page["next_token"]
+        if not page["has_more"]:
+            return changes, deleted, token
+
+def test_task_changes_since_token(client: TestClient, auth_headers, task_data, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "TASK_SYNC_SAFETY_SECONDS", 0)
+
+    kept = client.post("/tasks/", json=task_data, headers=auth_headers).json()
+    initial, _, token = _sync(client, auth_headers, limit=7)
+    assert kept["id"] in {task["id"] for task in initial}
+    assert len({task["id"] for task in initial}) == len(initial)
+
+    updated = client.put(f"/tasks/{kept['id']}", json={"status": "completed"}, headers=auth_headers).json()
+    assert updated["updated_at"] > kept["updated_at"]
+    removed = client.post("/tasks/", json=task_data, headers=auth_headers).json()
+    client.delete(f"/tasks/{removed['id']}", headers=auth_headers)
+    created = client.post("/tasks/", json=task_data, headers=auth_headers).json()
+
+    # Solo lo cambiado desde el token, en orden de cambio; una página por elemento
+    changes, deleted, token = _sync(client, auth_headers, token, limit=1)
+    assert changes == [updated, created]
+    assert [item["id"] for item in deleted] == [removed["id"]]
+    assert _sync(client, auth_headers, token)[:2] == ([], [])
+
+    assert client.get("/tasks/changes", params={"since": "no-es-un-token"}, headers=auth_headers).status_code == 400
+
+def test_task_changes_expired_token_and_tombstone_compaction(client: TestClient, auth_headers, task_data):
+    import asyncio
+    from datetime import datetime, timedelta, timezone
+    from sqlalchemy import func, select
+    from tests.conftest import async_session_maker_test
+    from app.core.pagination import encode_sync_token
+    from app.db.models.task_tombstone import TaskTombstone
+    from app.services.task_service import TaskService
+
+    # Fuera de la ventana de sincronización: el cliente debe empezar de cero
+    old = datetime.now(timezone.utc) - timedelta(days=365)
+    expired = encode_sync_token((old, uuid.uuid4()), old)
+    response = client.get("/tasks/changes", params={"since": expired}, headers=auth_headers)
+    assert response.status_code == 410
+
+    for _ in range(3):
+        task_id = client.post("/tasks/", json=task_data, headers=auth_headers).json()["id"]
+        client.delete(f"/tasks/{task_id}", headers=auth_headers)
+
+    async def compact():
+        async with async_session_maker_test() as session:
+            # Dentro de la ventana no se compacta nada; con un corte futuro, todo (en lotes de 2)
+            assert await TaskService(session).compact_tombstones(batch_size=2) == 0
+            compacted = await TaskService(session).compact_tombstones(
+                cutoff=datetime.now(timezone.utc) + timedelta(seconds=1), batch_size=2
+            )
+            remaining = await session.scalar(select(func.count()).select_from(TaskTombstone))
+            return compacted, remaining
+
+    compacted, remaining = asyncio.run(compact())
+    assert compacted >= 3 and remaining == 0
+
+# ---------------------------
+# Réplica de lectura
+# ---------------------------
+
+def test_reads_use_replica_unless_user_wrote_recently(client: TestClient, auth_headers, task_data, monkeypatch, tmp_path):
+    import asyncio
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    from sqlalchemy.pool import NullPool
+    from app.db import routing
+    from app.db.base import Base
+    from app.dependens.db import get_read_session_factory
+    from tests.conftest import app, async_session_maker_test
+
+    # Réplica "retrasada": otro fichero SQLite con el esquema pero sin datos
+    replica_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}", poolclass=NullPool)
+    async def create_tables():
+        async with replica_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    asyncio.run(create_tables())
+
+    router = routing.ReadWriteRouter(
+        async_session_maker_test, async_sessionmaker(replica_engine, expire_on_commit=False),
+        pin_seconds=60, max_entries=100,
+    )
+    monkeypatch.setattr(routing, "db_router", router)
+    monkeypatch.delitem(app.dependency_overrides, get_read_session_factory)
+
+    # El usuario no está en la réplica: get_current_user recurre al primario
+    task_id = client.post("/tasks/", json=task_data, headers=auth_headers).json()["id"]
+    # Recién escrito: sus lecturas van al primario
+    assert client.get(f"/tasks/{task_id}", headers=auth_headers).status_code == 200
+    assert client.get("/tasks/stats", headers=auth_headers).json()["total"] >= 1
+
+    # Fuera de la ventana, las lecturas van a la réplica (que aún no tiene la tarea)
+    router._pinned.clear()
+    assert client.get(f"/tasks/{task_id}", headers=auth_headers).status_code == 404
+    assert client.get("/tasks/stats", headers=auth_headers).json() == {"pending": 0, "completed": 0, "total": 0}
+    asyncio.run(replica_engine.dispose())
+
+# ---------------------------
+# Caché de lecturas
+# ---------------------------
+
+def test_task_cache_hits_and_invalidation(client: TestClient, auth_headers, task_data, sql_statements, monkeypatch):
+    from app.core.cache import MemoryCacheBackend
+    from app.services import task_service
+    cache = MemoryCacheBackend(max_entries=100, ttl_seconds=60, name="test_invalidation")
+    monkeypatch.setattr(task_service, "task_cache", cache)
+
+    task_id = client.post("/tasks/", json=task_data, headers=auth_headers).json()["id"]
+    first = client.get(f"/tasks/{task_id}", headers=auth_headers)
+    client.get("/tasks/", headers=auth_headers)
+
+    # Acierto: solo se lee la versión (para el ETag), no la tarea ni la página
+    sql_statements.clear()
+    second = client.get(f"/tasks/{task_id}", headers=auth_headers)
+    client.get("/tasks/", headers=auth_headers)
+    assert second.content == first.content
+    assert len(sql_statements) == 2 and all("user_task_state" in statement for statement in sql_statements)
+    assert cache.stats()["hits"] == 2
+
+    # Una escritura cambia la versión: las entradas anteriores ya no se sirven
+    client.put(f"/tasks/{task_id}", json={"title": "Cambiada"}, headers=auth_headers)
+    assert client.get(f"/tasks/{task_id}", headers=auth_headers).json()["title"] == "Cambiada"
+    assert any(task["title"] == "Cambiada" for task in client.get("/tasks/", headers=auth_headers).json())
+    client.delete(f"/tasks/{task_id}", headers=auth_headers)
+    assert client.get(f"/tasks/{task_id}", headers=auth_headers).status_code == 404
+
+    stats = cache.stats()
+    assert stats["backend"] == "memory" and stats["hits"] == 2 and stats["misses"] >= 5
+    body = client.get("/metrics").text
+    assert 'task_cache_hits_total{cache="test_invalidation"} 2.0' in body
+    assert f'task_cache_misses_total{{cache="test_invalidation"}} {float(stats["misses"])}' in body
+
+def test_task_cache_disabled(client: TestClient, auth_headers, task_data, sql_statements, monkeypatch):
+    from app.services import task_service
+    monkeypatch.setattr(task_service, "task_cache", None)
+
+    task_id = client.post("/tasks/", json=task_data, headers=auth_headers).json()["id"]
+    client.get(f"/tasks/{task_id}", headers=auth_headers)
+    sql_statements.clear()
+    client.get(f"/tasks/{task_id}", headers=auth_headers)
+    assert len(sql_statements) == 2
+
+def test_memory_cache_counts_evictions():
+    from app.core.cache import TTLCache
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    for key in "abc":
+        cache.set(key, key)
+    assert cache.get("a") is None and cache.get("c") == "c"
+    assert cache.stats() == {"entries": 2, "hits": 1, "misses": 1, "evictions": 1, "expirations": 0}
+
+def test_cache_backend_exports_evictions():
+    import asyncio
+    from prometheus_client import REGISTRY
+    from app.core.cache import CacheBackend, MemoryCacheBackend
+    backend = MemoryCacheBackend(max_entries=1, ttl_seconds=60, name="test_evictions")
+    asyncio.run(backend.set("a", b"1"))
+    asyncio.run(backend.set("b", b"2"))
+    assert REGISTRY.get_sample_value("task_cache_evictions_total", {"cache": "test_evictions"}) == 1
+
+    class Incomplete(CacheBackend):
+        async def get(self, key):
+            return None
+    # Un backend sin set/delete/stats falla al crearlo, no en su primer uso
+    with pytest.raises(TypeError):
+        Incomplete("incomplete")
+
+# ---------------------------
+# Métricas
+# ---------------------------
+
+def test_metrics_endpoint(client: TestClient, auth_headers, task_data):
+    task_id = client.post("/tasks/", json=task_data, headers=auth_headers).json()["id"]
+    client.get(f"/tasks/{task_id}", headers=auth_headers)
+    client.get(f"/tasks/{uuid.uuid4()}", headers=auth_headers)
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    # Las rutas se etiquetan con su plantilla, no con la URL
+    assert 'http_requests_total{method="GET",route="/tasks/{task_id}",status="200"}' in body
+    assert 'http_requests_total{method="GET",route="/tasks/{task_id}",status="404"}' in body
+    assert 'http_request_duration_seconds_bucket{le="0.1",method="POST",route="/tasks/"}' in body
+    assert f"/tasks/{task_id}" not in body
+    assert 'http_requests_in_flight{method="GET"} 1.0' in body  # la propia petición a /metrics
+    assert 'password_hash_duration_seconds_count{operation="verify"}' in body
+
+# ---------------------------
+# Control de admisión
+# ---------------------------
+
+def test_admission_limiter_queues_then_sheds():
+    import asyncio
+    from app.middleware.admission import ConcurrencyLimiter
+
+    async def scenario():
+        limiter = ConcurrencyLimiter("task_write", max_concurrent=1, max_queue=1, queue_timeout=0.05)
+        assert await limiter.acquire()
+        queued = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queue_depth == 1
+        assert not await limiter.acquire()  # cola llena: rechazo inmediato
+        limiter.release()                    # el hueco pasa al que esperaba
+        assert await queued and limiter.in_flight == 1
+
+        assert not await limiter.acquire()  # espera en cola y vence el plazo
+        limiter.release()
+        return limiter.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["in_flight"] == 0 and stats["queue_depth"] == 0
+    assert stats["shed"]["queue_full"] == 1 and stats["shed"]["timeout"] == 1
+
+def test_admission_sheds_with_503_and_rate_limits_with_429(auth_headers):
+    import asyncio
+    import httpx
+    from app.middleware.admission import AdmissionControlMiddleware
+
+    async def scenario():
+        calls = {"slow": 0}
+
+        async def slow_app(scope, receive, send):
+            # Sustituye a la app: una petición lenta que mantiene ocupado el hueco
+            if scope["path"] == "/tasks/slow":
+                calls["slow"] += 1
+                await asyncio.sleep(0.2)
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        middleware = AdmissionControlMiddleware(
+            slow_app, max_concurrency={"task_read": 1}, max_queue={"task_read": 0},
+            queue_timeout=0.05, rate=1, burst=2, max_keys=100,
+        )
+        transport = httpx.ASGITransport(app=middleware)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            slow, shed = await asyncio.gather(
+                client.get("/tasks/slow", headers=auth_headers),
+                client.get("/tasks/", headers=auth_headers),
+            )
+            assert slow.status_code == 200
+            assert shed.status_code == 503 and shed.headers["retry-after"] == "1"
+
+            # Ráfaga de 2 por usuario, ya consumida: la siguiente se limita con 429
+            limited = await client.get("/tasks/", headers=auth_headers)
+            assert limited.status_code == 429 and int(limited.headers["retry-after"]) >= 1
+            # Rutas no clasificadas (/, /metrics) no se limitan
+            assert (await client.get("/metrics")).status_code == 200
+        return middleware.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["rate_limited"] == 1
+    assert stats["task_read"]["shed"]["queue_full"] == 1
+
+# ---------------------------
+# Arranque
+# ---------------------------
+
+def test_lifespan_creates_engines_and_warms_pool(tmp_path, monkeypatch):
+    import asyncio
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from app.core import config
+    from app.core.config import Settings
+    from app.db import session
+    from app.db.base import Base
+    from app.main import create_app
+
+    database_url = f"sqlite+aiosqlite:///{tmp_path / 'startup.db'}"
+    async def create_tables():
+        setup_engine = create_async_engine(database_url)
+        async with setup_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        await setup_engine.dispose()
+    asyncio.run(create_tables())
+
+    # create_app sustituye la configuración activa: se restaura la del resto de tests
+    monkeypatch.setattr(config, "_settings", config._settings)
+    startup_app = create_app(Settings(DB_URL=database_url, SECRET_KEY="startup-secret", DB_WARMUP_CONNECTIONS=2))
+    # Crear la app no abre conexiones: el motor se crea en el lifespan
+    assert session.engine is None
+    with TestClient(startup_app) as startup_client:
+        # Las conexiones preparadas vuelven abiertas al pool
+        assert session.engine.pool.checkedin() == 2
+        user = {"email": "startup@example.com", "password": "strongpassword123"}
+        assert startup_client.post("/users/register", json=user).status_code == 200
+        login = startup_client.post("/users/login", data={"username": user["email"], "password": user["password"]})
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        assert startup_client.post("/tasks/", json={"title": "Arranque"}, headers=headers).status_code == 201
+        assert [task["title"] for task in startup_client.get("/tasks/", headers=headers).json()] == ["Arranque"]
+    assert session.engine is None